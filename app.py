@@ -1,28 +1,243 @@
-
+import asyncio
+import collections
 import os
-import subprocess
+import signal
 import sys
+import time
+
+# SUPERVISOR_MODE=inprocess (default) runs and restarts the bot in this interpreter;
+# subprocess runs each attempt as a child `python app.py` in once mode;
+# once runs the bot a single time with graceful signal handling
+SUPERVISOR_MODE = os.getenv('SUPERVISOR_MODE', 'inprocess')
+RESTART_BASE_DELAY = float(os.getenv('RESTART_BASE_DELAY', '1'))
+RESTART_MAX_DELAY = float(os.getenv('RESTART_MAX_DELAY', '300'))
+# A run at least this long counts as healthy and resets the backoff
+STABLE_RUN_SECONDS = float(os.getenv('STABLE_RUN_SECONDS', '120'))
+# More than CRASH_LOOP_MAX crashes within CRASH_LOOP_WINDOW seconds stops the supervisor
+CRASH_LOOP_MAX = int(os.getenv('CRASH_LOOP_MAX', '5'))
+CRASH_LOOP_WINDOW = float(os.getenv('CRASH_LOOP_WINDOW', '600'))
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', '20'))
+
+
+class CrashLoopError(RuntimeError):
+    pass
+
+
+class RestartPolicy:
+    """Exponential backoff between restarts, with crash-loop detection."""
+
+    def __init__(self, base_delay=RESTART_BASE_DELAY, max_delay=RESTART_MAX_DELAY, stable_after=STABLE_RUN_SECONDS,
+                 max_crashes=CRASH_LOOP_MAX, window=CRASH_LOOP_WINDOW):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stable_after = stable_after
+        self.max_crashes = max_crashes
+        self.window = window
+        self.failures = 0
+        self._crashes = collections.deque()
+
+    def next_delay(self, ran_for, now=None):
+        """Record a crash after ``ran_for`` seconds; return the delay before restarting."""
+        now = time.monotonic() if now is None else now
+        if ran_for >= self.stable_after:
+            self.failures = 0
+        self.failures += 1
+
+        self._crashes.append(now)
+        while self._crashes and now - self._crashes[0] > self.window:
+            self._crashes.popleft()
+        if len(self._crashes) > self.max_crashes:
+            raise CrashLoopError(f"{len(self._crashes)} crashes in the last {self.window:.0f}s")
+
+        return min(self.max_delay, self.base_delay * 2 ** (self.failures - 1))
+
+
+class Supervisor:
+    """Keeps the bot running: restarts it after crashes and shuts it down cleanly on SIGTERM/SIGINT.
+
+    Shutdown always goes through ``bot.close()``, which stops the scheduler and
+    flushes pending data store writes before the process exits.
+
+    In-process, the supervisor owns the status server for the life of the
+    process, so /healthz keeps answering (and /readyz says 503) while the
+    bot is down between restarts.
+    """
+
+    def __init__(self, token, mode=SUPERVISOR_MODE, status_port=None, policy=None):
+        if mode not in ('inprocess', 'subprocess', 'once'):
+            raise ValueError(f"Unknown SUPERVISOR_MODE: {mode}")
+        self.token = token
+        self.mode = mode
+        self.status_port = status_port
+        self.policy = policy or RestartPolicy()
+        self.attempts = 0
+        self._stop_event = None
+        self._child = None
+
+    def request_stop(self, signum=None):
+        if self._stop_event.is_set():
+            return
+        name = signal.Signals(signum).name if signum else 'stop request'
+        print(f"🛑 Received {name}, shutting down...")
+        self._stop_event.set()
+        if self._child is not None and self._child.returncode is None:
+            self._child.terminate()
+
+    def _install_signal_handlers(self):
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(signum, self.request_stop, signum)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows: fall back to KeyboardInterrupt
+
+    async def run(self):
+        """Supervise until stopped. Returns the crash reason in once mode, else None."""
+        self._stop_event = asyncio.Event()
+        self._install_signal_handlers()
+        status_server = await self._start_status_server()
+        try:
+            return await self._supervise()
+        finally:
+            if status_server is not None:
+                await status_server.stop()
 
-def main():
-    """Run the Discord bot"""
+    async def _start_status_server(self):
+        # In subprocess mode the child serves it, since readiness lives there
+        if not self.status_port or self.mode == 'subprocess':
+            return None
+        import discord_bot
+
+        server = discord_bot.make_status_server(self.status_port)
+        await server.start()
+        discord_bot.bot.status_server = server
+        return server
+
+    async def _supervise(self):
+        run_once = self._run_subprocess if self.mode == 'subprocess' else self._run_in_process
+
+        while not self._stop_event.is_set():
+            self.attempts += 1
+            started = time.monotonic()
+            reason = await run_once()
+            if reason is None or self._stop_event.is_set():
+                return None
+            if self.mode == 'once':
+                # Non-zero exit so the parent supervisor restarts us
+                return reason
+
+            from metrics import bot_restarts
+            delay = self.policy.next_delay(time.monotonic() - started)
+            bot_restarts.inc(reason)
+            print(f"🔁 Restarting bot in {delay:.1f}s (attempt {self.attempts + 1}, last exit: {reason})")
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run_in_process(self):
+        """One bot lifetime. Returns None after a clean stop, else a short crash reason."""
+        import discord
+        import discord_bot
+        from runtime_profile import process_started_at
+
+        bot = discord_bot.bot
+        if bot.is_closed():
+            bot.clear()
+            # Closing the HTTP session also closed its connector; let login make a new one
+            connector = bot.http.connector
+            if connector is not discord.utils.MISSING and connector.closed:
+                bot.http.connector = discord.utils.MISSING
+        bot.status_port = self.status_port
+        bot.launched_at = process_started_at() if self.attempts == 1 else time.time()
+        bot.startup_seconds = None
+
+        start_task = asyncio.create_task(bot.start(self.token))
+        stop_task = asyncio.create_task(self._stop_event.wait())
+        await asyncio.wait({start_task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+        stop_task.cancel()
+
+        if not start_task.done():
+            await self._close_bot(bot)
+            try:
+                await asyncio.wait_for(start_task, SHUTDOWN_TIMEOUT)
+            except Exception:
+                pass
+            return None
+
+        error = start_task.exception()
+        await self._close_bot(bot)
+        if error is None:
+            # bot.close() was called from inside the bot
+            return None
+        if isinstance(error, (discord.LoginFailure, discord.PrivilegedIntentsRequired)):
+            # Configuration problems; restarting cannot fix them
+            raise error
+        print(f"❌ Bot crashed: {error!r}")
+        return type(error).__name__
+
+    async def _close_bot(self, bot):
+        if bot.is_closed():
+            return
+        try:
+            await asyncio.wait_for(bot.close(), SHUTDOWN_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"⚠️ Bot did not close within {SHUTDOWN_TIMEOUT:.0f}s")
+
+    async def _run_subprocess(self):
+        env = dict(os.environ, SUPERVISOR_MODE='once')
+        if self.status_port:
+            env['STATUS_PORT'] = str(self.status_port)
+        self._child = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.abspath(__file__), env=env, cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        try:
+            returncode = await self._wait_child()
+        finally:
+            self._child = None
+        if returncode == 0 or self._stop_event.is_set():
+            return None
+        return f"exit {returncode}"
+
+    async def _wait_child(self):
+        wait = asyncio.create_task(self._child.wait())
+        stop = asyncio.create_task(self._stop_event.wait())
+        await asyncio.wait({wait, stop}, return_when=asyncio.FIRST_COMPLETED)
+        stop.cancel()
+        if not wait.done():
+            # request_stop already sent SIGTERM; give the child time to flush
+            try:
+                await asyncio.wait_for(asyncio.shield(wait), SHUTDOWN_TIMEOUT)
+            except asyncio.TimeoutError:
+                print(f"⚠️ Bot process did not exit within {SHUTDOWN_TIMEOUT:.0f}s, killing it")
+                self._child.kill()
+        return await wait
+
+
+def main(status_port=None):
+    """Run the Discord bot under the supervisor"""
     print("🤖 Starting Fresh Discord Bot...")
-    
+
     # Check if Discord token is available
     token = os.getenv('DISCORD_BOT_TOKEN')
     if not token:
         print("❌ DISCORD_BOT_TOKEN not found in environment variables")
         print("Please add your Discord bot token to the Secrets tab.")
         return
-    
+
+    supervisor = Supervisor(token, status_port=status_port or os.getenv('STATUS_PORT'))
     try:
-        # Run the Discord bot
-        subprocess.run([sys.executable, "discord_bot.py"], check=True)
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Error running Discord bot: {e}")
+        if asyncio.run(supervisor.run()):
+            sys.exit(1)
+    except CrashLoopError as e:
+        print(f"❌ Crash loop detected ({e}); giving up")
+        sys.exit(1)
     except KeyboardInterrupt:
         print("\n🛑 Bot stopped by user")
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,117 @@
+import re
+
+# Common look-alikes folded onto the letter they imitate. Every entry maps one
+# character to one character so match offsets stay valid in the original text.
+HOMOGLYPHS = {
+    '0': 'o', '1': 'i', '3': 'e', '4': 'a', '5': 's', '7': 't', '8': 'b',
+    '@': 'a', '$': 's', '!': 'i', '|': 'l', '¡': 'i',
+    # Cyrillic
+    'а': 'a', 'в': 'b', 'е': 'e', 'ё': 'e', 'к': 'k', 'м': 'm', 'н': 'h',
+    'о': 'o', 'р': 'p', 'с': 'c', 'т': 't', 'у': 'y', 'х': 'x', 'і': 'i',
+    'ј': 'j', 'ѕ': 's', 'ԁ': 'd', 'һ': 'h',
+    # Greek
+    'α': 'a', 'β': 'b', 'ε': 'e', 'ι': 'i', 'κ': 'k', 'ν': 'v', 'ο': 'o',
+    'ρ': 'p', 'τ': 't', 'υ': 'u', 'χ': 'x',
+    # Accented Latin
+    'á': 'a', 'à': 'a', 'â': 'a', 'ä': 'a', 'ã': 'a', 'å': 'a',
+    'é': 'e', 'è': 'e', 'ê': 'e', 'ë': 'e',
+    'í': 'i', 'ì': 'i', 'î': 'i', 'ï': 'i',
+    'ó': 'o', 'ò': 'o', 'ô': 'o', 'ö': 'o', 'õ': 'o',
+    'ú': 'u', 'ù': 'u', 'û': 'u', 'ü': 'u', 'ç': 'c', 'ñ': 'n', 'ý': 'y',
+}
+# Fullwidth Latin letters (ａ-ｚ) fold to ASCII
+HOMOGLYPHS.update({chr(0xFF41 + i): chr(ord('a') + i) for i in range(26)})
+
+_TRANSLATION = str.maketrans(HOMOGLYPHS)
+
+
+def normalize(text):
+    """Lower-case and fold homoglyphs, keeping the string length unchanged."""
+    return text.lower().translate(_TRANSLATION)
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+
+# Positions a whole-word match can start at: the start of the text or right
+# after a non-word character
+_WORD_STARTS = re.compile(r'(?<!\w)')
+
+_END = ''
+
+
+class WordTrie:
+    """Multi-pattern matcher for whole-word bans.
+
+    Banned words are merged into one character trie. Because a match must
+    start on a word boundary, the scan only descends from word starts and
+    needs no failure links; each descent stops at the first character not
+    in the trie, so the cost per message tracks the message length rather
+    than the number of banned words.
+    """
+
+    def __init__(self, words):
+        self._root = {}
+        for word in words:
+            node = self._root
+            for char in word:
+                node = node.setdefault(char, {})
+            node[_END] = word
+
+    def iter_matches(self, text, boundary_text):
+        """Yield ``(start, end, word)`` for whole-word occurrences in ``text``.
+
+        ``boundary_text`` decides where words begin and end; it is the
+        original (un-normalized) message when lengths line up.
+        """
+        root = self._root
+        last = len(text) - 1
+        for match in _WORD_STARTS.finditer(boundary_text):
+            start = match.start()
+            node = root.get(text[start]) if start <= last else None
+            i = start
+            while node is not None:
+                word = node.get(_END)
+                if word is not None and (i == last or not _is_word_char(boundary_text[i + 1])):
+                    yield start, i, word
+                i += 1
+                if i > last:
+                    break
+                node = node.get(text[i])
+
+
+class AutomodFilter:
+    """Compiled matcher for ``automod_words``, rebuilt only when the list changes.
+
+    Matches are whole words after normalization, so "class" does not trip a
+    ban on "ass" but "b4dw0rd" still matches "badword".
+    """
+
+    def __init__(self):
+        self._matcher = None
+        self._stale = True
+
+    def invalidate(self):
+        """Call after editing the word list; the next check recompiles."""
+        self._stale = True
+
+    def compile(self, words):
+        normalized = {normalize(word.strip()) for word in words if word and word.strip()}
+        self._matcher = WordTrie(normalized) if normalized else None
+        self._stale = False
+
+    def find(self, text, words):
+        """Return the first banned word found in ``text``, or None."""
+        if self._stale:
+            self.compile(words)
+        if self._matcher is None or not text:
+            return None
+
+        normalized = normalize(text)
+        # Word boundaries come from the original text so folded symbols like
+        # a trailing "!" still count as punctuation
+        boundary_text = text if len(text) == len(normalized) else normalized
+        for _, _, word in self._matcher.iter_matches(normalized, boundary_text):
+            return word
+        return None
@@ -0,0 +1,44 @@
+"""Automod throughput (messages/second) as the banned word list grows.
+
+Usage: python benchmarks/bench_automod.py
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automod import AutomodFilter
+
+SIZES = [10, 100, 1_000, 10_000, 50_000]
+MESSAGES = 5_000
+
+
+def random_word(rng, low=4, high=10):
+    return ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(low, high)))
+
+
+def main():
+    rng = random.Random(42)
+    messages = [' '.join(random_word(rng, 2, 8) for _ in range(rng.randint(5, 30))) for _ in range(MESSAGES)]
+    avg_len = sum(map(len, messages)) / len(messages)
+    print(f"{MESSAGES} messages, avg {avg_len:.0f} chars")
+    print(f"{'words':>8} {'compile ms':>11} {'msgs/sec':>10} {'hits':>6}")
+
+    for size in SIZES:
+        words = [random_word(rng, 6, 12) for _ in range(size)]
+        automod = AutomodFilter()
+        start = time.perf_counter()
+        automod.compile(words)
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        hits = sum(1 for message in messages if automod.find(message, words))
+        elapsed = time.perf_counter() - start
+        print(f"{size:>8} {compile_ms:>11.1f} {MESSAGES / elapsed:>10.0f} {hits:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""Offline benchmark of the embed and verification handlers.
+
+Drives the real slash command callbacks, modal submits and button callbacks
+with stand-in interactions, so no token or network access is needed. Every
+combination of backend and dataset size gets a fresh guild partition on disk.
+
+Usage:
+    python benchmarks/bench_handlers.py [--backends json,snapshot,sqlite]
+        [--sizes 100:100:100,1000:10000:1000] [--ops 200] [--output results.json]
+
+A size is ``embeds:verified_users:applications``. Latency covers the handler
+only; the write that the background flusher would do is timed separately
+and reported as ``flush_ms`` and ``bytes_written`` per operation.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord_bot
+from data_store import DataStore
+from metrics import handler_calls, store_bytes_written
+from partitions import PartitionManager
+from storage import JsonBackend
+
+DEFAULT_SIZES = '100:100:100,1000:10000:1000,10000:100000:10000'
+DEFAULT_BACKENDS = 'json,snapshot,sqlite'
+BASE_USER_ID = 10 ** 17
+STAFF_ID = BASE_USER_ID - 1
+GUILD_ID = 1
+
+
+class FakeUser:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.mention = f"<@{user_id}>"
+
+    def __str__(self):
+        return f"user{self.id}"
+
+
+class FakeResponse:
+    def __init__(self, parent):
+        self._parent = parent
+        self._done = False
+        self.sent = []
+        self.modal = None
+
+    def is_done(self):
+        return self._done
+
+    def _ack(self, *args, **kwargs):
+        self._done = True
+        self._parent.extras.setdefault('first_response_at', time.perf_counter())
+        self.sent.append((args, kwargs))
+
+    async def send_message(self, content=None, **kwargs):
+        self._ack(content, **kwargs)
+
+    async def send_modal(self, modal):
+        self.modal = modal
+        self._ack(modal)
+
+    async def defer(self, **kwargs):
+        self._ack(**kwargs)
+
+    async def edit_message(self, **kwargs):
+        self._ack(**kwargs)
+
+
+class FakeFollowup:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append((content, kwargs))
+
+
+class FakeInteraction:
+    """Just enough of discord.Interaction for the handlers under test."""
+
+    _next_id = 1
+
+    def __init__(self, user_id=STAFF_ID, guild_id=GUILD_ID, channel_id=2, data=None):
+        FakeInteraction._next_id += 1
+        self.id = FakeInteraction._next_id
+        self.user = FakeUser(user_id)
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.guild = None
+        self.channel = None
+        self.data = data or {}
+        self.extras = {}
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup()
+
+    async def edit_original_response(self, **kwargs):
+        self.followup.sent.append((None, kwargs))
+
+
+def embed_record(i):
+    return {
+        'title': f"Announcement {i}",
+        'description': f"Body text for announcement {i}. " * 4,
+        'color': '#0099FF',
+        'image_url': f"https://example.com/images/{i}.png",
+        'footer_text': f"Footer {i}",
+        'show_timestamp': i % 2 == 0,
+        'version': 1,
+    }
+
+
+def build_dataset(embeds, verified, applications):
+    stored_embeds = {f"embed_{i}": embed_record(i) for i in range(embeds)}
+    ria = {
+        f"ria_app_{i}": {
+            'user_id': BASE_USER_ID + i,
+            'username': f"applicant{i}",
+            'age': '21',
+            'experience': 'Two years moderating',
+            'motivation': 'Help the community',
+            'availability': 'Evenings UTC',
+            'status': 'pending' if i % 3 else 'approved',
+            'submitted_at': f"2025-01-01T00:00:00.{i:06d}",
+            'reviewed_by': None,
+            'review_notes': None,
+        }
+        for i in range(1, applications + 1)
+    }
+    return {
+        'stored_embeds': stored_embeds,
+        'embed_counter': embeds + 1,
+        'verified_users': [STAFF_ID] + list(range(BASE_USER_ID, BASE_USER_ID + verified)),
+        'ria_applications': ria,
+        'ria_application_counter': applications + 1,
+    }
+
+
+def make_partitions(kind, directory):
+    global_store = DataStore(JsonBackend(os.path.join(directory, 'global.json')))
+    global_store.load()
+    return PartitionManager(
+        global_store,
+        directory=os.path.join(directory, 'guilds'),
+        kind='sqlite' if kind == 'sqlite' else 'json',
+        mode='snapshot' if kind == 'snapshot' else 'journal',
+        legacy_guild_id=None
+    )
+
+
+async def install_partition(kind, directory, dataset):
+    """Persist ``dataset`` as the benchmark guild's partition and point the bot at it."""
+    partitions = make_partitions(kind, directory)
+    os.makedirs(partitions.directory, exist_ok=True)
+    seed = DataStore(partitions.make_backend(GUILD_ID))
+    seed._data = dataset
+    seed.mark_full_write()
+    seed.flush_sync()
+    seed.backend.close()
+
+    discord_bot.partitions = partitions
+    return partitions, await partitions.get(GUILD_ID)
+
+
+def fill_modal(modal, **values):
+    for name, value in values.items():
+        getattr(modal, name)._value = value
+
+
+async def press(view, label):
+    """Click a routed component the way Discord would: by its custom_id."""
+    item = next(child for child in view.children if child.label == label)
+    await discord_bot.components.dispatch(FakeInteraction(data={'custom_id': item.custom_id}))
+
+
+# One async function per benchmarked operation; ``i`` makes each call unique.
+
+async def op_create_embed(i):
+    interaction = FakeInteraction()
+    await discord_bot.create_embed.callback(interaction)
+    modal = interaction.response.modal
+    fill_modal(modal, embed_name_input=f"bench_new_{i}", title_input=f"New {i}",
+               description_input="Created by the benchmark", color_input='#FF0000', image_input='')
+    submit = FakeInteraction()
+    await modal.on_submit(submit)
+    await press(submit.response.sent[0][1]['view'], "Save Embed")
+
+
+async def op_spawn_embed(i, count):
+    interaction = FakeInteraction()
+    await discord_bot.spawn_embed.callback(interaction, embed_name=f"embed_{i % count}")
+
+
+async def op_edit_embed(i, count):
+    interaction = FakeInteraction()
+    await discord_bot.edit_embed.callback(interaction, embed_name=f"embed_{i % count}")
+    modal = interaction.response.modal
+    fill_modal(modal, title_input=f"Edited {i}", description_input="Edited by the benchmark",
+               color_input='#00FF00', image_input='', footer_input='Edited')
+    await modal.on_submit(FakeInteraction())
+
+
+async def op_delete_embed(i, count):
+    interaction = FakeInteraction()
+    await discord_bot.delete_embed.callback(interaction, embed_name=f"embed_{count - 1 - i}")
+    await press(interaction.response.sent[0][1]['view'], "Yes, Delete")
+
+
+async def op_verify(i):
+    modal = discord_bot.VerificationModal()
+    fill_modal(modal, key_input=discord_bot.VERIFICATION_KEY)
+    await modal.on_submit(FakeInteraction(user_id=i + 1))
+
+
+async def op_create_embed_from_data(i, count):
+    partition = await discord_bot.partitions.get(GUILD_ID)
+    discord_bot.create_embed_from_data(partition.store.section('stored_embeds')[f"embed_{i % count}"])
+
+
+def error_count():
+    return sum(value for (handler, outcome), value in handler_calls._values.items() if outcome == 'error')
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run_operation(store, name, operation, ops):
+    errors_before = error_count()
+    written_before = store_bytes_written.value(store.backend.name)
+    latencies = []
+    flush_time = 0.0
+
+    for i in range(ops):
+        start = time.perf_counter()
+        await operation(i)
+        latencies.append(time.perf_counter() - start)
+        # Through the store's write lock: the partition's background flusher is running too
+        start = time.perf_counter()
+        await store.flush()
+        flush_time += time.perf_counter() - start
+
+    # Allocation profile over a short second pass; tracing slows the handlers,
+    # so it is kept out of the latency numbers above
+    sample = min(ops, 50)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    for i in range(ops, ops + sample):
+        await operation(i)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    await store.flush()
+
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        'operation': name,
+        'ops': ops,
+        'ops_per_sec': round(ops / total, 1) if total else None,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 4),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 4),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 4),
+        'flush_ms': round(flush_time / ops * 1000, 4),
+        'bytes_written': round((store_bytes_written.value(store.backend.name) - written_before) / ops, 1),
+        'alloc_peak_bytes': round((peak - baseline) / sample),
+        'alloc_retained_bytes': round((retained - baseline) / sample),
+        'errors': error_count() - errors_before,
+    }
+
+
+async def run_case(kind, directory, size, ops):
+    embeds, verified, applications = size
+    ops = min(ops, embeds // 2) if embeds >= 2 else ops
+    dataset = build_dataset(embeds, verified, applications)
+    partitions, partition = await install_partition(kind, directory, dataset)
+    store = partition.store
+    load = DataStore(partitions.make_backend(GUILD_ID))
+    start = time.perf_counter()
+    load.load()
+    load_ms = (time.perf_counter() - start) * 1000
+    load.backend.close()
+
+    operations = [
+        ('create_embed_from_data', lambda i: op_create_embed_from_data(i, embeds)),
+        ('spawn_embed', lambda i: op_spawn_embed(i, embeds)),
+        ('create_embed', op_create_embed),
+        ('edit_embed', lambda i: op_edit_embed(i, embeds)),
+        ('verification_submit', op_verify),
+        # Last, since it shrinks the dataset; the allocation pass needs spare embeds
+        ('delete_embed', lambda i: op_delete_embed(i, embeds)),
+    ]
+    results = []
+    for name, operation in operations:
+        result = await run_operation(store, name, operation, ops)
+        result.update(backend=kind, embeds=embeds, verified_users=verified, applications=applications,
+                      load_ms=round(load_ms, 2))
+        results.append(result)
+    await partitions.close()
+    return results
+
+
+def parse_sizes(text):
+    sizes = []
+    for part in text.split(','):
+        embeds, verified, applications = (int(value) for value in part.split(':'))
+        sizes.append((embeds, verified, applications))
+    return sizes
+
+
+async def run(backends, sizes, ops):
+    results = []
+    for kind in backends:
+        for size in sizes:
+            with tempfile.TemporaryDirectory() as directory:
+                results.extend(await run_case(kind, directory, size, ops))
+    return results
+
+
+def print_table(results):
+    header = f"{'backend':<9} {'embeds':>7} {'users':>7} {'apps':>6} {'operation':<24} {'ops/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'flush ms':>9} {'B/op':>10} {'alloc B':>9}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        flag = f"  ({r['errors']} errors)" if r['errors'] else ''
+        print(f"{r['backend']:<9} {r['embeds']:>7} {r['verified_users']:>7} {r['applications']:>6} {r['operation']:<24} "
+              f"{r['ops_per_sec']:>10} {r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f} {r['flush_ms']:>9.3f} "
+              f"{r['bytes_written']:>10} {r['alloc_peak_bytes']:>9}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backends', default=DEFAULT_BACKENDS, help="json (journal), snapshot, sqlite")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="embeds:verified_users:applications, comma separated")
+    parser.add_argument('--ops', type=int, default=200, help="operations per handler per case")
+    parser.add_argument('--output', default='bench_handlers.json', help="where to write the JSON results")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.backends.split(','), parse_sizes(args.sizes), args.ops))
+    print_table(results)
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'created_at': time.time(),
+            'results': results,
+        }, f, indent=2)
+    print(f"\nWrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Personalized embed renders/second: compiled plans vs. a regex pass per spawn.
+
+Usage: python benchmarks/bench_templates.py
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embed_cache import EmbedCache, build_embed, normalize_embed_data
+from templates import VARIABLES, template_context
+
+EMBEDS = 50
+USERS = [100, 1_000, 10_000]
+RENDERS = 20_000
+
+NAIVE_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+
+class FakeUser:
+    def __init__(self, user_id):
+        self.display_name = f"member{user_id}"
+
+
+class FakeGuild:
+    name = "Zenith Staff"
+    member_count = 12_345
+
+
+def embed_record(i):
+    return normalize_embed_data({
+        'title': f"Welcome {{user}} to {{guild}}! ({i})",
+        'description': f"You are one of {{member_count}} members. Notice {i} posted {{date}}. " * 3,
+        'color': '#0099FF',
+        'footer_text': "{guild} staff team",
+        'author_name': "Announcements",
+        'version': 1,
+    })
+
+
+def naive_render(embed_data, context):
+    """The per-spawn alternative: a regex substitution over every field."""
+    rendered = dict(embed_data)
+    for field in ('title', 'description', 'footer_text', 'author_name'):
+        if rendered.get(field):
+            rendered[field] = NAIVE_PLACEHOLDER.sub(lambda m: context.get(m.group(1), m.group(0)), rendered[field])
+    return build_embed(rendered)
+
+
+def main():
+    rng = random.Random(42)
+    embeds = {f"embed_{i}": embed_record(i) for i in range(EMBEDS)}
+    names = list(embeds)
+    guild = FakeGuild()
+    print(f"{EMBEDS} templated embeds, {RENDERS} renders, placeholders: {', '.join(VARIABLES)}")
+    print(f"{'users':>7} {'regex/sec':>10} {'cold/sec':>10} {'warm/sec':>10} {'hit rate':>9}")
+
+    for user_count in USERS:
+        contexts = [template_context(FakeUser(user_id), guild) for user_id in range(user_count)]
+        picks = [(rng.choice(names), rng.choice(contexts)) for _ in range(RENDERS)]
+
+        start = time.perf_counter()
+        for name, context in picks:
+            naive_render(embeds[name], context)
+        naive = RENDERS / (time.perf_counter() - start)
+
+        # Big enough for every (embed, user) pair drawn, as a busy guild's cache would be
+        cache = EmbedCache(max_size=EMBEDS + RENDERS)
+        start = time.perf_counter()
+        for name, context in picks:
+            cache.get(name, embeds[name], context)
+        cold = RENDERS / (time.perf_counter() - start)
+
+        hits_before = cache.hits
+        start = time.perf_counter()
+        for name, context in picks:
+            cache.get(name, embeds[name], context)
+        warm = RENDERS / (time.perf_counter() - start)
+
+        hit_rate = (cache.hits - hits_before) / RENDERS
+        print(f"{user_count:>7} {naive:>10.0f} {cold:>10.0f} {warm:>10.0f} {hit_rate:>9.1%}")
+
+
+if __name__ == "__main__":
+    main()
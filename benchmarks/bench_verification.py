@@ -0,0 +1,61 @@
+"""Per-check latency of the verified-user gate as the verified list grows.
+
+Usage: python benchmarks/bench_verification.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_store import DataStore
+from storage import JsonBackend
+
+SIZES = [100, 1_000, 10_000, 100_000, 1_000_000]
+CHECKS = 200_000
+BASE_ID = 10 ** 17
+
+
+def build_store(directory, size):
+    path = os.path.join(directory, f"bench_{size}.json")
+    with open(path, 'w') as f:
+        json.dump({'verified_users': list(range(BASE_ID, BASE_ID + size))}, f)
+    store = DataStore(JsonBackend(path))
+    store.load()
+    return store
+
+
+def time_checks(store, user_ids):
+    start = time.perf_counter()
+    for user_id in user_ids:
+        store.contains('verified_users', user_id)
+    return (time.perf_counter() - start) / len(user_ids)
+
+
+def main():
+    print(f"{'verified':>10} {'hit ns':>10} {'miss ns':>10} {'list miss ns':>14}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            store = build_store(directory, size)
+            store.contains('verified_users', 0)  # build the index outside the timing
+            step = max(1, size // CHECKS)
+            hits = [BASE_ID + (i * step) % size for i in range(CHECKS)]
+            misses = [i for i in range(CHECKS)]
+            hit = time_checks(store, hits)
+            miss = time_checks(store, misses)
+
+            # The old list scan, sampled a few times so large sizes finish
+            users = store.get('verified_users')
+            start = time.perf_counter()
+            samples = 20
+            for i in range(samples):
+                i in users
+            list_miss = (time.perf_counter() - start) / samples
+
+            print(f"{size:>10} {hit * 1e9:>10.0f} {miss * 1e9:>10.0f} {list_miss * 1e9:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import math
+import os
+import time
+
+
+def parse_shard_ids(text):
+    """'0-3' / '0,2,4' / '0-1,4' -> [ids], or None when unset."""
+    if not text:
+        return None
+    shard_ids = []
+    for part in text.split(','):
+        part = part.strip()
+        if '-' in part:
+            start, end = part.split('-', 1)
+            shard_ids.extend(range(int(start), int(end) + 1))
+        elif part:
+            shard_ids.append(int(part))
+    return sorted(set(shard_ids))
+
+
+def sharding_options():
+    """Read SHARDED / SHARD_COUNT / SHARD_IDS; returns kwargs for AutoShardedBot or None."""
+    shard_count = os.getenv('SHARD_COUNT')
+    shard_ids = parse_shard_ids(os.getenv('SHARD_IDS'))
+    if os.getenv('SHARDED') != '1' and not shard_count and not shard_ids:
+        return None
+
+    options = {}
+    if shard_count:
+        options['shard_count'] = int(shard_count)
+    if shard_ids:
+        if 'shard_count' not in options:
+            raise ValueError("SHARD_IDS requires SHARD_COUNT so shards can be split across processes")
+        if shard_ids[-1] >= options['shard_count']:
+            raise ValueError(f"SHARD_IDS {shard_ids} out of range for SHARD_COUNT={options['shard_count']}")
+        options['shard_ids'] = shard_ids
+    return options
+
+
+def shard_for(guild_id, shard_count):
+    """Shard that receives a guild's events; DMs (no guild) go to shard 0."""
+    return (guild_id >> 22) % shard_count if guild_id else 0
+
+
+def local_shard_ids(options):
+    """Shard ids this process runs when it runs only some of them, else None."""
+    if not options or 'shard_ids' not in options:
+        return None
+    if options['shard_ids'] == list(range(options['shard_count'])):
+        return None
+    return options['shard_ids']
+
+
+def shard_scope(options):
+    """Storage name suffix for a process running only some shards, e.g. 'shards-0_1'."""
+    shard_ids = local_shard_ids(options)
+    if shard_ids is None:
+        return None
+    return 'shards-' + '_'.join(map(str, shard_ids))
+
+
+def local_guild_filter(options):
+    """Predicate for guild ids whose events reach this process, or None if it runs every shard."""
+    shard_ids = local_shard_ids(options)
+    if shard_ids is None:
+        return None
+    shard_ids, shard_count = set(shard_ids), options['shard_count']
+    return lambda guild_id: shard_for(guild_id, shard_count) in shard_ids
+
+
+class ShardHealth:
+    """Per-shard readiness and reconnect counters, fed from gateway events.
+
+    An unsharded bot is tracked as shard 0.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._shards = {}
+
+    def _entry(self, shard_id):
+        shard_id = shard_id or 0
+        entry = self._shards.get(shard_id)
+        if entry is None:
+            entry = self._shards[shard_id] = {
+                'ready': False,
+                'ready_at': None,
+                'disconnects': 0,
+                'resumes': 0,
+            }
+        return entry
+
+    def mark_ready(self, shard_id=None):
+        entry = self._entry(shard_id)
+        entry['ready'] = True
+        entry['ready_at'] = time.time()
+
+    def mark_disconnected(self, shard_id=None):
+        entry = self._entry(shard_id)
+        entry['ready'] = False
+        entry['disconnects'] += 1
+
+    def mark_resumed(self, shard_id=None):
+        entry = self._entry(shard_id)
+        entry['ready'] = True
+        entry['resumes'] += 1
+
+    def all_ready(self):
+        return bool(self._shards) and all(entry['ready'] for entry in self._shards.values())
+
+    def report(self, bot):
+        """One dict per shard this process runs: readiness, latency and guild count."""
+        shards = getattr(bot, 'shards', None)
+        if shards:
+            latencies = {shard_id: info.latency for shard_id, info in shards.items()}
+        else:
+            latencies = {0: bot.latency}
+
+        guild_counts = dict.fromkeys(latencies, 0)
+        for guild in bot.guilds:
+            shard_id = guild.shard_id or 0
+            guild_counts[shard_id] = guild_counts.get(shard_id, 0) + 1
+
+        report = []
+        for shard_id in sorted(latencies):
+            entry = self._entry(shard_id)
+            latency = latencies[shard_id]
+            report.append({
+                'shard_id': shard_id,
+                'ready': entry['ready'],
+                'ready_at': entry['ready_at'],
+                'latency_ms': None if latency is None or math.isinf(latency) or math.isnan(latency) else round(latency * 1000, 1),
+                'guilds': guild_counts.get(shard_id, 0),
+                'disconnects': entry['disconnects'],
+                'resumes': entry['resumes'],
+            })
+        return report
+
+
+shard_health = ShardHealth()
@@ -0,0 +1,188 @@
+import asyncio
+import re
+import time
+
+import discord
+
+# Discord allows ~50 requests/second per bot globally, and message creation
+# is bucketed per channel (5 messages per 5 seconds).
+GLOBAL_RATE = 50
+CHANNEL_BURST = 5
+CHANNEL_WINDOW = 5.0
+
+CHANNEL_ID_PATTERN = re.compile(r'\d{15,20}')
+
+
+def parse_channel_ids(text):
+    """Pull channel IDs out of a string of mentions and/or raw IDs, keeping order."""
+    seen = []
+    for match in CHANNEL_ID_PATTERN.findall(text or ''):
+        channel_id = int(match)
+        if channel_id not in seen:
+            seen.append(channel_id)
+    return seen
+
+
+class RateLimiter:
+    """Client-side pacing for Discord's global and per-channel message buckets.
+
+    discord.py retries 429s on its own; pacing here keeps a large fan-out
+    from hitting them in the first place.
+    """
+
+    def __init__(self, global_rate=GLOBAL_RATE, channel_burst=CHANNEL_BURST, channel_window=CHANNEL_WINDOW):
+        self.global_rate = global_rate
+        self.channel_burst = channel_burst
+        self.channel_window = channel_window
+        self._tokens = float(global_rate)
+        self._updated = time.monotonic()
+        self._global_lock = asyncio.Lock()
+        self._channel_sends = {}
+        self._blocked_until = {}
+
+    async def acquire(self, channel_id):
+        await self._acquire_channel(channel_id)
+        await self.acquire_global()
+
+    def channel_delay(self, channel_id):
+        """Seconds until ``channel_id``'s bucket has room (0 if it has room now)."""
+        now = time.monotonic()
+        delay = self._blocked_until.get(channel_id, 0) - now
+        if delay <= 0:
+            self._blocked_until.pop(channel_id, None)
+        sends = self._channel_sends.get(channel_id)
+        if sends:
+            sends[:] = [t for t in sends if now - t < self.channel_window]
+            if len(sends) >= self.channel_burst:
+                delay = max(delay, self.channel_window - (now - sends[0]))
+            elif not sends:
+                del self._channel_sends[channel_id]
+        return max(delay, 0.0)
+
+    def take_channel(self, channel_id):
+        """Count a send against ``channel_id``'s bucket."""
+        self._channel_sends.setdefault(channel_id, []).append(time.monotonic())
+
+    def block(self, channel_id, seconds):
+        """Hold a bucket closed after Discord answered 429 with ``retry_after``."""
+        until = time.monotonic() + seconds
+        self._blocked_until[channel_id] = max(until, self._blocked_until.get(channel_id, 0))
+
+    async def acquire_global(self):
+        async with self._global_lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.global_rate, self._tokens + (now - self._updated) * self.global_rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.global_rate)
+
+    async def _acquire_channel(self, channel_id):
+        while True:
+            delay = self.channel_delay(channel_id)
+            if delay <= 0:
+                self.take_channel(channel_id)
+                return
+            await asyncio.sleep(delay)
+
+
+rate_limiter = RateLimiter()
+
+
+def _is_retryable(error):
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    if isinstance(error, discord.HTTPException):
+        return error.status == 429 or error.status >= 500
+    return False
+
+
+async def _resolve_channel(bot, channel_id):
+    channel = bot.get_channel(channel_id)
+    if channel is None:
+        channel = await bot.fetch_channel(channel_id)
+    return channel
+
+
+async def _send_one(bot, channel_id, guild_id, embed, semaphore, limiter, retries, base_delay, dispatcher):
+    start = time.perf_counter()
+    result = {'channel_id': channel_id, 'ok': False, 'error': None, 'attempts': 0, 'latency': 0.0, 'rejected': False}
+    async with semaphore:
+        try:
+            channel = await _resolve_channel(bot, channel_id)
+        except discord.HTTPException as e:
+            result['error'] = f"cannot access channel ({e.status})"
+            result['latency'] = time.perf_counter() - start
+            return result
+        channel_guild = getattr(channel, 'guild', None)
+        if channel_guild is None or channel_guild.id != guild_id:
+            # Staff are verified per server, so they may only post into their own
+            result['error'] = "not a channel in this server"
+            result['rejected'] = True
+            result['latency'] = time.perf_counter() - start
+            return result
+
+        for attempt in range(retries + 1):
+            result['attempts'] = attempt + 1
+            try:
+                if dispatcher is not None:
+                    await dispatcher.announce(channel, embed=embed)
+                else:
+                    await limiter.acquire(channel_id)
+                    await channel.send(embed=embed)
+                result['ok'] = True
+                result['error'] = None
+                break
+            except Exception as e:
+                result['error'] = str(e) or type(e).__name__
+                if not _is_retryable(e) or attempt == retries:
+                    break
+                retry_after = getattr(e, 'retry_after', None)
+                await asyncio.sleep(retry_after or base_delay * (2 ** attempt))
+
+    result['latency'] = time.perf_counter() - start
+    return result
+
+
+async def broadcast_embed(bot, embed, channel_ids, guild_id, concurrency=8, retries=3, base_delay=1.0, limiter=None,
+                          dispatcher=None):
+    """Send ``embed`` to every channel concurrently and return one result dict per channel.
+
+    Channels outside ``guild_id`` are not sent to and come back ``rejected``.
+
+    With a ``dispatcher`` (see outbound.py) the sends queue there at
+    announcement priority instead of pacing themselves with ``limiter``.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = limiter or rate_limiter
+    return await asyncio.gather(*(
+        _send_one(bot, channel_id, guild_id, embed, semaphore, limiter, retries, base_delay, dispatcher)
+        for channel_id in channel_ids
+    ))
+
+
+def format_report(results, limit=1800):
+    """Summary line plus per-channel status, trimmed to fit in one message."""
+    sent = sum(1 for r in results if r['ok'])
+    rejected = sum(1 for r in results if r.get('rejected'))
+    slowest = max((r['latency'] for r in results), default=0.0)
+    summary = f"📣 **Broadcast finished:** {sent}/{len(results)} delivered · slowest {slowest * 1000:.0f} ms"
+    if rejected:
+        summary += f" · {rejected} rejected (not in this server)"
+    lines = [summary]
+    length = len(lines[0])
+    for i, r in enumerate(results):
+        if r['ok']:
+            line = f"✅ <#{r['channel_id']}> {r['latency'] * 1000:.0f} ms"
+        elif r.get('rejected'):
+            line = f"🚫 <#{r['channel_id']}> {r['error']}"
+        else:
+            line = f"❌ <#{r['channel_id']}> {r['error']} ({r['attempts']} attempts)"
+        if length + len(line) + 1 > limit:
+            lines.append(f"…and {len(results) - i} more")
+            break
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)
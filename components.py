@@ -0,0 +1,71 @@
+import discord
+
+PREFIX = 'zs'
+# Discord rejects component custom_ids longer than this
+CUSTOM_ID_LIMIT = 100
+
+
+class ComponentRouter:
+    """Routes button and select presses by ``custom_id`` instead of live View objects.
+
+    A custom_id reads ``zs:<action>:<arg>:...``. Handlers are registered once
+    at import, and whatever a click needs either travels in the id or is
+    looked up in the store, so nothing is held per message and components
+    keep working across restarts. The last argument may itself contain
+    ``:`` (embed names do).
+    """
+
+    def __init__(self, prefix=PREFIX):
+        self.prefix = prefix
+        self._routes = {}
+
+    def custom_id(self, action, *args):
+        custom_id = ':'.join((self.prefix, action) + tuple(str(arg) for arg in args))
+        if len(custom_id) > CUSTOM_ID_LIMIT:
+            raise ValueError(f"custom_id longer than {CUSTOM_ID_LIMIT} characters: {custom_id[:40]}...")
+        return custom_id
+
+    def route(self, action, fields=0):
+        """Register ``handler(interaction, *args)`` for ids with ``fields`` arguments."""
+        def decorator(handler):
+            self._routes[action] = (handler, fields)
+            return handler
+        return decorator
+
+    async def dispatch(self, interaction):
+        """Run the handler for a component interaction. Returns False if the id is not ours."""
+        custom_id = (interaction.data or {}).get('custom_id') or ''
+        prefix, _, rest = custom_id.partition(':')
+        if prefix != self.prefix:
+            return False
+        action, _, rest = rest.partition(':')
+        route = self._routes.get(action)
+        args = rest.split(':', route[1] - 1) if route and route[1] else []
+        if route is None or len(args) != route[1]:
+            print(f"⚠️ No component handler for {custom_id}")
+            return False
+        await route[0](interaction, *args)
+        return True
+
+
+class ComponentLayout(discord.ui.View):
+    """The components of one message, wired to router custom_ids.
+
+    Stopped as soon as it is built, so discord.py neither tracks it nor
+    starts a timeout; presses arrive through ``ComponentRouter.dispatch``.
+    """
+
+    def __init__(self, *items):
+        super().__init__(timeout=None)
+        for item in items:
+            self.add_item(item)
+        self.stop()
+
+
+def selected_value(interaction):
+    """First chosen option of a select menu interaction."""
+    values = (interaction.data or {}).get('values') or ()
+    return values[0] if values else None
+
+
+components = ComponentRouter()
@@ -0,0 +1,320 @@
+import asyncio
+import contextlib
+import os
+import time
+
+from metrics import store_bytes_written, store_flush_duration, store_load_duration
+from storage import create_backend
+
+# Seconds to wait after the first change before writing, so bursts of
+# mutations are coalesced into a single write.
+FLUSH_DELAY = float(os.getenv('DATA_FLUSH_DELAY', '2.0'))
+
+
+def default_data():
+    return {
+        "stored_embeds": {},
+        "embed_counter": 1,
+        "verified_users": []
+    }
+
+
+class DataStore:
+    """Process-wide bot data, loaded once and served from memory.
+
+    Mutations are applied in memory and recorded as small op records; a
+    background task hands them to the storage backend after ``flush_delay``
+    seconds, with the actual I/O running off the event loop.
+    """
+
+    def __init__(self, backend=None, flush_delay=FLUSH_DELAY, record_load=store_load_duration.set, scope=None,
+                 make_backend=None):
+        self._backend = backend
+        # Creates the backend on first use when none is passed (default: create_backend)
+        self._make_backend = make_backend
+        # Suffix for the backend file we create, so processes splitting the
+        # shards between them do not write the same file
+        self.scope = scope
+        # Called with (seconds, backend name) after each load
+        self.record_load = record_load
+        # A backend we created is reopened on the next start after close()
+        self._owns_backend = backend is None
+        self.flush_delay = flush_delay
+        self._data = None
+        self._list_index = {}
+        self._pending = []
+        self._full_write = False
+        self._dirty = False
+        self._dirty_event = None
+        self._flush_task = None
+        self._write_lock = None
+        self._bulk_depth = 0
+        self._closed = False
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = self._make_backend() if self._make_backend else create_backend(scope=self.scope)
+        return self._backend
+
+    # Loading
+
+    def load(self):
+        """Read persisted data into memory. Safe to call more than once."""
+        if self._data is not None:
+            return self._data
+
+        return self._install(*self._read())
+
+    async def open(self):
+        """Load with the disk read off the event loop, then start the flusher."""
+        if self._data is None:
+            data, needs_full = await asyncio.to_thread(self._read)
+            if self._data is None:
+                self._install(data, needs_full)
+        await self.start()
+
+    async def open_new(self):
+        """Start from default data with nothing on disk yet.
+
+        The backend is only created by the first flush, which writes the
+        whole document, so a store that is never changed leaves no file.
+        """
+        if self._data is None:
+            self._install({}, needs_full=False)
+            self._full_write = True
+        await self.start()
+
+    def _read(self):
+        start = time.perf_counter()
+        data, needs_full = self.backend.load()
+        self.record_load(time.perf_counter() - start, self.backend.name)
+        return data, needs_full
+
+    def _install(self, data, needs_full):
+        for key, value in default_data().items():
+            data.setdefault(key, value)
+
+        self._data = data
+        if needs_full:
+            self._full_write = True
+            self._dirty = True
+        return data
+
+    @property
+    def loaded(self):
+        return self._data is not None
+
+    @property
+    def data(self):
+        return self.load()
+
+    # Reads
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def section(self, name):
+        """Return a top-level dict section, creating it if missing."""
+        return self.data.setdefault(name, {})
+
+    def _members(self, section):
+        """Set mirror of a list section, built on first use and kept in sync."""
+        index = self._list_index.get(section)
+        if index is None:
+            index = set(self.data.get(section, ()))
+            self._list_index[section] = index
+        return index
+
+    def contains(self, section, value):
+        """O(1) membership test for a list section such as ``verified_users``."""
+        return value in self._members(section)
+
+    # Mutations
+
+    def _check_writable(self):
+        if self._closed:
+            raise RuntimeError("Data store is closed; the write would be lost")
+
+    def set(self, key, value):
+        self._check_writable()
+        self.data[key] = value
+        self._list_index.pop(key, None)
+        self._record({'op': 'set', 'k': key, 'v': value})
+
+    def put(self, section, key, value):
+        self._check_writable()
+        self.section(section)[key] = value
+        self._record({'op': 'put', 's': section, 'k': key, 'v': value})
+
+    def remove(self, section, key):
+        """Delete ``key`` from a dict section. Returns False if it was missing."""
+        self._check_writable()
+        items = self.data.get(section, {})
+        if key not in items:
+            return False
+        del items[key]
+        self._record({'op': 'del', 's': section, 'k': key})
+        return True
+
+    def add_unique(self, section, value):
+        """Append ``value`` to a list section unless present. Returns True if added."""
+        self._check_writable()
+        members = self._members(section)
+        if value in members:
+            return False
+        self.data.setdefault(section, []).append(value)
+        members.add(value)
+        self._record({'op': 'add', 's': section, 'v': value})
+        return True
+
+    def increment(self, key, start=1):
+        """Bump an integer counter and return its previous value."""
+        current = self.data.get(key, start)
+        # Recorded as a plain set so replay stays idempotent
+        self.set(key, current + 1)
+        return current
+
+    def _record(self, op):
+        self._pending.append(op)
+        self.mark_dirty()
+
+    def mark_dirty(self):
+        self._dirty = True
+        if self._dirty_event is not None:
+            self._dirty_event.set()
+
+    def mark_full_write(self):
+        """Persist the whole document on the next flush (e.g. to compact a journal)."""
+        self._full_write = True
+        self.mark_dirty()
+
+    def stats(self):
+        return {
+            'backend': self.backend.name,
+            'loaded': self.loaded,
+            'dirty': self._dirty,
+            'pending_ops': len(self._pending),
+            'bulk': self.in_bulk,
+        }
+
+    @property
+    def in_bulk(self):
+        return self._bulk_depth > 0
+
+    @contextlib.asynccontextmanager
+    async def bulk(self):
+        """Hold background flushes so everything changed inside is written in one commit on exit."""
+        self._bulk_depth += 1
+        try:
+            yield self
+        finally:
+            self._bulk_depth -= 1
+            if self._bulk_depth == 0:
+                await self.flush()
+
+    # Flushing
+
+    async def start(self):
+        """Start the background flusher on the running loop."""
+        self.load()
+        self._closed = False
+        if self._flush_task is not None:
+            return
+        self._dirty_event = asyncio.Event()
+        self._write_lock = asyncio.Lock()
+        if self._dirty:
+            self._dirty_event.set()
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while True:
+            await self._dirty_event.wait()
+            await asyncio.sleep(self.flush_delay)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"❌ Failed to save bot data: {e}")
+
+    def _take_batch(self):
+        """Serialize pending changes on the loop thread and reset dirty state."""
+        ops, full = self._pending, self._full_write
+        self._pending = []
+        self._full_write = False
+        self._dirty = False
+        if self._dirty_event is not None:
+            self._dirty_event.clear()
+        return ops, full, self.backend.prepare(ops, self._data, full)
+
+    def _restore_batch(self, ops, full):
+        self._pending[:0] = ops
+        self._full_write = self._full_write or full
+        self.mark_dirty()
+
+    async def flush(self):
+        """Write pending changes now, without blocking the event loop."""
+        if self._write_lock is None:
+            self.flush_sync()
+            return
+        async with self._write_lock:
+            if not self._dirty or self._data is None or self._bulk_depth:
+                return
+            ops, full, batch = self._take_batch()
+            start = time.perf_counter()
+            try:
+                written = await asyncio.to_thread(self.backend.commit, batch)
+            except Exception:
+                self._restore_batch(ops, full)
+                raise
+            self._record_flush(start, written)
+
+    def flush_sync(self):
+        """Blocking flush for use outside the event loop (e.g. at exit)."""
+        if self._flush_task is not None:
+            # It would bypass the write lock and commit alongside the flusher
+            raise RuntimeError("flush_sync() while the background flusher runs; await flush() instead")
+        if not self._dirty or self._data is None:
+            return
+        ops, full, batch = self._take_batch()
+        start = time.perf_counter()
+        try:
+            written = self.backend.commit(batch)
+        except Exception:
+            self._restore_batch(ops, full)
+            raise
+        self._record_flush(start, written)
+
+    def _record_flush(self, start, written):
+        store_flush_duration.observe(time.perf_counter() - start, self.backend.name)
+        store_bytes_written.inc(self.backend.name, amount=written or 0)
+
+    async def close(self):
+        """Stop the flusher, write any pending changes and close the backend."""
+        if self._bulk_depth:
+            # flush() is held off inside bulk(), so closing now would drop its writes
+            raise RuntimeError(f"Cannot close the {self.backend.name} store inside a bulk() block")
+        if self._flush_task is not None:
+            # Cancelling mid-commit would leave the worker thread writing while
+            # the final flush below starts another commit, so wait for it first
+            async with self._write_lock:
+                self._flush_task.cancel()
+                try:
+                    await self._flush_task
+                except asyncio.CancelledError:
+                    pass
+            self._flush_task = None
+        has_backlog = self._backend is not None and self._backend.has_backlog()
+        if self._data is not None and (self._pending or has_backlog):
+            # Leave a compact snapshot behind so the next start replays nothing
+            self.mark_full_write()
+        await self.flush()
+        self._dirty_event = None
+        self._write_lock = None
+        self._closed = True
+        if self._backend is not None:
+            self._backend.close()
+        if self._owns_backend:
+            self._backend = None
+
+
+store = DataStore()
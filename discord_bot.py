@@ -1,79 +1,408 @@
 
+import aiohttp
 import discord
+from discord import app_commands
 from discord.ext import commands
-import json
 import os
-from datetime import datetime
 import asyncio
+import collections
+import functools
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+
+from data_store import store
+from embed_cache import normalize_embed_data, render_embed, with_timestamp
+from embed_transfer import IMPORT_MAX_BYTES, export_embeds, import_lines
+from templates import template_context
+from broadcast import broadcast_embed, format_report, parse_channel_ids
+from outbound import outbound
+from scheduler import AnnouncementScheduler, CronSchedule, parse_interval, parse_time
+from partitions import PartitionManager
+from components import ComponentLayout, components, selected_value
+from bot_status import local_guild_filter, shard_health, shard_scope, sharding_options
+from runtime_profile import MEMORY_PROFILE, client_options, memory_report, process_started_at
+from server import StatusServer
+from metrics import install_rate_limit_counter, registry, startup_duration
+from instrumentation import find_interaction, instrumented, profiler, recent_errors
+from work_queue import bulk_queue, deferred, work_queue
+
+# Set DEV_GUILD_ID to sync commands only to a test guild (instant, no global propagation)
+DEV_GUILD_ID = os.getenv('DEV_GUILD_ID')
+# Set STATUS_PORT to serve /healthz, /readyz and /status from the bot process
+STATUS_PORT = os.getenv('STATUS_PORT')
+# Set FORCE_COMMAND_SYNC=1 to sync even when the command tree hash is unchanged
+FORCE_COMMAND_SYNC = os.getenv('FORCE_COMMAND_SYNC') == '1'
+
+# Bot setup: intents and caches come from MEMORY_PROFILE (lean by default)
+CLIENT_OPTIONS = client_options()
+
+# Opt-in sharding: SHARDED=1 (auto shard count), or SHARD_COUNT + SHARD_IDS
+# to split shards across processes
+SHARDING = sharding_options()
+# A process running only some shards keeps its own global store; guild files
+# stay shared since each guild's events reach exactly one shard
+store.scope = shard_scope(SHARDING)
+BotBase = commands.AutoShardedBot if SHARDING is not None else commands.Bot
+
+class StaffBot(BotBase):
+    status_port = None
+    # Set by the supervisor, which keeps it serving across restarts; otherwise
+    # the bot starts its own in setup_hook and stops it in close()
+    status_server = None
+    owns_status_server = False
+    # Set by the supervisor before each (re)start; defaults to process start
+    launched_at = None
+    startup_seconds = None
+
+    async def setup_hook(self):
+        # Load global data once and start the background writer; guild data
+        # is loaded per guild on first use
+        store.load()
+        await store.start()
+        if store.scope:
+            print(f"🧩 Global data for shards {SHARDING['shard_ids']} in {store.backend.path}")
+        await partitions.start()
+        print(f"🗂️ Guild data in {partitions.directory}/ ({partitions.kind}), loaded on demand")
+
+        pending = scheduler.load()
+        scheduler.start()
+        print(f"⏰ Loaded {pending} scheduled announcements")
+
+        # Ticket buttons keep working across restarts
+        self.add_view(TicketPanelView())
+        self.add_view(TicketControlsView())
+
+        work_queue.start()
+        bulk_queue.start()
+        outbound.start()
+        install_rate_limit_counter()
+
+        if self.status_port and self.status_server is None:
+            self.status_server = make_status_server(self.status_port)
+            self.owns_status_server = True
+            await self.status_server.start()
+
+    async def close(self):
+        if self.owns_status_server:
+            await self.status_server.stop()
+            self.status_server = None
+            self.owns_status_server = False
+        await scheduler.stop()
+        await work_queue.stop()
+        await bulk_queue.stop()
+        # Still connected, so buffered log lines can go out
+        await outbound.stop()
+        await partitions.close()
+        try:
+            await store.close()
+        except Exception as e:
+            print(f"❌ Failed to flush bot data on shutdown: {e}")
+        await super().close()
 
-# Bot setup
-intents = discord.Intents.default()
-intents.message_content = True
-intents.guilds = True
-intents.members = True
+bot = StaffBot(command_prefix='!', **CLIENT_OPTIONS, **(SHARDING or {}))
 
-bot = commands.Bot(command_prefix='!', intents=intents)
+async def post_scheduled_announcement(job_id, job):
+    """Scheduler runner: post the job's stored embed to its channel."""
+    async with partitions.lease(job.get('guild_id')) as partition:
+        embed_data = partition.store.section('stored_embeds').get(job['embed_name'])
+        if embed_data is None:
+            print(f"⚠️ Scheduled announcement {job_id} skipped: embed `{job['embed_name']}` no longer exists")
+            return
+        await bot.wait_until_ready()
+        guild = bot.get_guild(job['guild_id']) if job.get('guild_id') else None
+        embed = partition.embed_cache.get(job['embed_name'], embed_data, template_context(guild=guild))
+    result = (await broadcast_embed(bot, embed, [job['channel_id']], job.get('guild_id'), retries=2,
+                                    dispatcher=outbound))[0]
+    if not result['ok']:
+        raise RuntimeError(result['error'])
+
+def channel_exists(guild_id, channel_id):
+    """False only when the guild is cached and the channel is not in it."""
+    guild = bot.get_guild(guild_id)
+    return guild is None or guild.get_channel_or_thread(channel_id) is not None
+
+partitions = PartitionManager(store, channel_exists=channel_exists)
+scheduler = AnnouncementScheduler(store, post_scheduled_announcement, owns_guild=local_guild_filter(SHARDING))
+
+def is_bot_ready():
+    """Readiness: gateway connected and the data store loaded."""
+    return bot.is_ready() and not bot.is_closed() and store.loaded
+
+def make_status_server(port):
+    return StatusServer(
+        int(port),
+        ready_check=is_bot_ready,
+        status_provider=status_snapshot,
+        metrics_provider=registry.render
+    )
+
+registry.gauge(
+    'bot_gateway_latency_seconds', 'Gateway heartbeat latency per shard', ('shard',),
+    collect=lambda: {
+        (shard['shard_id'],): shard['latency_ms'] / 1000 if shard['latency_ms'] is not None else None
+        for shard in shard_health.report(bot)
+    }
+)
+registry.gauge(
+    'bot_embed_cache_events', 'Rendered embed cache hits and misses', ('result',),
+    collect=lambda: {
+        ('hit',): sum(partition.embed_cache.hits for partition in partitions.loaded()),
+        ('miss',): sum(partition.embed_cache.misses for partition in partitions.loaded())
+    }
+)
+registry.gauge(
+    'bot_guild_partitions_loaded', 'Guild data partitions currently held in memory',
+    collect=lambda: {(): len(partitions)}
+)
+
+def status_snapshot(detailed=False):
+    """In-memory status for the HTTP /status endpoint.
+
+    The endpoint is public, so failed handlers are only counted unless the
+    request carried STATUS_TOKEN; the detail names users, guilds and raw
+    exception messages.
+    """
+    errors = list(recent_errors)
+    snapshot = {
+        'bot': str(bot.user) if bot.user else None,
+        'ready': is_bot_ready(),
+        'startup_seconds': bot.startup_seconds,
+        'shards': shard_health.report(bot),
+        'guilds': len(bot.guilds),
+        'data_store': store.stats(),
+        'guild_partitions': partitions.stats(),
+        'work_queues': {queue.name: queue.stats() for queue in (work_queue, bulk_queue)},
+        'outbound': outbound.stats(),
+        'scheduled_announcements': len(scheduler.jobs) if store.loaded else None,
+        'memory': memory_report(bot),
+        'recent_errors': {
+            'count': len(errors),
+            'by_handler': dict(collections.Counter(error['handler'] for error in errors)),
+        },
+        'profiler_enabled': profiler.enabled,
+    }
+    if detailed:
+        snapshot['recent_errors']['latest'] = errors[-10:]
+    return snapshot
 
 # Verification Key
 VERIFICATION_KEY = "ZpofeVerifiedU"
-
-def add_verified_user(user_id: int):
-    """Add a user to the verified list and save to file."""
-    data = load_data()
-    if 'verified_users' not in data:
-        data['verified_users'] = []
-
-    if user_id not in data['verified_users']:
-        data['verified_users'].append(user_id)
-        save_data(data)
-
-def is_verified(interaction: discord.Interaction) -> bool:
-    """Check if user is in the verified list."""
-    data = load_data()
-    verified_users = data.get('verified_users', [])
-    return interaction.user.id in verified_users
-
-# Load bot data
-def load_data():
-    try:
-        with open('bot_data.json', 'r') as f:
-            data = json.load(f)
-            if 'stored_embeds' not in data:
-                data['stored_embeds'] = {}
-            if 'embed_counter' not in data:
-                data['embed_counter'] = 1
-            if 'verified_users' not in data:
-                data['verified_users'] = []
-            return data
-    except (FileNotFoundError, json.JSONDecodeError):
-        default_data = {
-            "stored_embeds": {},
-            "embed_counter": 1,
-            "verified_users": []
-        }
-        save_data(default_data)
-        return default_data
-
-def save_data(data):
-    with open('bot_data.json', 'w') as f:
-        json.dump(data, f, indent=2)
+# Unsaved embed previews are dropped after this long
+DRAFT_TTL = 24 * 3600
+
+async def guild_partition(interaction: discord.Interaction):
+    """Data for the interaction's guild (global data in DMs), loaded on first use."""
+    return await partitions.get(interaction.guild_id)
+
+def holds_partition(func):
+    """Keep the interaction's guild partition loaded (not evicted) while ``func`` runs.
+
+    For handlers on the bulk queue, which can outlast the idle timeout.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        async with partitions.lease(find_interaction(args).guild_id):
+            return await func(*args, **kwargs)
+    return wrapper
+
+async def add_verified_user(interaction: discord.Interaction):
+    """Add a user to the guild's verified list; the store persists it in the background."""
+    partition = await guild_partition(interaction)
+    partition.store.add_unique('verified_users', interaction.user.id)
+
+async def is_verified(interaction: discord.Interaction) -> bool:
+    """Check if user is in the guild's verified list."""
+    partition = await guild_partition(interaction)
+    return partition.is_verified(interaction.user.id)
+
+def save_stored_embed(partition, embed_name, embed_data, index=True):
+    """Normalize and store an embed, bumping its version so cached renders go stale.
+
+    Bulk callers pass ``index=False`` and rebuild the partition's
+    ``embed_index`` once at the end.
+    """
+    previous = partition.store.section('stored_embeds').get(embed_name) or {}
+    record = normalize_embed_data(embed_data)
+    record['version'] = previous.get('version', 0) + 1
+    partition.store.put('stored_embeds', embed_name, record)
+    partition.embed_cache.invalidate(embed_name)
+    if index:
+        partition.embed_index.add(embed_name, record)
+    return record
+
+def delete_stored_embed(partition, embed_name):
+    """Remove an embed from the store, render cache and name index."""
+    if not partition.store.remove('stored_embeds', embed_name):
+        return False
+    partition.embed_cache.invalidate(embed_name)
+    partition.embed_index.remove(embed_name)
+    return True
+
+async def reply(interaction: discord.Interaction, content=None, **kwargs):
+    """Answer ephemerally, as a followup if the interaction was already acknowledged."""
+    if interaction.response.is_done():
+        await interaction.followup.send(content, ephemeral=True, **kwargs)
+    else:
+        await interaction.response.send_message(content, ephemeral=True, **kwargs)
+
+def draft_key(user_id, embed_name):
+    return f"{user_id}:{embed_name}"
+
+def save_embed_draft(partition, user_id, embed_name, embed_data):
+    """Keep an unsaved embed in ``embed_drafts`` so its preview buttons survive restarts."""
+    drafts = partition.store.section('embed_drafts')
+    cutoff = time.time() - DRAFT_TTL
+    for key in [key for key, draft in drafts.items() if draft['saved_at'] < cutoff]:
+        partition.store.remove('embed_drafts', key)
+    partition.store.put('embed_drafts', draft_key(user_id, embed_name), {'data': embed_data, 'saved_at': time.time()})
+
+def embed_not_found_message(partition, embed_name):
+    """Not-found reply with a few close matches instead of every stored name."""
+    embed_index = partition.embed_index
+    suggestions = embed_index.search(embed_name, limit=10) or embed_index.search(embed_name[:3], limit=10)
+    message = f"❌ **Embed `{embed_name}` not found!**"
+    if suggestions:
+        message += "\n\n**Did you mean:** " + ", ".join(f"`{name}`" for name in suggestions)
+    return message
+
+async def embed_name_autocomplete(interaction: discord.Interaction, current: str):
+    """Suggest stored embed names by name/title prefix (verified staff only)."""
+    partition = await guild_partition(interaction)
+    if not partition.is_verified(interaction.user.id):
+        return []
+    stored_embeds = partition.store.section('stored_embeds')
+    choices = []
+    for embed_name in partition.embed_index.search(current, limit=25):
+        title = (stored_embeds.get(embed_name) or {}).get('title') or 'No title'
+        choices.append(app_commands.Choice(name=f"{embed_name}: {title}"[:100], value=embed_name))
+    return choices
+
+def command_tree_hash(guild=None):
+    """Stable hash of the command payloads that a sync would upload."""
+    payload = sorted(
+        (command.to_dict() for command in bot.tree.get_commands(guild=guild)),
+        key=lambda command: (command.get('type', 1), command['name'])
+    )
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+async def sync_command_tree():
+    """Sync slash commands only when the registered tree changed since the last sync."""
+    guild = None
+    if DEV_GUILD_ID:
+        guild = discord.Object(id=int(DEV_GUILD_ID))
+        bot.tree.copy_global_to(guild=guild)
+    scope = f"guild:{guild.id}" if guild else "global"
+
+    tree_hash = command_tree_hash(guild)
+    synced_hashes = store.section('command_sync_hashes')
+    if not FORCE_COMMAND_SYNC and synced_hashes.get(scope) == tree_hash:
+        print(f"✅ Slash commands unchanged ({scope}), skipping sync")
+        return
+
+    start = time.perf_counter()
+    synced = await bot.tree.sync(guild=guild)
+    store.put('command_sync_hashes', scope, tree_hash)
+    print(f"✅ Synced {len(synced)} slash commands ({scope}) in {(time.perf_counter() - start) * 1000:.0f} ms")
 
 @bot.event
 async def on_ready():
     print(f'🤖 {bot.user} has connected to Discord!')
+    if bot.startup_seconds is None:
+        bot.startup_seconds = time.time() - (bot.launched_at or process_started_at())
+        startup_duration.set(bot.startup_seconds)
+        print(f"🚀 Ready {bot.startup_seconds:.2f}s after start")
 
     try:
         await bot.wait_until_ready()
-        synced = await bot.tree.sync()
-        print(f"✅ Synced {len(synced)} slash commands")
+        await sync_command_tree()
 
-        print(f"📊 Connected to {len(bot.guilds)} guilds:")
-        for guild in bot.guilds:
-            print(f"  - {guild.name} (ID: {guild.id})")
+        if SHARDING is None:
+            shard_health.mark_ready()
+        shard_ids = sorted(bot.shards) if SHARDING is not None else [0]
+        print(f"📊 Connected to {len(bot.guilds)} guilds on shard(s) {shard_ids}")
 
     except Exception as e:
         print(f"❌ Failed to sync commands: {e}")
 
+@bot.event
+async def on_disconnect():
+    if SHARDING is None:
+        shard_health.mark_disconnected()
+
+@bot.event
+async def on_resumed():
+    if SHARDING is None:
+        shard_health.mark_resumed()
+
+@bot.event
+async def on_shard_ready(shard_id: int):
+    shard_health.mark_ready(shard_id)
+    guilds = sum(1 for guild in bot.guilds if guild.shard_id == shard_id)
+    print(f"🧩 Shard {shard_id} ready with {guilds} guilds")
+
+@bot.event
+async def on_shard_disconnect(shard_id: int):
+    shard_health.mark_disconnected(shard_id)
+    print(f"⚠️ Shard {shard_id} disconnected")
+
+@bot.event
+async def on_shard_resumed(shard_id: int):
+    shard_health.mark_resumed(shard_id)
+
+@bot.event
+async def on_guild_channel_delete(channel):
+    # A ticket channel deleted by hand would otherwise leave its owner "already
+    # having a ticket" for good
+    if not partitions.has_data(channel.guild.id):
+        return
+    partition = await partitions.get(channel.guild.id)
+    ticket = partition.tickets.close(channel.id)
+    if ticket is not None:
+        send_ticket_log(partition, channel.guild, f"🗑️ Ticket #{ticket['number']} closed: its channel was deleted")
+
+@bot.event
+async def on_message(message: discord.Message):
+    if message.author.bot or message.guild is None:
+        return
+
+    # A guild with no data file has automod on but no banned words, so there
+    # is nothing to check and no reason to load (or create) its partition
+    if partitions.has_data(message.guild.id) and await automod_removed(message):
+        return
+
+    await bot.process_commands(message)
+
+async def automod_removed(message):
+    """Delete the message if it contains a banned word. Returns True if it was caught."""
+    partition = await partitions.get(message.guild.id)
+    guild_store = partition.store
+    if guild_store.get('automod_enabled', True) and not partition.is_verified(message.author.id):
+        banned_word = partition.automod.find(message.content, guild_store.get('automod_words', []))
+        if banned_word:
+            try:
+                await message.delete()
+                await outbound.send(
+                    message.channel,
+                    f"⚠️ {message.author.mention}, your message was removed by automod.",
+                    delete_after=5
+                )
+            except discord.errors.Forbidden:
+                print(f"Automod lacks permission to delete messages in #{message.channel}")
+            except discord.errors.NotFound:
+                pass
+            except Exception as e:
+                print(f"Automod error: {e}")
+            return True
+    return False
+
+@bot.event
+async def on_interaction(interaction: discord.Interaction):
+    # Buttons and selects with a zs: custom_id are handled by the component router
+    if interaction.type == discord.InteractionType.component:
+        await components.dispatch(interaction)
+
 @bot.event
 async def on_app_command_error(interaction: discord.Interaction, error: discord.app_commands.AppCommandError):
     print(f"❌ App command error: {error}")
@@ -98,38 +427,30 @@ class VerificationModal(discord.ui.Modal, title="Staff Verification Required"):
         required=True
     )
 
+    @instrumented("VerificationModal.on_submit")
     async def on_submit(self, interaction: discord.Interaction):
-        try:
-            entered_key = str(self.key_input.value).strip()
-
-            if entered_key == VERIFICATION_KEY:
-                add_verified_user(interaction.user.id)
-                await interaction.response.send_message("✅ **Verification Successful!** You now have staff access. Please run the command again.", ephemeral=True)
-            else:
-                await interaction.response.send_message("❌ **Invalid Key:** Incorrect verification key entered. Access denied.", ephemeral=True)
-        except discord.errors.NotFound:
-            print("Verification interaction expired")
-        except Exception as e:
-            print(f"Verification submit error: {e}")
+        entered_key = str(self.key_input.value).strip()
+
+        if entered_key == VERIFICATION_KEY:
+            await add_verified_user(interaction)
+            await interaction.response.send_message("✅ **Verification Successful!** You now have staff access. Please run the command again.", ephemeral=True)
+        else:
+            await interaction.response.send_message("❌ **Invalid Key:** Incorrect verification key entered. Access denied.", ephemeral=True)
 
     async def on_timeout(self):
         print("Verification modal timed out")
 
 async def check_verification(interaction: discord.Interaction) -> bool:
     """Check if user is verified, show verification modal if not"""
-    if is_verified(interaction):
+    if await is_verified(interaction):
         return True
 
-    try:
-        if not interaction.response.is_done():
-            modal = VerificationModal()
-            await interaction.response.send_modal(modal)
-        else:
-            await interaction.followup.send("❌ Please use the command again for verification.", ephemeral=True)
-    except discord.errors.NotFound:
-        print("Verification interaction expired")
-    except Exception as e:
-        print(f"Verification modal error: {e}")
+    # NotFound and other errors propagate to the calling handler's @instrumented
+    if not interaction.response.is_done():
+        modal = VerificationModal()
+        await interaction.response.send_modal(modal)
+    else:
+        await interaction.followup.send("❌ Please use the command again for verification.", ephemeral=True)
     return False
 
 class EmbedModal(discord.ui.Modal, title="Create Embed"):
@@ -152,7 +473,7 @@ class EmbedModal(discord.ui.Modal, title="Create Embed"):
 
     description_input = discord.ui.TextInput(
         label="📄 Description",
-        placeholder="Enter description...",
+        placeholder="Enter description... {user}, {guild}, {member_count} and {date} are filled in",
         style=discord.TextStyle.paragraph,
         max_length=2000,
         required=False
@@ -172,87 +493,70 @@ class EmbedModal(discord.ui.Modal, title="Create Embed"):
         required=False
     )
 
+    @instrumented("EmbedModal.on_submit", "❌ Error creating embed.")
     async def on_submit(self, interaction: discord.Interaction):
-        try:
-            embed_name = str(self.embed_name_input.value).strip()
-            
-            # Check if embed name already exists
-            data = load_data()
-            if embed_name in data.get('stored_embeds', {}):
-                await interaction.response.send_message(f"❌ **Embed name `{embed_name}` already exists!** Please choose a different name.", ephemeral=True)
-                return
-
-            embed_data = {
-                'title': str(self.title_input.value) if self.title_input.value else None,
-                'description': str(self.description_input.value) if self.description_input.value else None,
-                'color': str(self.color_input.value) if self.color_input.value else None,
-                'image_url': str(self.image_input.value) if self.image_input.value else None
-            }
-
-            # Create embed for preview
-            embed = create_embed_from_data(embed_data)
-            
-            # Show preview and save options
-            view = EmbedPreviewView(embed_name, embed_data)
-            await interaction.response.send_message(f"**Preview of `{embed_name}`:**", embed=embed, view=view, ephemeral=True)
-        except discord.errors.NotFound:
-            print("Embed creation interaction expired")
-        except Exception as e:
-            print(f"Error in EmbedModal submit: {e}")
-            try:
-                if not interaction.response.is_done():
-                    await interaction.response.send_message("❌ Error creating embed.", ephemeral=True)
-            except:
-                pass
+        embed_name = str(self.embed_name_input.value).strip()
+        partition = await guild_partition(interaction)
 
-    async def on_timeout(self):
-        print("Embed modal timed out")
+        # Check if embed name already exists
+        if embed_name in partition.store.section('stored_embeds'):
+            await interaction.response.send_message(f"❌ **Embed name `{embed_name}` already exists!** Please choose a different name.", ephemeral=True)
+            return
 
-class EmbedPreviewView(discord.ui.View):
-    def __init__(self, embed_name, embed_data):
-        super().__init__(timeout=300)
-        self.embed_name = embed_name
-        self.embed_data = embed_data
+        embed_data = normalize_embed_data({
+            'title': str(self.title_input.value) if self.title_input.value else None,
+            'description': str(self.description_input.value) if self.description_input.value else None,
+            'color': str(self.color_input.value) if self.color_input.value else None,
+            'image_url': str(self.image_input.value) if self.image_input.value else None
+        })
 
-    @discord.ui.button(label="Save Embed", style=discord.ButtonStyle.success, emoji="💾")
-    async def save_embed(self, interaction: discord.Interaction, button: discord.ui.Button):
-        try:
-            data = load_data()
-            data['stored_embeds'][self.embed_name] = self.embed_data
-            data['embed_counter'] = data.get('embed_counter', 1) + 1
-            save_data(data)
-            
-            await interaction.response.send_message(f"✅ **Embed `{self.embed_name}` saved successfully!** You can now use `/spawnembed` to display it.", ephemeral=True)
-            self.stop()
-        except discord.errors.NotFound:
-            print("Save embed interaction expired")
-        except Exception as e:
-            print(f"Error saving embed: {e}")
-            try:
-                if not interaction.response.is_done():
-                    await interaction.response.send_message("❌ Error saving embed.", ephemeral=True)
-            except:
-                pass
+        # Create embed for preview
+        embed = create_embed_from_data(embed_data, interaction_context(interaction))
 
-    @discord.ui.button(label="Edit More", style=discord.ButtonStyle.secondary, emoji="✏️")
-    async def edit_more(self, interaction: discord.Interaction, button: discord.ui.Button):
-        try:
-            modal = AdvancedEmbedModal(self.embed_name, self.embed_data)
-            await interaction.response.send_modal(modal)
-            self.stop()
-        except discord.errors.NotFound:
-            print("Edit more interaction expired")
-        except Exception as e:
-            print(f"Error opening advanced modal: {e}")
-            try:
-                if not interaction.response.is_done():
-                    await interaction.response.send_message("❌ Error opening advanced options.", ephemeral=True)
-            except:
-                pass
+        # Show preview and save options
+        save_embed_draft(partition, interaction.user.id, embed_name, embed_data)
+        await interaction.response.send_message(f"**Preview of `{embed_name}`:**", embed=embed,
+                                                view=embed_preview_layout(embed_name), ephemeral=True)
 
     async def on_timeout(self):
-        print("Embed preview view timed out")
-        self.stop()
+        print("Embed modal timed out")
+
+def embed_preview_layout(embed_name):
+    return ComponentLayout(
+        discord.ui.Button(label="Save Embed", style=discord.ButtonStyle.success, emoji="💾",
+                          custom_id=components.custom_id('save_draft', embed_name)),
+        discord.ui.Button(label="Edit More", style=discord.ButtonStyle.secondary, emoji="✏️",
+                          custom_id=components.custom_id('edit_draft', embed_name))
+    )
+
+async def load_embed_draft(interaction: discord.Interaction, embed_name):
+    """The user's draft of ``embed_name``, or None after telling them it is gone."""
+    partition = await guild_partition(interaction)
+    draft = partition.store.section('embed_drafts').get(draft_key(interaction.user.id, embed_name))
+    if draft is None:
+        await reply(interaction, "⌛ **This preview is no longer available.** Use `/create_embed` to start again.")
+    return partition, draft
+
+@components.route('save_draft', fields=1)
+@instrumented("embed_preview.save", "❌ Error saving embed.")
+@deferred(check=check_verification)
+async def save_draft_button(interaction: discord.Interaction, embed_name):
+    partition, draft = await load_embed_draft(interaction, embed_name)
+    if draft is None:
+        return
+    save_stored_embed(partition, embed_name, draft['data'])
+    partition.store.increment('embed_counter')
+    partition.store.remove('embed_drafts', draft_key(interaction.user.id, embed_name))
+
+    await interaction.followup.send(f"✅ **Embed `{embed_name}` saved successfully!** You can now use `/spawnembed` to display it.", ephemeral=True)
+
+@components.route('edit_draft', fields=1)
+@instrumented("embed_preview.edit_more", "❌ Error opening advanced options.")
+async def edit_draft_button(interaction: discord.Interaction, embed_name):
+    partition, draft = await load_embed_draft(interaction, embed_name)
+    if draft is None:
+        return
+    await interaction.response.send_modal(AdvancedEmbedModal(embed_name, dict(draft['data'])))
 
 class AdvancedEmbedModal(discord.ui.Modal, title="Advanced Options"):
     def __init__(self, embed_name, embed_data):
@@ -288,201 +592,139 @@ class AdvancedEmbedModal(discord.ui.Modal, title="Advanced Options"):
         required=False
     )
 
+    @instrumented("AdvancedEmbedModal.on_submit", "❌ Error updating embed.")
     async def on_submit(self, interaction: discord.Interaction):
-        try:
-            # Update embed data with advanced options
-            self.embed_data.update({
-                'footer_text': str(self.footer_input.value) if self.footer_input.value else None,
-                'thumbnail_url': str(self.thumbnail_input.value) if self.thumbnail_input.value else None,
-                'author_name': str(self.author_input.value) if self.author_input.value else None,
-                'show_timestamp': str(self.timestamp_input.value).lower() == 'yes' if self.timestamp_input.value else False
-            })
-
-            # Create updated embed for preview
-            embed = create_embed_from_data(self.embed_data)
-            
-            # Show updated preview with save option
-            view = EmbedPreviewView(self.embed_name, self.embed_data)
-            await interaction.response.send_message(f"**Updated preview of `{self.embed_name}`:**", embed=embed, view=view, ephemeral=True)
-        except discord.errors.NotFound:
-            print("Advanced embed interaction expired")
-        except Exception as e:
-            print(f"Error in AdvancedEmbedModal submit: {e}")
-            try:
-                if not interaction.response.is_done():
-                    await interaction.response.send_message("❌ Error updating embed.", ephemeral=True)
-            except:
-                pass
+        # Update embed data with advanced options
+        self.embed_data.update({
+            'footer_text': str(self.footer_input.value) if self.footer_input.value else None,
+            'thumbnail_url': str(self.thumbnail_input.value) if self.thumbnail_input.value else None,
+            'author_name': str(self.author_input.value) if self.author_input.value else None,
+            'show_timestamp': str(self.timestamp_input.value).lower() == 'yes' if self.timestamp_input.value else False
+        })
+        self.embed_data = normalize_embed_data(self.embed_data)
+
+        # Create updated embed for preview
+        embed = create_embed_from_data(self.embed_data, interaction_context(interaction))
+
+        # Show updated preview with save option
+        save_embed_draft(await guild_partition(interaction), interaction.user.id, self.embed_name, self.embed_data)
+        await interaction.response.send_message(f"**Updated preview of `{self.embed_name}`:**", embed=embed,
+                                                view=embed_preview_layout(self.embed_name), ephemeral=True)
 
     async def on_timeout(self):
         print("Advanced embed modal timed out")
 
-def create_embed_from_data(embed_data):
-    embed = discord.Embed()
-
-    # Basic embed properties
-    if embed_data.get('title'):
-        embed.title = embed_data['title']
-
-    if embed_data.get('description'):
-        embed.description = embed_data['description']
-
-    # Color handling with better defaults
-    if embed_data.get('color'):
-        color_str = embed_data['color']
-        if color_str.startswith('#'):
-            color_str = color_str[1:]
-        try:
-            embed.color = int(color_str, 16)
-        except ValueError:
-            embed.color = 0x0099ff
-    else:
-        embed.color = 0x0099FF  # Default blue color
-
-    # Advanced image options
-    if embed_data.get('image_url'):
-        embed.set_image(url=embed_data['image_url'])
-
-    if embed_data.get('thumbnail_url'):
-        embed.set_thumbnail(url=embed_data['thumbnail_url'])
-
-    # Advanced author section
-    if embed_data.get('author_name'):
-        author_icon = embed_data.get('author_icon_url')
-        embed.set_author(
-            name=embed_data['author_name'],
-            icon_url=author_icon if author_icon else None
-        )
-
-    # Advanced footer with icon support
-    if embed_data.get('footer_text'):
-        footer_icon = embed_data.get('footer_icon_url')
-        embed.set_footer(
-            text=embed_data['footer_text'],
-            icon_url=footer_icon if footer_icon else None
-        )
-
-    # Timestamp support
-    if embed_data.get('show_timestamp'):
-        embed.timestamp = datetime.utcnow()
-
-    return embed
-
-class SpawnEmbedSelectView(discord.ui.View):
-    def __init__(self, stored_embeds):
-        super().__init__(timeout=300)
-        self.stored_embeds = stored_embeds
-
-        options = []
-        for embed_name, embed_data in stored_embeds.items():
-            title = embed_data.get('title', 'No title')
-            options.append(discord.SelectOption(
-                label=f"{embed_name}: {title}"[:100],
-                value=embed_name
-            ))
-
-        if options:
-            self.select_embed.options = options[:25]
-
-    @discord.ui.select(placeholder="Choose an embed to spawn...")
-    async def select_embed(self, interaction: discord.Interaction, select: discord.ui.Select):
-        try:
-            embed_name = select.values[0]
-            embed_data = self.stored_embeds[embed_name]
-            embed = create_embed_from_data(embed_data)
-            await interaction.response.send_message(embed=embed)
-            self.stop()
-        except discord.errors.NotFound:
-            print("Spawn embed interaction expired")
-        except Exception as e:
-            print(f"Error in spawn embed select: {e}")
-            try:
-                if not interaction.response.is_done():
-                    await interaction.response.send_message("❌ Error spawning embed.", ephemeral=True)
-            except:
-                pass
-
-    async def on_timeout(self):
-        print("Spawn embed view timed out")
-        self.stop()
+def create_embed_from_data(embed_data, context=None):
+    """Build an embed for unsaved data such as previews; stored embeds go through embed_cache."""
+    return with_timestamp(render_embed(embed_data, context), embed_data)
+
+def interaction_context(interaction: discord.Interaction):
+    """Template placeholder values for the user and guild behind an interaction."""
+    return template_context(interaction.user, interaction.guild)
+
+PICKER_PROMPTS = {
+    'spawn': "**Select Embed to Spawn:**",
+    'edit': "**Select Embed to Edit:**",
+}
+
+def embed_picker(partition, mode, page=0):
+    """Content and components for browsing stored embeds, 25 per page with prev/next buttons."""
+    embed_index = partition.embed_index
+    stored_embeds = partition.store.section('stored_embeds')
+    page_count = embed_index.page_count()
+    page = max(0, min(page, page_count - 1))
+
+    items = []
+    options = []
+    for embed_name in embed_index.page(page):
+        title = (stored_embeds.get(embed_name) or {}).get('title') or 'No title'
+        options.append(discord.SelectOption(
+            label=f"{embed_name}: {title}"[:100],
+            value=embed_name
+        ))
+    if options:
+        items.append(discord.ui.Select(custom_id=components.custom_id(f'{mode}_pick'),
+                                       placeholder=f"Choose an embed to {mode}...", options=options))
+
+    items.append(discord.ui.Button(label="Previous", style=discord.ButtonStyle.secondary, emoji="⬅️", row=1,
+                                   disabled=page == 0, custom_id=components.custom_id('embed_page', mode, page - 1)))
+    items.append(discord.ui.Button(label="Next", style=discord.ButtonStyle.secondary, emoji="➡️", row=1,
+                                   disabled=page >= page_count - 1, custom_id=components.custom_id('embed_page', mode, page + 1)))
+    content = f"{PICKER_PROMPTS[mode]}\n*Page {page + 1}/{page_count} · {len(embed_index)} embeds*"
+    return content, ComponentLayout(*items)
+
+@components.route('embed_page', fields=2)
+@instrumented("embed_picker.turn_page")
+async def embed_picker_page(interaction: discord.Interaction, mode, page):
+    content, view = embed_picker(await guild_partition(interaction), mode, int(page))
+    await interaction.response.edit_message(content=content, view=view)
+
+async def picked_embed(interaction: discord.Interaction):
+    """The stored embed chosen in a picker as ``(partition, name, data)``; data is None if it is gone."""
+    partition = await guild_partition(interaction)
+    embed_name = selected_value(interaction)
+    embed_data = partition.store.section('stored_embeds').get(embed_name)
+    if embed_data is None:
+        await interaction.response.send_message(embed_not_found_message(partition, embed_name or ''), ephemeral=True)
+    return partition, embed_name, embed_data
+
+@components.route('spawn_pick')
+@instrumented("embed_picker.spawn", "❌ Error spawning embed.")
+async def spawn_picked_embed(interaction: discord.Interaction):
+    if not await check_verification(interaction):
+        return
+
+    partition, embed_name, embed_data = await picked_embed(interaction)
+    if embed_data is not None:
+        embed = partition.embed_cache.get(embed_name, embed_data, interaction_context(interaction))
+        await interaction.response.send_message(embed=embed)
 
 # Slash Commands
 @bot.tree.command(name="create_embed", description="[STAFF ONLY] Create advanced embeds with images, footers, and styling")
+@instrumented("create_embed")
 async def create_embed(interaction: discord.Interaction):
-    try:
-        if not await check_verification(interaction):
-            return
+    if not await check_verification(interaction):
+        return
 
-        if not interaction.response.is_done():
-            modal = EmbedModal()
-            await interaction.response.send_modal(modal)
-    except discord.errors.NotFound:
-        print("Create embed interaction expired")
-    except Exception as e:
-        print(f"Error in create_embed: {e}")
+    if not interaction.response.is_done():
+        modal = EmbedModal()
+        await interaction.response.send_modal(modal)
 
 @bot.tree.command(name="spawnembed", description="[STAFF ONLY] Spawn a stored embed message")
-async def spawn_embed(interaction: discord.Interaction):
-    try:
-        if not await check_verification(interaction):
-            return
+@app_commands.describe(embed_name="Embed to spawn (leave empty to browse)")
+@app_commands.autocomplete(embed_name=embed_name_autocomplete)
+@instrumented("spawn_embed")
+async def spawn_embed(interaction: discord.Interaction, embed_name: str = None):
+    if not await check_verification(interaction):
+        return
 
-        data = load_data()
-        stored_embeds = data.get('stored_embeds', {})
+    partition = await guild_partition(interaction)
+    stored_embeds = partition.store.section('stored_embeds')
 
-        if not stored_embeds or len(stored_embeds) == 0:
-            await interaction.response.send_message("📭 **No embeds stored!** Use `/create_embed` to create one first.", ephemeral=True)
-            return
+    if not stored_embeds or len(stored_embeds) == 0:
+        await interaction.response.send_message("📭 **No embeds stored!** Use `/create_embed` to create one first.", ephemeral=True)
+        return
 
-        view = SpawnEmbedSelectView(stored_embeds)
-        await interaction.response.send_message("**Select Embed to Spawn:**", view=view, ephemeral=True)
-    except discord.errors.NotFound:
-        print("Spawn embed interaction expired")
-    except Exception as e:
-        print(f"Error in spawn_embed: {e}")
-        try:
-            if not interaction.response.is_done():
-                await interaction.response.send_message("❌ An error occurred.", ephemeral=True)
-        except:
-            pass
+    if embed_name:
+        if embed_name not in stored_embeds:
+            await interaction.response.send_message(embed_not_found_message(partition, embed_name), ephemeral=True)
+            return
+        embed = partition.embed_cache.get(embed_name, stored_embeds[embed_name], interaction_context(interaction))
+        await interaction.response.send_message(embed=embed)
+        return
 
-class EditEmbedSelectView(discord.ui.View):
-    def __init__(self, stored_embeds):
-        super().__init__(timeout=300)
-        self.stored_embeds = stored_embeds
+    content, view = embed_picker(partition, 'spawn')
+    await interaction.response.send_message(content, view=view, ephemeral=True)
 
-        options = []
-        for embed_name, embed_data in stored_embeds.items():
-            title = embed_data.get('title', 'No title')
-            options.append(discord.SelectOption(
-                label=f"{embed_name}: {title}"[:100],
-                value=embed_name
-            ))
+@components.route('edit_pick')
+@instrumented("embed_picker.edit", "❌ Error loading embed for editing.")
+async def edit_picked_embed(interaction: discord.Interaction):
+    if not await check_verification(interaction):
+        return
 
-        if options:
-            self.select_embed.options = options[:25]
-
-    @discord.ui.select(placeholder="Choose an embed to edit...")
-    async def select_embed(self, interaction: discord.Interaction, select: discord.ui.Select):
-        try:
-            embed_name = select.values[0]
-            embed_data = self.stored_embeds[embed_name]
-            modal = EditEmbedModal(embed_name, embed_data)
-            await interaction.response.send_modal(modal)
-            self.stop()
-        except discord.errors.NotFound:
-            print("Edit embed interaction expired")
-        except Exception as e:
-            print(f"Error in edit embed select: {e}")
-            try:
-                if not interaction.response.is_done():
-                    await interaction.response.send_message("❌ Error loading embed for editing.", ephemeral=True)
-            except:
-                pass
-
-    async def on_timeout(self):
-        print("Edit embed view timed out")
-        self.stop()
+    partition, embed_name, embed_data = await picked_embed(interaction)
+    if embed_data is not None:
+        await interaction.response.send_modal(EditEmbedModal(embed_name, embed_data))
 
 class EditEmbedModal(discord.ui.Modal, title="Edit Advanced Embed"):
     def __init__(self, embed_name, embed_data):
@@ -533,153 +775,764 @@ class EditEmbedModal(discord.ui.Modal, title="Edit Advanced Embed"):
         required=False
     )
 
+    @instrumented("EditEmbedModal.on_submit", "❌ Error updating embed.")
     async def on_submit(self, interaction: discord.Interaction):
-        try:
-            updated_embed_data = {
-                'title': str(self.title_input.value) if self.title_input.value else None,
-                'description': str(self.description_input.value) if self.description_input.value else None,
-                'color': str(self.color_input.value) if self.color_input.value else None,
-                'image_url': str(self.image_input.value) if self.image_input.value else None,
-                'footer_text': str(self.footer_input.value) if self.footer_input.value else None,
-                # Preserve existing advanced features
-                'thumbnail_url': self.embed_data.get('thumbnail_url'),
-                'footer_icon_url': self.embed_data.get('footer_icon_url'),
-                'author_name': self.embed_data.get('author_name'),
-                'author_icon_url': self.embed_data.get('author_icon_url'),
-                'show_timestamp': self.embed_data.get('show_timestamp', False)
-            }
-
-            # Save the updated embed
-            data = load_data()
-            data['stored_embeds'][self.embed_name] = updated_embed_data
-            save_data(data)
-
-            # Create and show preview of the updated embed
-            embed = create_embed_from_data(updated_embed_data)
-            await interaction.response.send_message(f"✅ **Embed `{self.embed_name}` updated successfully!**\n**Preview:**", embed=embed, ephemeral=True)
-        except discord.errors.NotFound:
-            print("Edit embed interaction expired")
-        except Exception as e:
-            print(f"Error in EditEmbedModal submit: {e}")
-            try:
-                if not interaction.response.is_done():
-                    await interaction.response.send_message("❌ Error updating embed.", ephemeral=True)
-            except:
-                pass
+        updated_embed_data = {
+            'title': str(self.title_input.value) if self.title_input.value else None,
+            'description': str(self.description_input.value) if self.description_input.value else None,
+            'color': str(self.color_input.value) if self.color_input.value else None,
+            'image_url': str(self.image_input.value) if self.image_input.value else None,
+            'footer_text': str(self.footer_input.value) if self.footer_input.value else None,
+            # Preserve existing advanced features
+            'thumbnail_url': self.embed_data.get('thumbnail_url'),
+            'footer_icon_url': self.embed_data.get('footer_icon_url'),
+            'author_name': self.embed_data.get('author_name'),
+            'author_icon_url': self.embed_data.get('author_icon_url'),
+            'show_timestamp': self.embed_data.get('show_timestamp', False)
+        }
+
+        # Save the updated embed; this invalidates its cached render
+        partition = await guild_partition(interaction)
+        saved = save_stored_embed(partition, self.embed_name, updated_embed_data)
+
+        # Create and show preview of the updated embed
+        embed = partition.embed_cache.get(self.embed_name, saved, interaction_context(interaction))
+        await interaction.response.send_message(f"✅ **Embed `{self.embed_name}` updated successfully!**\n**Preview:**", embed=embed, ephemeral=True)
 
     async def on_timeout(self):
         print("Edit embed modal timed out")
 
 @bot.tree.command(name="edit_embed", description="[STAFF ONLY] Edit a stored embed message")
-async def edit_embed(interaction: discord.Interaction):
-    try:
-        if not await check_verification(interaction):
-            return
+@app_commands.describe(embed_name="Embed to edit (leave empty to browse)")
+@app_commands.autocomplete(embed_name=embed_name_autocomplete)
+@instrumented("edit_embed")
+async def edit_embed(interaction: discord.Interaction, embed_name: str = None):
+    if not await check_verification(interaction):
+        return
 
-        data = load_data()
-        stored_embeds = data.get('stored_embeds', {})
+    partition = await guild_partition(interaction)
+    stored_embeds = partition.store.section('stored_embeds')
 
-        if not stored_embeds or len(stored_embeds) == 0:
-            await interaction.response.send_message("📭 **No embeds stored!** Use `/create_embed` to create one first.", ephemeral=True)
+    if not stored_embeds or len(stored_embeds) == 0:
+        await interaction.response.send_message("📭 **No embeds stored!** Use `/create_embed` to create one first.", ephemeral=True)
+        return
+
+    if embed_name:
+        if embed_name not in stored_embeds:
+            await interaction.response.send_message(embed_not_found_message(partition, embed_name), ephemeral=True)
             return
+        await interaction.response.send_modal(EditEmbedModal(embed_name, stored_embeds[embed_name]))
+        return
 
-        view = EditEmbedSelectView(stored_embeds)
-        await interaction.response.send_message("**Select Embed to Edit:**", view=view, ephemeral=True)
-    except discord.errors.NotFound:
-        print("Edit embed interaction expired")
-    except Exception as e:
-        print(f"Error in edit_embed: {e}")
-        try:
-            if not interaction.response.is_done():
-                await interaction.response.send_message("❌ An error occurred.", ephemeral=True)
-        except:
-            pass
+    content, view = embed_picker(partition, 'edit')
+    await interaction.response.send_message(content, view=view, ephemeral=True)
 
 @bot.tree.command(name="delete_embed", description="[STAFF ONLY] Delete a stored embed by name")
+@app_commands.autocomplete(embed_name=embed_name_autocomplete)
+@instrumented("delete_embed")
 async def delete_embed(interaction: discord.Interaction, embed_name: str):
+    if not await check_verification(interaction):
+        return
+
+    partition = await guild_partition(interaction)
+    stored_embeds = partition.store.section('stored_embeds')
+
+    if not stored_embeds or len(stored_embeds) == 0:
+        await interaction.response.send_message("📭 **No embeds have been created yet!** Use `/create_embed` to create your first embed.", ephemeral=True)
+        return
+
+    # Check if the embed exists
+    if embed_name not in stored_embeds:
+        await interaction.response.send_message(embed_not_found_message(partition, embed_name), ephemeral=True)
+        return
+
+    # Show confirmation
+    view = ComponentLayout(
+        discord.ui.Button(label="Yes, Delete", style=discord.ButtonStyle.danger, emoji="✅",
+                          custom_id=components.custom_id('delete_yes', embed_name)),
+        discord.ui.Button(label="Cancel", style=discord.ButtonStyle.secondary, emoji="❌",
+                          custom_id=components.custom_id('delete_no', embed_name))
+    )
+    await interaction.response.send_message(
+        f"⚠️ **Are you sure you want to delete embed `{embed_name}`?**\nThis action cannot be undone!",
+        view=view,
+        ephemeral=True
+    )
+
+@components.route('delete_yes', fields=1)
+@instrumented("confirm_delete.confirm", "❌ Error deleting embed.")
+@deferred(check=check_verification, thinking=False)
+async def confirm_delete(interaction: discord.Interaction, embed_name):
+    if delete_stored_embed(await guild_partition(interaction), embed_name):
+        await interaction.edit_original_response(content=f"✅ **Embed `{embed_name}` has been deleted successfully!**", view=None)
+    else:
+        await interaction.edit_original_response(content="❌ Embed not found or already deleted.", view=None)
+
+@components.route('delete_no', fields=1)
+@instrumented("confirm_delete.cancel")
+async def cancel_delete(interaction: discord.Interaction, embed_name):
+    await interaction.response.edit_message(content="❌ Delete operation cancelled.", view=None)
+
+@bot.tree.command(name="export_embeds", description="[STAFF ONLY] Download stored embeds as a JSON Lines file")
+@app_commands.describe(pattern="Only embeds whose name matches this pattern, e.g. promo_*")
+@instrumented("export_embeds", "❌ Export failed.")
+@deferred(queue=bulk_queue, check=check_verification)
+@holds_partition
+async def export_embeds_command(interaction: discord.Interaction, pattern: str = None):
+    partition = await guild_partition(interaction)
+    path, count = await export_embeds(partition.store.section('stored_embeds'), pattern)
     try:
-        if not await check_verification(interaction):
+        if not count:
+            await interaction.followup.send("📭 **No embeds match.**", ephemeral=True)
             return
+        await interaction.followup.send(f"📦 **Exported {count} embeds.** Use `/import_embeds` to load them elsewhere.",
+                                        file=discord.File(path, filename="embeds.jsonl"), ephemeral=True)
+    finally:
+        os.remove(path)
+
+@bot.tree.command(name="import_embeds", description="[STAFF ONLY] Import embeds from a JSON Lines file")
+@app_commands.describe(file="A .jsonl file from /export_embeds", overwrite="Replace embeds that already exist")
+@instrumented("import_embeds", "❌ Import failed.")
+@deferred(queue=bulk_queue, check=check_verification)
+@holds_partition
+async def import_embeds_command(interaction: discord.Interaction, file: discord.Attachment, overwrite: bool = False):
+    if file.size > IMPORT_MAX_BYTES:
+        await interaction.followup.send(f"❌ File is too large (limit {IMPORT_MAX_BYTES // (1024 * 1024)} MiB).", ephemeral=True)
+        return
+
+    partition = await guild_partition(interaction)
+    stored_embeds = partition.store.section('stored_embeds')
+    last_progress = time.monotonic()
+
+    async def progress(report):
+        nonlocal last_progress
+        if time.monotonic() - last_progress >= 2:
+            last_progress = time.monotonic()
+            await interaction.edit_original_response(content=f"⏳ **Importing...** {report.summary()}")
+
+    def save_batch(batch):
+        for embed_name, embed_data in batch:
+            save_stored_embed(partition, embed_name, embed_data, index=False)
 
-        data = load_data()
-        stored_embeds = data.get('stored_embeds', {})
+    try:
+        # Lines are validated as they download; the store writes once when the import ends
+        async with aiohttp.ClientSession(read_bufsize=2 ** 20) as session:
+            async with session.get(file.url) as response:
+                response.raise_for_status()
+                async with partition.store.bulk():
+                    report = await import_lines(response.content, save_batch, stored_embeds.__contains__,
+                                                overwrite=overwrite, progress=progress)
+    finally:
+        partition.embed_index.build(stored_embeds)
 
-        if not stored_embeds or len(stored_embeds) == 0:
-            await interaction.response.send_message("📭 **No embeds have been created yet!** Use `/create_embed` to create your first embed.", ephemeral=True)
+    try:
+        lines = [f"✅ **Import finished:** {report.summary()}"]
+        lines.extend(f"• {error}" for error in report.first_errors)
+        if report.errors > len(report.first_errors):
+            lines.append(f"… and {report.errors - len(report.first_errors)} more (see attached file)")
+        message = "\n".join(lines)[:2000]
+        if report.error_path:
+            await interaction.followup.send(message, file=discord.File(report.error_path, filename="import_errors.txt"), ephemeral=True)
+        else:
+            await interaction.followup.send(message, ephemeral=True)
+    finally:
+        report.cleanup()
+
+def in_interaction_guild(interaction, channel_id):
+    """True if the channel (or thread) belongs to the server the interaction came from."""
+    return interaction.guild is not None and interaction.guild.get_channel_or_thread(channel_id) is not None
+
+async def channel_group_autocomplete(interaction: discord.Interaction, current: str):
+    partition = await guild_partition(interaction)
+    if not partition.is_verified(interaction.user.id):
+        return []
+    current = current.lower()
+    groups = partition.store.section('channel_groups')
+    return [
+        app_commands.Choice(name=f"{name} ({len(ids)} channels)"[:100], value=name)
+        for name, ids in groups.items() if name.lower().startswith(current)
+    ][:25]
+
+@bot.tree.command(name="save_channel_group", description="[STAFF ONLY] Save a named list of channels for /broadcast")
+@app_commands.describe(group_name="Name of the group", channels="Channel mentions or IDs, separated by spaces")
+@app_commands.autocomplete(group_name=channel_group_autocomplete)
+@instrumented("save_channel_group")
+async def save_channel_group(interaction: discord.Interaction, group_name: str, channels: str):
+    if not await check_verification(interaction):
+        return
+
+    channel_ids = parse_channel_ids(channels)
+    if not channel_ids:
+        await interaction.response.send_message("❌ **No channels found!** Mention channels or paste their IDs.", ephemeral=True)
+        return
+    foreign = [channel_id for channel_id in channel_ids if not in_interaction_guild(interaction, channel_id)]
+    if foreign:
+        mentions = ' '.join(f"<#{channel_id}>" for channel_id in foreign)
+        await interaction.response.send_message(f"🚫 **Not channels in this server:** {mentions}"[:2000], ephemeral=True)
+        return
+
+    partition = await guild_partition(interaction)
+    partition.store.put('channel_groups', group_name, channel_ids)
+    await interaction.response.send_message(f"✅ **Channel group `{group_name}` saved** with {len(channel_ids)} channels.", ephemeral=True)
+
+@bot.tree.command(name="broadcast", description="[STAFF ONLY] Send a stored embed to many channels at once")
+@app_commands.describe(
+    embed_name="Embed to broadcast",
+    channels="Channel mentions or IDs, separated by spaces",
+    group="Saved channel group to send to"
+)
+@app_commands.autocomplete(embed_name=embed_name_autocomplete, group=channel_group_autocomplete)
+@instrumented("broadcast", "❌ Broadcast failed.")
+@deferred(queue=bulk_queue, check=check_verification)
+@holds_partition
+async def broadcast(interaction: discord.Interaction, embed_name: str, channels: str = None, group: str = None):
+    # Sends can take a while with many channels, so this runs on the bulk queue
+    partition = await guild_partition(interaction)
+    stored_embeds = partition.store.section('stored_embeds')
+    if embed_name not in stored_embeds:
+        await interaction.followup.send(embed_not_found_message(partition, embed_name), ephemeral=True)
+        return
+
+    channel_ids = parse_channel_ids(channels)
+    if group:
+        group_ids = partition.store.section('channel_groups').get(group)
+        if group_ids is None:
+            await interaction.followup.send(f"❌ **Channel group `{group}` not found!**", ephemeral=True)
             return
+        channel_ids += [channel_id for channel_id in group_ids if channel_id not in channel_ids]
+
+    if not channel_ids:
+        await interaction.followup.send("❌ **No target channels!** Pass `channels` and/or a saved `group`.", ephemeral=True)
+        return
+
+    # One render for every channel; {user} is whoever ran the broadcast
+    embed = partition.embed_cache.get(embed_name, stored_embeds[embed_name], interaction_context(interaction))
+    results = await broadcast_embed(bot, embed, channel_ids, interaction.guild_id, dispatcher=outbound)
+    await interaction.followup.send(format_report(results), ephemeral=True)
+
+@bot.tree.command(name="schedule_embed", description="[STAFF ONLY] Post a stored embed at a time or on a schedule")
+@app_commands.describe(
+    embed_name="Embed to post",
+    channel="Channel to post in",
+    at="First run, YYYY-MM-DD HH:MM in UTC (default: now)",
+    every="Repeat interval, e.g. 30m, 2h, 1d",
+    cron="Cron schedule in UTC, e.g. '0 18 * * 1-5'"
+)
+@app_commands.autocomplete(embed_name=embed_name_autocomplete)
+@instrumented("schedule_embed")
+async def schedule_embed(interaction: discord.Interaction, embed_name: str, channel: discord.TextChannel,
+                         at: str = None, every: str = None, cron: str = None):
+    if not await check_verification(interaction):
+        return
+
+    if not in_interaction_guild(interaction, channel.id):
+        await interaction.response.send_message(f"🚫 {channel.mention} is not a channel in this server.", ephemeral=True)
+        return
+
+    partition = await guild_partition(interaction)
+    if embed_name not in partition.store.section('stored_embeds'):
+        await interaction.response.send_message(embed_not_found_message(partition, embed_name), ephemeral=True)
+        return
+
+    if every and cron:
+        await interaction.response.send_message("❌ Use either `every` or `cron`, not both.", ephemeral=True)
+        return
 
-        # Check if the embed exists
-        if embed_name not in stored_embeds:
-            available_embeds = list(stored_embeds.keys())
-            embed_list = ", ".join([f"`{name}`" for name in available_embeds])
-            await interaction.response.send_message(
-                f"❌ **Embed `{embed_name}` not found!**\n\n**Available embeds:** {embed_list}",
-                ephemeral=True
-            )
+    try:
+        job = {'embed_name': embed_name, 'channel_id': channel.id, 'guild_id': interaction.guild_id,
+               'created_by': interaction.user.id}
+        if every:
+            job['interval'] = parse_interval(every)
+        if cron:
+            job['cron'] = CronSchedule(cron).expression
+        now = datetime.now(timezone.utc).timestamp()
+        if at:
+            job['next_run'] = parse_time(at)
+        elif cron:
+            job['next_run'] = CronSchedule(cron).next_after(now)
+        else:
+            job['next_run'] = now
+    except ValueError as e:
+        await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+        return
+
+    job_id = scheduler.add(job)
+    await interaction.response.send_message(
+        f"✅ **Scheduled `{embed_name}`** in {channel.mention} as `{job_id}`, first run <t:{int(job['next_run'])}:R>.",
+        ephemeral=True
+    )
+
+@bot.tree.command(name="list_schedules", description="[STAFF ONLY] Show upcoming scheduled announcements")
+@instrumented("list_schedules")
+async def list_schedules(interaction: discord.Interaction):
+    if not await check_verification(interaction):
+        return
+
+    jobs = sorted(
+        ((job_id, job) for job_id, job in scheduler.jobs.items() if job.get('guild_id') == interaction.guild_id),
+        key=lambda item: item[1]['next_run']
+    )
+    if not jobs:
+        await interaction.response.send_message("📭 **No announcements scheduled!** Use `/schedule_embed` to add one.", ephemeral=True)
+        return
+
+    lines = [f"⏰ **{len(jobs)} scheduled announcements** (next 20):"]
+    for job_id, job in jobs[:20]:
+        repeat = f"every {job['interval'] // 60}m" if job.get('interval') else (f"cron `{job['cron']}`" if job.get('cron') else "once")
+        lines.append(f"`{job_id}` · `{job['embed_name']}` → <#{job['channel_id']}> <t:{int(job['next_run'])}:R> ({repeat})")
+    await interaction.response.send_message("\n".join(lines), ephemeral=True)
+
+@bot.tree.command(name="cancel_schedule", description="[STAFF ONLY] Cancel a scheduled announcement")
+@app_commands.describe(job_id="ID shown by /list_schedules")
+@instrumented("cancel_schedule")
+async def cancel_schedule(interaction: discord.Interaction, job_id: str):
+    if not await check_verification(interaction):
+        return
+
+    job = scheduler.jobs.get(job_id)
+    if job is not None and job.get('guild_id') == interaction.guild_id and scheduler.cancel(job_id):
+        await interaction.response.send_message(f"✅ **Scheduled announcement `{job_id}` cancelled.**", ephemeral=True)
+    else:
+        await interaction.response.send_message(f"❌ **No scheduled announcement `{job_id}`.**", ephemeral=True)
+
+@bot.tree.command(name="automod_add", description="[STAFF ONLY] Add banned words to automod")
+@app_commands.describe(words="Words or phrases to ban, separated by commas")
+@instrumented("automod_add")
+async def automod_add(interaction: discord.Interaction, words: str):
+    if not await check_verification(interaction):
+        return
+
+    partition = await guild_partition(interaction)
+    new_words = [word.strip().lower() for word in words.split(',') if word.strip()]
+    added = [word for word in new_words if partition.store.add_unique('automod_words', word)]
+    if added:
+        partition.automod.invalidate()
+    await interaction.response.send_message(
+        f"✅ **Added {len(added)} word(s) to automod.** {len(partition.store.get('automod_words', []))} banned in total.",
+        ephemeral=True
+    )
+
+@bot.tree.command(name="automod_remove", description="[STAFF ONLY] Remove banned words from automod")
+@app_commands.describe(words="Words or phrases to unban, separated by commas")
+@instrumented("automod_remove")
+async def automod_remove(interaction: discord.Interaction, words: str):
+    if not await check_verification(interaction):
+        return
+
+    partition = await guild_partition(interaction)
+    to_remove = {word.strip().lower() for word in words.split(',') if word.strip()}
+    current = partition.store.get('automod_words', [])
+    remaining = [word for word in current if word not in to_remove]
+    removed = len(current) - len(remaining)
+    if removed:
+        partition.store.set('automod_words', remaining)
+        partition.automod.invalidate()
+    await interaction.response.send_message(f"✅ **Removed {removed} word(s) from automod.**", ephemeral=True)
+
+@bot.tree.command(name="automod_toggle", description="[STAFF ONLY] Turn automod on or off")
+@instrumented("automod_toggle")
+async def automod_toggle(interaction: discord.Interaction, enabled: bool):
+    if not await check_verification(interaction):
+        return
+
+    partition = await guild_partition(interaction)
+    partition.store.set('automod_enabled', enabled)
+    state = "enabled" if enabled else "disabled"
+    await interaction.response.send_message(f"✅ **Automod {state}.**", ephemeral=True)
+
+def ticket_settings(partition):
+    return partition.store.section('ticket_settings')
+
+def send_ticket_log(partition, guild: discord.Guild, message: str):
+    """Queue a line for the ticket log channel; bursts are batched and sent at log priority."""
+    log_channel_id = ticket_settings(partition).get('log_channel_id')
+    channel = guild.get_channel(log_channel_id) if log_channel_id else None
+    if channel is not None:
+        outbound.log(channel, message)
+
+async def create_ticket_channel(settings, guild: discord.Guild, member: discord.Member, number: int):
+    category = guild.get_channel(settings['category_id']) if settings.get('category_id') else None
+    support_role = guild.get_role(settings['support_role_id']) if settings.get('support_role_id') else None
+
+    overwrites = {
+        guild.default_role: discord.PermissionOverwrite(view_channel=False),
+        member: discord.PermissionOverwrite(view_channel=True, send_messages=True, attach_files=True),
+        guild.me: discord.PermissionOverwrite(view_channel=True, send_messages=True, manage_channels=True),
+    }
+    if support_role:
+        overwrites[support_role] = discord.PermissionOverwrite(view_channel=True, send_messages=True)
+
+    return await guild.create_text_channel(
+        f"ticket-{number:04d}",
+        category=category if isinstance(category, discord.CategoryChannel) else None,
+        overwrites=overwrites,
+        topic=f"Ticket #{number} for {member} ({member.id})"
+    )
+
+class TicketPanelView(discord.ui.View):
+    def __init__(self):
+        super().__init__(timeout=None)
+
+    @discord.ui.button(label="Create Ticket", style=discord.ButtonStyle.primary, emoji="🎫", custom_id="ticket:open")
+    @instrumented("TicketPanelView.open_ticket", "❌ Error creating ticket.")
+    async def open_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
+        guild = interaction.guild
+        partition = await guild_partition(interaction)
+        ticket_manager = partition.tickets
+        existing = ticket_manager.find_by_user(guild.id, interaction.user.id)
+        if existing:
+            await interaction.response.send_message(f"❌ **You already have an open ticket:** <#{existing['channel_id']}>", ephemeral=True)
             return
 
-        # Show confirmation
-        view = ConfirmDeleteView(embed_name)
-        await interaction.response.send_message(
-            f"⚠️ **Are you sure you want to delete embed `{embed_name}`?**\nThis action cannot be undone!",
-            view=view,
-            ephemeral=True
-        )
-    except discord.errors.NotFound:
-        print("Delete embed interaction expired")
-    except Exception as e:
-        print(f"Error in delete_embed: {e}")
+        # Channel creation can queue behind other presses in this guild
+        await interaction.response.defer(ephemeral=True, thinking=True)
         try:
-            if not interaction.response.is_done():
-                await interaction.response.send_message("❌ An error occurred.", ephemeral=True)
-        except:
-            pass
-
-class ConfirmDeleteView(discord.ui.View):
-    def __init__(self, embed_name):
-        super().__init__(timeout=60)
-        self.embed_name = embed_name
+            ticket, created = await ticket_manager.open(
+                guild.id,
+                interaction.user.id,
+                lambda number: create_ticket_channel(ticket_settings(partition), guild, interaction.user, number)
+            )
+        except discord.errors.Forbidden:
+            print("Missing permissions to create ticket channel")
+            await interaction.followup.send("❌ I don't have permission to create ticket channels.", ephemeral=True)
+            return
+        if not created:
+            await interaction.followup.send(f"❌ **You already have an open ticket:** <#{ticket['channel_id']}>", ephemeral=True)
+            return
 
-    @discord.ui.button(label="Yes, Delete", style=discord.ButtonStyle.danger, emoji="✅")
-    async def confirm_delete(self, interaction: discord.Interaction, button: discord.ui.Button):
-        try:
-            data = load_data()
-            
-            if self.embed_name in data.get('stored_embeds', {}):
-                del data['stored_embeds'][self.embed_name]
-                save_data(data)
-                await interaction.response.send_message(f"✅ **Embed `{self.embed_name}` has been deleted successfully!**", ephemeral=True)
-            else:
-                await interaction.response.send_message("❌ Embed not found or already deleted.", ephemeral=True)
-            self.stop()
-        except discord.errors.NotFound:
-            print("Delete confirmation interaction expired")
-        except Exception as e:
-            print(f"Error in confirm delete: {e}")
-            try:
-                if not interaction.response.is_done():
-                    await interaction.response.send_message("❌ Error deleting embed.", ephemeral=True)
-            except:
-                pass
+        channel = guild.get_channel(ticket['channel_id'])
+        welcome = ticket_settings(partition).get('welcome_message') or "Thank you for creating a ticket!"
+        await outbound.send(channel, f"{interaction.user.mention} {welcome}", view=TicketControlsView())
+        await interaction.followup.send(f"✅ **Ticket created:** {channel.mention}", ephemeral=True)
+        send_ticket_log(partition, guild, f"🎫 Ticket #{ticket['number']} opened by {interaction.user.mention} in {channel.mention}")
 
-    @discord.ui.button(label="Cancel", style=discord.ButtonStyle.secondary, emoji="❌")
-    async def cancel_delete(self, interaction: discord.Interaction, button: discord.ui.Button):
-        try:
-            await interaction.response.send_message("❌ Delete operation cancelled.", ephemeral=True)
-            self.stop()
-        except discord.errors.NotFound:
-            print("Cancel delete interaction expired")
-        except Exception as e:
-            print(f"Error in cancel delete: {e}")
+class TicketControlsView(discord.ui.View):
+    def __init__(self):
+        super().__init__(timeout=None)
+
+    @discord.ui.button(label="Close Ticket", style=discord.ButtonStyle.danger, emoji="🔒", custom_id="ticket:close")
+    @instrumented("TicketControlsView.close_ticket")
+    async def close_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
+        partition = await guild_partition(interaction)
+        ticket = partition.tickets.find_by_channel(interaction.channel_id)
+        if ticket is None:
+            await interaction.response.send_message("❌ This channel is not an open ticket.", ephemeral=True)
+            return
+
+        if interaction.user.id != ticket['user_id'] and not partition.is_verified(interaction.user.id):
+            await interaction.response.send_message("❌ Only the ticket owner or staff can close this ticket.", ephemeral=True)
+            return
+
+        partition.tickets.close(interaction.channel_id)
+        await interaction.response.send_message("🔒 **Closing ticket...**")
+        send_ticket_log(partition, interaction.guild, f"🔒 Ticket #{ticket['number']} closed by {interaction.user.mention}")
+        await interaction.channel.delete(reason=f"Ticket #{ticket['number']} closed by {interaction.user}")
+
+@bot.tree.command(name="ticket_setup", description="[STAFF ONLY] Configure the ticket system")
+@app_commands.describe(
+    category="Category new ticket channels are created in",
+    support_role="Role that can see every ticket",
+    log_channel="Channel for ticket open/close logs",
+    welcome_message="Message posted in new tickets"
+)
+@instrumented("ticket_setup")
+async def ticket_setup(interaction: discord.Interaction, category: discord.CategoryChannel = None,
+                       support_role: discord.Role = None, log_channel: discord.TextChannel = None,
+                       welcome_message: str = None):
+    if not await check_verification(interaction):
+        return
+
+    partition = await guild_partition(interaction)
+    settings = dict(ticket_settings(partition))
+    if category:
+        settings['category_id'] = category.id
+    if support_role:
+        settings['support_role_id'] = support_role.id
+    if log_channel:
+        settings['log_channel_id'] = log_channel.id
+    if welcome_message:
+        settings['welcome_message'] = welcome_message
+    partition.store.set('ticket_settings', settings)
+
+    await interaction.response.send_message("✅ **Ticket settings updated!** Use `/ticket_panel` to post the ticket button.", ephemeral=True)
+
+@bot.tree.command(name="ticket_panel", description="[STAFF ONLY] Post the ticket creation button in this channel")
+@instrumented("ticket_panel")
+async def ticket_panel(interaction: discord.Interaction):
+    if not await check_verification(interaction):
+        return
+
+    embed = discord.Embed(
+        title="🎫 Support Tickets",
+        description="Press the button below to open a private ticket with staff.",
+        color=0x0099FF
+    )
+    await interaction.response.send_message(embed=embed, view=TicketPanelView())
+
+# RIA applications
+def application_embed(app_id, app):
+    """Staff-facing summary of one application."""
+    status = app.get('status') or 'pending'
+    color = {'pending': 0xFFA500, 'approved': 0x00FF00, 'denied': 0xFF0000}.get(status, 0x0099FF)
+    embed = discord.Embed(title=f"📋 RIA Application `{app_id}`", color=color)
+    embed.add_field(name="Applicant", value=f"<@{app.get('user_id')}>", inline=True)
+    embed.add_field(name="Status", value=status.title(), inline=True)
+    embed.add_field(name="Submitted", value=str(app.get('submitted_at') or 'unknown')[:16].replace('T', ' '), inline=True)
+    for field, label in (('username', 'Username'), ('age', 'Age'), ('experience', 'Experience'),
+                         ('motivation', 'Motivation'), ('availability', 'Availability')):
+        embed.add_field(name=label, value=str(app.get(field) or '—')[:1024], inline=False)
+    if app.get('reviewed_by'):
+        embed.set_footer(text=f"Reviewed by {app['reviewed_by']}")
+    return embed
+
+class RiaApplicationModal(discord.ui.Modal, title="RIA Application"):
+    def __init__(self):
+        super().__init__(timeout=600)
+
+    username_input = discord.ui.TextInput(label="Username", max_length=100, required=True)
+    age_input = discord.ui.TextInput(label="Age", max_length=10, required=True)
+    experience_input = discord.ui.TextInput(
+        label="Relevant experience",
+        style=discord.TextStyle.paragraph,
+        max_length=1000,
+        required=True
+    )
+    motivation_input = discord.ui.TextInput(
+        label="Why do you want to join?",
+        style=discord.TextStyle.paragraph,
+        max_length=1000,
+        required=True
+    )
+    availability_input = discord.ui.TextInput(label="Availability", max_length=200, required=True)
+
+    @instrumented("RiaApplicationModal.on_submit", "❌ Error submitting application.")
+    async def on_submit(self, interaction: discord.Interaction):
+        partition = await guild_partition(interaction)
+        (app_id, app), created = partition.applications.submit(interaction.user.id, {
+            'username': str(self.username_input.value).strip(),
+            'age': str(self.age_input.value).strip(),
+            'experience': str(self.experience_input.value).strip(),
+            'motivation': str(self.motivation_input.value).strip(),
+            'availability': str(self.availability_input.value).strip()
+        })
+        if not created:
+            await interaction.response.send_message(f"⏳ **You already have a pending application** (`{app_id}`).", ephemeral=True)
+            return
+        await interaction.response.send_message(f"✅ **Application submitted!** Your application ID is `{app_id}`.", ephemeral=True)
 
     async def on_timeout(self):
-        print("Delete confirmation view timed out")
-        self.stop()
+        print("RIA application modal timed out")
+
+def ria_review_layout(app_id):
+    """Approve/deny buttons for one application."""
+    return ComponentLayout(
+        discord.ui.Button(label="Approve", style=discord.ButtonStyle.success, emoji="✅",
+                          custom_id=components.custom_id('ria_approve', app_id)),
+        discord.ui.Button(label="Deny", style=discord.ButtonStyle.danger, emoji="⛔",
+                          custom_id=components.custom_id('ria_deny', app_id))
+    )
+
+async def review_application(interaction: discord.Interaction, app_id, status):
+    """Record the decision, then move the message on to the next pending application."""
+    partition = await guild_partition(interaction)
+    if not partition.is_verified(interaction.user.id):
+        await interaction.response.send_message("❌ Only verified staff can review applications.", ephemeral=True)
+        return
+
+    ria_queue = partition.applications
+    reviewed = ria_queue.review(app_id, status, interaction.user.id)
+    outcome = f"{'✅ Approved' if status == 'approved' else '⛔ Denied'} `{app_id}`." if reviewed else f"⚠️ `{app_id}` was already reviewed."
+
+    next_app = ria_queue.next_pending()
+    if next_app is None:
+        await interaction.response.edit_message(content=f"{outcome}\n📭 **No more pending applications.**", embed=None, view=None)
+        return
+    next_id, app = next_app
+    await interaction.response.edit_message(
+        content=f"{outcome}\n**{ria_queue.count('pending')} pending.** Next:",
+        embed=application_embed(next_id, app),
+        view=ria_review_layout(next_id)
+    )
+
+@components.route('ria_approve', fields=1)
+@instrumented("ria_review.approve", "❌ Error reviewing application.")
+async def approve_application(interaction: discord.Interaction, app_id):
+    await review_application(interaction, app_id, 'approved')
+
+@components.route('ria_deny', fields=1)
+@instrumented("ria_review.deny", "❌ Error reviewing application.")
+async def deny_application(interaction: discord.Interaction, app_id):
+    await review_application(interaction, app_id, 'denied')
+
+RIA_PER_PAGE = 10
+
+def ria_list_page(ria_queue, status, page=0):
+    """Ten applications per page, newest first, with prev/next buttons. Returns ``(content, view)``."""
+    page_count = ria_queue.page_count(status, RIA_PER_PAGE)
+    page = max(0, min(page, page_count - 1))
+    lines = [f"📋 **{status.title()} applications** · page {page + 1}/{page_count} · {ria_queue.count(status)} total"]
+    for app_id, app in ria_queue.page(status, page, RIA_PER_PAGE):
+        submitted = str(app.get('submitted_at') or '')[:16].replace('T', ' ')
+        lines.append(f"`{app_id}` · <@{app.get('user_id')}> · {str(app.get('username') or '—')[:40]} · {submitted}")
+    if len(lines) == 1:
+        lines.append("📭 Nothing here.")
+
+    view = ComponentLayout(
+        discord.ui.Button(label="Previous", style=discord.ButtonStyle.secondary, emoji="⬅️", disabled=page == 0,
+                          custom_id=components.custom_id('ria_page', status, page - 1)),
+        discord.ui.Button(label="Next", style=discord.ButtonStyle.secondary, emoji="➡️", disabled=page >= page_count - 1,
+                          custom_id=components.custom_id('ria_page', status, page + 1))
+    )
+    return "\n".join(lines), view
+
+@components.route('ria_page', fields=2)
+@instrumented("ria_list.turn_page")
+async def ria_list_turn_page(interaction: discord.Interaction, status, page):
+    partition = await guild_partition(interaction)
+    content, view = ria_list_page(partition.applications, status, int(page))
+    await interaction.response.edit_message(content=content, view=view)
+
+STATUS_CHOICES = [app_commands.Choice(name=status.title(), value=status) for status in ('pending', 'approved', 'denied')]
+
+@bot.tree.command(name="apply", description="Apply to join the RIA team")
+@instrumented("apply")
+async def apply(interaction: discord.Interaction):
+    partition = await guild_partition(interaction)
+    existing = partition.applications.pending_for(interaction.user.id)
+    if existing:
+        await interaction.response.send_message(f"⏳ **You already have a pending application** (`{existing[0]}`).", ephemeral=True)
+        return
+    await interaction.response.send_modal(RiaApplicationModal())
+
+@bot.tree.command(name="ria_review", description="[STAFF ONLY] Review the oldest pending RIA application")
+@instrumented("ria_review")
+async def ria_review(interaction: discord.Interaction):
+    if not await check_verification(interaction):
+        return
+
+    ria_queue = (await guild_partition(interaction)).applications
+    next_app = ria_queue.next_pending()
+    if next_app is None:
+        await interaction.response.send_message("📭 **No pending applications!**", ephemeral=True)
+        return
+    app_id, app = next_app
+    await interaction.response.send_message(
+        f"**{ria_queue.count('pending')} pending.** Oldest first:",
+        embed=application_embed(app_id, app),
+        view=ria_review_layout(app_id),
+        ephemeral=True
+    )
+
+@bot.tree.command(name="ria_list", description="[STAFF ONLY] Browse RIA applications by status")
+@app_commands.describe(status="Which applications to list (default: pending)")
+@app_commands.choices(status=STATUS_CHOICES)
+@instrumented("ria_list")
+async def ria_list(interaction: discord.Interaction, status: app_commands.Choice[str] = None):
+    if not await check_verification(interaction):
+        return
+
+    partition = await guild_partition(interaction)
+    content, view = ria_list_page(partition.applications, status.value if status else 'pending')
+    await interaction.response.send_message(content, view=view, ephemeral=True)
+
+@bot.tree.command(name="ria_export", description="[STAFF ONLY] Download RIA applications as CSV or JSON Lines")
+@app_commands.describe(format="File format", status="Only export this status (default: all)")
+@app_commands.choices(
+    format=[app_commands.Choice(name="CSV", value="csv"), app_commands.Choice(name="JSON Lines", value="jsonl")],
+    status=STATUS_CHOICES
+)
+@instrumented("ria_export", "❌ Export failed.")
+@deferred(queue=bulk_queue, check=check_verification)
+@holds_partition
+async def ria_export(interaction: discord.Interaction, format: app_commands.Choice[str],
+                     status: app_commands.Choice[str] = None):
+    status_value = status.value if status else None
+    ria_queue = (await guild_partition(interaction)).applications
+    path = await ria_queue.export(format.value, status_value)
+    try:
+        suffix = '.gz' if path.endswith('.gz') else ''
+        filename = f"ria_applications{'_' + status_value if status_value else ''}.{format.value}{suffix}"
+        count = ria_queue.count(status_value)
+        await interaction.followup.send(f"📦 **Exported {count} applications.**", file=discord.File(path, filename=filename), ephemeral=True)
+    finally:
+        os.remove(path)
+
+@bot.tree.command(name="shards", description="[STAFF ONLY] Show gateway shard health and latency")
+@instrumented("shards")
+async def shards(interaction: discord.Interaction):
+    if not await check_verification(interaction):
+        return
+
+    lines = [f"🧩 **Shard status** ({bot.shard_count or 1} total, this process runs {len(shard_health.report(bot))})"]
+    for shard in shard_health.report(bot):
+        state = "🟢" if shard['ready'] else "🔴"
+        latency = f"{shard['latency_ms']:.0f} ms" if shard['latency_ms'] is not None else "n/a"
+        lines.append(
+            f"{state} Shard {shard['shard_id']}: {latency} · {shard['guilds']} guilds · "
+            f"{shard['disconnects']} disconnects · {shard['resumes']} resumes"
+        )
+    await interaction.response.send_message("\n".join(lines[:40]), ephemeral=True)
+
+@bot.tree.command(name="memory", description="[STAFF ONLY] Show memory usage and cache sizes")
+@instrumented("memory")
+async def memory(interaction: discord.Interaction):
+    if not await check_verification(interaction):
+        return
+
+    report = memory_report(bot)
+    rss = f"{report['rss_bytes'] / 1024 / 1024:.1f} MiB" if report['rss_bytes'] else "n/a"
+    await interaction.response.send_message(
+        f"🧠 **Memory** (profile `{MEMORY_PROFILE}`)\n"
+        f"Resident: **{rss}**\n"
+        f"Guilds: {report['guilds']} · Members: {report['members_cached']} · Users: {report['users_cached']}\n"
+        f"Channels: {report['channels_cached']} · Roles: {report['roles_cached']} · Emojis: {report['emojis_cached']}\n"
+        f"Messages: {report['messages_cached']} · Persistent views: {report['views_tracked']}",
+        ephemeral=True
+    )
+
+@bot.tree.command(name="profiler", description="[STAFF ONLY] Sample slow command handlers")
+@app_commands.describe(action="start, stop, dump or reset")
+@app_commands.choices(action=[
+    app_commands.Choice(name="start", value="start"),
+    app_commands.Choice(name="stop", value="stop"),
+    app_commands.Choice(name="dump", value="dump"),
+    app_commands.Choice(name="reset", value="reset"),
+])
+@instrumented("profiler")
+async def profiler_command(interaction: discord.Interaction, action: app_commands.Choice[str]):
+    if not await check_verification(interaction):
+        return
+
+    if action.value == "start":
+        profiler.start()
+        await interaction.response.send_message(f"🔬 **Profiler started** (sampling every {profiler.interval * 1000:.0f} ms).", ephemeral=True)
+    elif action.value == "stop":
+        profiler.stop()
+        await interaction.response.send_message("🔬 **Profiler stopped.** Use `dump` to see the slowest handlers.", ephemeral=True)
+    elif action.value == "reset":
+        profiler.reset()
+        await interaction.response.send_message("🔬 **Profiler samples cleared.**", ephemeral=True)
+    else:
+        report = profiler.dump()
+        if not report:
+            await interaction.response.send_message("📭 **No profiled invocations yet.** Start the profiler first.", ephemeral=True)
+            return
+        lines = [f"🔬 **Slowest {len(report)} handler invocations:**"]
+        for entry in report:
+            lines.append(f"**{entry['handler']}** · {entry['duration_ms']} ms · {entry['samples']} samples")
+            for stack in entry['top_stacks'][:1]:
+                lines.append("```\n" + "\n".join(stack['stack'][:6]) + "\n```")
+        await interaction.response.send_message("\n".join(lines)[:2000], ephemeral=True)
 
 # Run the bot
-TOKEN = os.getenv('DISCORD_BOT_TOKEN')
-if TOKEN:
-    bot.run(TOKEN)
-else:
-    print("❌ DISCORD_BOT_TOKEN not found in environment variables")
-    print("Please add your Discord bot token to the environment variables.")
+def main(status_port=STATUS_PORT):
+    TOKEN = os.getenv('DISCORD_BOT_TOKEN')
+    if TOKEN:
+        bot.status_port = status_port
+        bot.run(TOKEN)
+    else:
+        print("❌ DISCORD_BOT_TOKEN not found in environment variables")
+        print("Please add your Discord bot token to the environment variables.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import copy
+from collections import OrderedDict
+from datetime import datetime
+from urllib.parse import urlparse
+
+import discord
+
+from templates import compile_template, render_template, template_variables
+
+DEFAULT_COLOR = 0x0099FF
+URL_FIELDS = ('image_url', 'thumbnail_url', 'author_icon_url', 'footer_icon_url')
+
+
+def parse_color(value):
+    """Turn '#FF0000' / 'ff0000' / an int into a color int, falling back to the default blue."""
+    if isinstance(value, int):
+        return value
+    if not value:
+        return DEFAULT_COLOR
+    color_str = value.strip()
+    if color_str.startswith('#'):
+        color_str = color_str[1:]
+    try:
+        return int(color_str, 16)
+    except ValueError:
+        return DEFAULT_COLOR
+
+
+def validate_url(value):
+    """Return the URL if Discord will accept it in an embed, otherwise None."""
+    if not value:
+        return None
+    value = value.strip()
+    parsed = urlparse(value)
+    if parsed.scheme not in ('http', 'https') or not parsed.netloc:
+        return None
+    return value
+
+
+def normalize_embed_data(embed_data):
+    """Normalize embed data once when it is saved.
+
+    The hex color is pre-parsed into ``color_value`` (``color`` keeps the
+    text for the edit modal), URLs Discord would reject are dropped and
+    placeholders are compiled into ``template``.
+    """
+    normalized = dict(embed_data)
+    normalized['color_value'] = parse_color(normalized.get('color'))
+    for field in URL_FIELDS:
+        if field in normalized:
+            normalized[field] = validate_url(normalized[field])
+    normalized['template'] = compile_template(normalized)
+    return normalized
+
+
+def template_plan(embed_data):
+    """The stored render plan, compiled on the spot for records saved before templates."""
+    if 'template' in embed_data:
+        return embed_data['template']
+    return compile_template(embed_data)
+
+
+def build_embed(embed_data):
+    """Build a discord.Embed without the timestamp (that is patched per send)."""
+    embed = discord.Embed()
+
+    if embed_data.get('title'):
+        embed.title = embed_data['title']
+
+    if embed_data.get('description'):
+        embed.description = embed_data['description']
+
+    color = embed_data.get('color_value')
+    embed.color = color if color is not None else parse_color(embed_data.get('color'))
+
+    if embed_data.get('image_url'):
+        embed.set_image(url=embed_data['image_url'])
+
+    if embed_data.get('thumbnail_url'):
+        embed.set_thumbnail(url=embed_data['thumbnail_url'])
+
+    if embed_data.get('author_name'):
+        author_icon = embed_data.get('author_icon_url')
+        embed.set_author(
+            name=embed_data['author_name'],
+            icon_url=author_icon if author_icon else None
+        )
+
+    if embed_data.get('footer_text'):
+        footer_icon = embed_data.get('footer_icon_url')
+        embed.set_footer(
+            text=embed_data['footer_text'],
+            icon_url=footer_icon if footer_icon else None
+        )
+
+    return embed
+
+
+def with_timestamp(embed, embed_data):
+    """Return a send-ready embed, patching only the timestamp on a shallow copy."""
+    if not embed_data.get('show_timestamp'):
+        return embed
+    stamped = copy.copy(embed)
+    stamped.timestamp = datetime.utcnow()
+    return stamped
+
+
+def render_embed(embed_data, context=None):
+    """Build an embed with its placeholders filled from ``context``, without the timestamp."""
+    plan = template_plan(embed_data)
+    if plan is not None:
+        embed_data = render_template(plan, embed_data, context or {})
+    return build_embed(embed_data)
+
+
+class EmbedCache:
+    """LRU cache of built embeds keyed by (embed name, version).
+
+    Templated embeds are cached per rendering as well, keyed by the values
+    of just the placeholders they use, so ``{guild}`` renders are shared by
+    every member while ``{user}`` renders are per user.
+    """
+
+    def __init__(self, max_size=512):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key, entry):
+        self._entries[key] = entry
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get(self, embed_name, embed_data, context=None):
+        key = (embed_name, embed_data.get('version', 0))
+        entry = self._lookup(key)
+        if entry is None:
+            plan = template_plan(embed_data)
+            # Static embeds are built here; templated ones keep their plan and variables
+            entry = (plan, template_variables(plan)) if plan is not None else build_embed(embed_data)
+            self._store(key, entry)
+            if plan is None:
+                self.misses += 1
+                return with_timestamp(entry, embed_data)
+        elif isinstance(entry, discord.Embed):
+            self.hits += 1
+            return with_timestamp(entry, embed_data)
+
+        plan, variables = entry
+        context = context or {}
+        render_key = key + tuple(context.get(name, '') for name in variables)
+        embed = self._lookup(render_key)
+        if embed is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            embed = build_embed(render_template(plan, embed_data, context))
+            self._store(render_key, embed)
+        return with_timestamp(embed, embed_data)
+
+    def invalidate(self, embed_name):
+        for key in [key for key in self._entries if key[0] == embed_name]:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
@@ -0,0 +1,85 @@
+from bisect import bisect_left, insort
+
+
+def _terms(embed_name, embed_data):
+    """Searchable lower-cased terms: the name, the title and each title word."""
+    terms = {embed_name.lower()}
+    title = (embed_data or {}).get('title')
+    if title:
+        title = title.lower()
+        terms.add(title)
+        terms.update(title.split())
+    return terms
+
+
+class EmbedNameIndex:
+    """Prefix index over stored embed names and titles for autocomplete.
+
+    Keeps a sorted list of ``(term, name)`` pairs so a prefix lookup is a
+    bisect plus a short scan, and updates incrementally on save/delete.
+    """
+
+    def __init__(self):
+        self._entries = []
+        self._names = []
+        self._terms = {}
+
+    def build(self, stored_embeds):
+        self._terms = {name: _terms(name, data) for name, data in stored_embeds.items()}
+        self._entries = sorted((term, name) for name, terms in self._terms.items() for term in terms)
+        self._names = sorted(self._terms)
+
+    def add(self, embed_name, embed_data):
+        if embed_name in self._terms:
+            self._remove_terms(embed_name)
+        else:
+            insort(self._names, embed_name)
+        terms = _terms(embed_name, embed_data)
+        self._terms[embed_name] = terms
+        for term in terms:
+            insort(self._entries, (term, embed_name))
+
+    def remove(self, embed_name):
+        if embed_name not in self._terms:
+            return
+        self._remove_terms(embed_name)
+        del self._terms[embed_name]
+        i = bisect_left(self._names, embed_name)
+        if i < len(self._names) and self._names[i] == embed_name:
+            del self._names[i]
+
+    def _remove_terms(self, embed_name):
+        for term in self._terms[embed_name]:
+            i = bisect_left(self._entries, (term, embed_name))
+            if i < len(self._entries) and self._entries[i] == (term, embed_name):
+                del self._entries[i]
+
+    def search(self, query, limit=25):
+        """Embed names whose name, title or a title word starts with ``query``."""
+        query = query.strip().lower()
+        if not query:
+            return self._names[:limit]
+
+        results = []
+        seen = set()
+        i = bisect_left(self._entries, (query, ''))
+        while i < len(self._entries) and len(results) < limit:
+            term, name = self._entries[i]
+            if not term.startswith(query):
+                break
+            if name not in seen:
+                seen.add(name)
+                results.append(name)
+            i += 1
+        return results
+
+    def page(self, page, per_page=25):
+        """Names for one page of the fallback select, in sorted order."""
+        start = page * per_page
+        return self._names[start:start + per_page]
+
+    def page_count(self, per_page=25):
+        return max(1, -(-len(self._names) // per_page))
+
+    def __len__(self):
+        return len(self._names)
@@ -0,0 +1,178 @@
+import asyncio
+import fnmatch
+import json
+import os
+import tempfile
+
+# Stored fields that round-trip through export/import, with their length limits
+EMBED_FIELDS = {
+    'title': 256,
+    'description': 4096,
+    'color': 10,
+    'image_url': 500,
+    'thumbnail_url': 500,
+    'footer_text': 2048,
+    'footer_icon_url': 500,
+    'author_name': 256,
+    'author_icon_url': 500,
+}
+# Names end up in component custom_ids, which Discord caps at 100 characters
+MAX_NAME_LENGTH = 80
+EXPORT_CHUNK_LINES = 1000
+IMPORT_BATCH_SIZE = int(os.getenv('EMBED_IMPORT_BATCH_SIZE', '500'))
+IMPORT_MAX_BYTES = int(os.getenv('EMBED_IMPORT_MAX_BYTES', str(50 * 1024 * 1024)))
+
+
+def export_record(embed_name, embed_data):
+    """One JSONL object: the name plus the portable fields."""
+    record = {'name': embed_name}
+    for field in EMBED_FIELDS:
+        if embed_data.get(field) is not None:
+            record[field] = embed_data[field]
+    if embed_data.get('show_timestamp'):
+        record['show_timestamp'] = True
+    return record
+
+
+def parse_line(line):
+    """Validate one JSONL line; returns ``(name, embed_data)`` or raises ValueError."""
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON ({e.msg})")
+    if not isinstance(record, dict):
+        raise ValueError("expected a JSON object")
+
+    name = record.get('name')
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("missing `name`")
+    name = name.strip()
+    if len(name) > MAX_NAME_LENGTH:
+        raise ValueError(f"`name` longer than {MAX_NAME_LENGTH} characters")
+
+    embed_data = {}
+    for field, limit in EMBED_FIELDS.items():
+        value = record.get(field)
+        if value is None:
+            continue
+        if not isinstance(value, str):
+            raise ValueError(f"`{field}` must be a string")
+        if len(value) > limit:
+            raise ValueError(f"`{field}` longer than {limit} characters")
+        embed_data[field] = value
+    if not embed_data.get('title') and not embed_data.get('description'):
+        raise ValueError("needs a `title` or `description`")
+    embed_data['show_timestamp'] = bool(record.get('show_timestamp', False))
+    return name, embed_data
+
+
+async def export_embeds(stored_embeds, pattern=None, chunk_lines=EXPORT_CHUNK_LINES):
+    """Write matching embeds as JSONL to a temp file in chunks; returns ``(path, count)``.
+
+    ``pattern`` is a glob on the embed name, e.g. ``promo_*``. The caller
+    deletes the file.
+    """
+    names = [name for name in stored_embeds if pattern is None or fnmatch.fnmatchcase(name, pattern)]
+    handle, path = tempfile.mkstemp(prefix='embeds_', suffix='.jsonl')
+    count = 0
+    try:
+        with os.fdopen(handle, 'w', encoding='utf-8') as f:
+            for start in range(0, len(names), chunk_lines):
+                lines = []
+                for name in names[start:start + chunk_lines]:
+                    embed_data = stored_embeds.get(name)
+                    if embed_data is None:
+                        continue  # deleted while exporting
+                    lines.append(json.dumps(export_record(name, embed_data), ensure_ascii=False))
+                count += len(lines)
+                if lines:
+                    await asyncio.to_thread(f.write, '\n'.join(lines) + '\n')
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, count
+
+
+class ImportReport:
+    """Counts plus per-line errors, spooled to a temp file so memory stays flat."""
+
+    def __init__(self):
+        self.lines = 0
+        self.imported = 0
+        self.skipped = 0
+        self.errors = 0
+        self.first_errors = []
+        self._error_file = None
+        self.error_path = None
+
+    def error(self, line_number, message):
+        self.errors += 1
+        text = f"line {line_number}: {message}"
+        if len(self.first_errors) < 10:
+            self.first_errors.append(text)
+        if self._error_file is None:
+            handle, self.error_path = tempfile.mkstemp(prefix='embed_import_errors_', suffix='.txt')
+            self._error_file = os.fdopen(handle, 'w', encoding='utf-8')
+        self._error_file.write(text + '\n')
+
+    def close(self):
+        if self._error_file is not None:
+            self._error_file.close()
+            self._error_file = None
+
+    def cleanup(self):
+        self.close()
+        if self.error_path and os.path.exists(self.error_path):
+            os.remove(self.error_path)
+
+    def summary(self):
+        return (f"{self.lines} lines read · {self.imported} imported · "
+                f"{self.skipped} skipped (already exist) · {self.errors} errors")
+
+
+async def import_lines(lines, save_batch, exists, overwrite=False, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """Validate an async iterable of raw JSONL lines and save them in batches.
+
+    ``save_batch([(name, data), ...])`` stores a batch; ``exists(name)``
+    says whether a name is taken. ``progress(report)`` is awaited after each
+    batch. Only one batch is held in memory at a time.
+    """
+    report = ImportReport()
+    batch = []
+    # Names in the unsaved batch, which ``exists`` cannot see yet
+    pending = {}
+    async for raw in lines:
+        report.lines += 1
+        line = raw.decode('utf-8', errors='replace') if isinstance(raw, bytes) else raw
+        if not line.strip():
+            continue
+        try:
+            name, embed_data = parse_line(line)
+        except ValueError as e:
+            report.error(report.lines, str(e))
+            continue
+        if name in pending:
+            if overwrite:
+                # A later line wins, as it would against a saved embed
+                batch[pending[name]] = (name, embed_data)
+            else:
+                report.skipped += 1
+            continue
+        if not overwrite and exists(name):
+            report.skipped += 1
+            continue
+
+        pending[name] = len(batch)
+        batch.append((name, embed_data))
+        if len(batch) >= batch_size:
+            save_batch(batch)
+            report.imported += len(batch)
+            batch = []
+            pending = {}
+            if progress is not None:
+                await progress(report)
+    if batch:
+        save_batch(batch)
+        report.imported += len(batch)
+    report.close()
+    return report
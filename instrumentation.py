@@ -0,0 +1,254 @@
+import collections
+import contextvars
+import functools
+import heapq
+import os
+import sys
+import threading
+import time
+import traceback
+
+import discord
+
+from metrics import handler_calls, handler_duration, interactions_expired, registry
+
+first_response_latency = registry.histogram(
+    'bot_handler_first_response_seconds', 'Time from handler start to the first interaction response', ('handler',))
+
+# Most recent handler failures, for /status
+recent_errors = collections.deque(maxlen=50)
+
+_current_invocation = contextvars.ContextVar('current_invocation', default=None)
+
+
+def _mark_first_response(method):
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        extras = getattr(self._parent, 'extras', None)
+        if extras is not None and 'first_response_at' not in extras:
+            extras['first_response_at'] = time.perf_counter()
+        return await method(self, *args, **kwargs)
+    wrapper.__instrumented__ = True
+    return wrapper
+
+
+def _patch_interaction_response():
+    """Stamp the first acknowledgement time onto ``interaction.extras``."""
+    for name in ('send_message', 'send_modal', 'defer', 'edit_message'):
+        method = getattr(discord.InteractionResponse, name, None)
+        if method is not None and not getattr(method, '__instrumented__', False):
+            setattr(discord.InteractionResponse, name, _mark_first_response(method))
+
+
+_patch_interaction_response()
+
+
+def find_interaction(args):
+    # Duck-typed so handlers can be driven with stand-in interactions
+    for arg in args:
+        if hasattr(arg, 'response') and hasattr(arg, 'followup'):
+            return arg
+    return None
+
+
+def _context(name, interaction):
+    if interaction is None:
+        return {'handler': name}
+    return {
+        'handler': name,
+        'user_id': getattr(getattr(interaction, 'user', None), 'id', None),
+        'guild_id': getattr(interaction, 'guild_id', None),
+        'channel_id': getattr(interaction, 'channel_id', None),
+        'interaction_id': getattr(interaction, 'id', None),
+    }
+
+
+async def _send_error(interaction, message):
+    if interaction is None or not message:
+        return
+    try:
+        if not interaction.response.is_done():
+            await interaction.response.send_message(message, ephemeral=True)
+        else:
+            await interaction.followup.send(message, ephemeral=True)
+    except Exception:
+        pass
+
+
+def instrumented(name, error_message="❌ An error occurred."):
+    """Wrap a slash command, Modal.on_submit or View callback.
+
+    Records wall time, time to first response and the outcome, turns an
+    expired interaction (NotFound) into a counted log line, and logs any
+    other exception with its interaction context before telling the user
+    ``error_message``. Place it directly above the ``async def`` so
+    discord.py still sees the original signature.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            interaction = find_interaction(args)
+            # This call's own frame, so overlapping calls of one handler keep separate samples
+            invocation = profiler.begin(name, sys._getframe())
+            token = _current_invocation.set(invocation)
+            start = time.perf_counter()
+            outcome = 'ok'
+            try:
+                return await func(*args, **kwargs)
+            except discord.errors.NotFound:
+                outcome = 'expired'
+                interactions_expired.inc(name)
+                print(f"{name}: interaction expired")
+            except Exception as e:
+                outcome = 'error'
+                context = _context(name, interaction)
+                context.update(error=type(e).__name__, message=str(e), at=time.time())
+                recent_errors.append(context)
+                details = ' '.join(f"{key}={value}" for key, value in context.items() if key != 'at')
+                print(f"❌ Handler error {details}")
+                traceback.print_exc()
+                await _send_error(interaction, error_message)
+            finally:
+                end = time.perf_counter()
+                handler_duration.observe(end - start, name)
+                handler_calls.inc(name, outcome)
+                extras = getattr(interaction, 'extras', None) or {}
+                first_response = extras.get('first_response_at')
+                if first_response is not None and first_response >= start:
+                    first_response_latency.observe(first_response - start, name)
+                profiler.end(invocation, end - start)
+                _current_invocation.reset(token)
+        return wrapper
+    return decorator
+
+
+class SamplingProfiler:
+    """Low-overhead wall-clock sampler for handler invocations, toggled at runtime.
+
+    While enabled, a daemon thread samples the event loop thread's stack
+    every ``interval`` seconds and charges each sample to the invocation
+    whose frame is on that stack (work handed to a queue is tracked with
+    ``follow``). The ``keep`` slowest invocations are retained with their
+    aggregated stacks for ``dump()``.
+    """
+
+    def __init__(self, interval=0.005, keep=20, depth=12):
+        self.interval = interval
+        self.keep = keep
+        self.depth = depth
+        self.enabled = False
+        self._thread = None
+        self._stopped = None
+        self._loop_thread_id = None
+        self._active = {}
+        self._slowest = []
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        self._loop_thread_id = threading.get_ident()
+        # Each run gets its own event, so a quick restart cannot revive the old sampler
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._sample_loop, args=(self._stopped,),
+                                        name='handler-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.enabled = False
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join(timeout=1)
+        self._thread = None
+        self._stopped = None
+
+    def reset(self):
+        with self._lock:
+            self._slowest = []
+
+    def begin(self, name, frame):
+        if not self.enabled:
+            return None
+        invocation = {'handler': name, 'frames': {frame}, 'samples': collections.Counter(), 'started_at': time.time()}
+        with self._lock:
+            self._active[frame] = invocation
+        return invocation
+
+    def follow(self, func):
+        """Wrap ``func`` so its samples count for the current invocation wherever it runs.
+
+        For handler work submitted to a work queue: the worker task's stack
+        does not include the invocation's own frame.
+        """
+        invocation = _current_invocation.get()
+        if invocation is None:
+            return func
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            frame = sys._getframe()
+            with self._lock:
+                if 'frames' in invocation:
+                    invocation['frames'].add(frame)
+                    self._active[frame] = invocation
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._active.pop(frame, None)
+                    invocation.get('frames', set()).discard(frame)
+        return wrapper
+
+    def end(self, invocation, duration):
+        if invocation is None:
+            return
+        with self._lock:
+            for frame in invocation.pop('frames'):
+                self._active.pop(frame, None)
+            self._sequence += 1
+            entry = (duration, self._sequence, invocation)
+            if len(self._slowest) < self.keep:
+                heapq.heappush(self._slowest, entry)
+            elif duration > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def _sample_loop(self, stopped):
+        while not stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = []
+            target = None
+            with self._lock:
+                while frame is not None:
+                    if target is None:
+                        target = self._active.get(frame)
+                    if len(stack) < self.depth:
+                        code = frame.f_code
+                        stack.append(f"{os.path.basename(code.co_filename)}:{frame.f_lineno} {code.co_name}")
+                    frame = frame.f_back
+                if target is not None:
+                    target['samples'][tuple(stack)] += 1
+
+    def dump(self, limit=5, stacks=3):
+        """Slowest invocations first, each with its most frequent stacks."""
+        with self._lock:
+            slowest = sorted(self._slowest, reverse=True)[:limit]
+        report = []
+        for duration, _, invocation in slowest:
+            report.append({
+                'handler': invocation['handler'],
+                'duration_ms': round(duration * 1000, 1),
+                'started_at': invocation['started_at'],
+                'samples': sum(invocation['samples'].values()),
+                'top_stacks': [
+                    {'count': count, 'stack': list(stack)}
+                    for stack, count in invocation['samples'].most_common(stacks)
+                ],
+            })
+        return report
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,206 @@
+import asyncio
+import logging
+from bisect import bisect_left
+
+# Interaction handlers must acknowledge within Discord's 3 second deadline,
+# so the buckets are dense around it
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_text(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+
+    def inc(self, *label_values, amount=1):
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def samples(self):
+        for label_values, value in self._values.items():
+            yield self.name, _label_text(self.labels, label_values), value
+
+
+class Gauge(Counter):
+    """Gauge; pass ``collect`` to compute ``{label_values: value}`` at scrape time."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, labels=(), collect=None):
+        super().__init__(name, help_text, labels)
+        self.collect = collect
+
+    def set(self, value, *label_values):
+        self._values[label_values] = value
+
+    def samples(self):
+        values = self._values
+        if self.collect is not None:
+            try:
+                values = self.collect()
+            except Exception as e:
+                print(f"Metrics collect error for {self.name}: {e}")
+                values = {}
+        for label_values, value in values.items():
+            if value is not None:
+                yield self.name, _label_text(self.labels, label_values), value
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+
+    def observe(self, value, *label_values):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *label_values):
+        series = self._series.get(label_values)
+        return series[2] if series else 0
+
+    def samples(self):
+        for label_values, (bucket_counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", _label_text(self.labels, label_values, [('le', bound)]), cumulative
+            yield f"{self.name}_bucket", _label_text(self.labels, label_values, [('le', '+Inf')]), count
+            yield f"{self.name}_sum", _label_text(self.labels, label_values), total
+            yield f"{self.name}_count", _label_text(self.labels, label_values), count
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._register(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=(), collect=None):
+        return self._register(Gauge(name, help_text, labels, collect))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        """Prometheus text exposition format (0.0.4)."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+handler_calls = registry.counter(
+    'bot_handler_calls_total', 'Slash command and UI callback invocations', ('handler', 'outcome'))
+handler_duration = registry.histogram(
+    'bot_handler_duration_seconds', 'Wall time spent in slash commands and UI callbacks', ('handler',))
+interactions_expired = registry.counter(
+    'bot_interactions_expired_total', 'Interactions that expired (discord.errors.NotFound) before a response', ('handler',))
+store_flush_duration = registry.histogram(
+    'bot_store_flush_seconds', 'Time to persist a batch of data store changes', ('backend',))
+store_bytes_written = registry.counter(
+    'bot_store_bytes_written_total', 'Bytes written by the data store backend', ('backend',))
+store_load_duration = registry.gauge(
+    'bot_store_load_seconds', 'Time taken to load the data store at startup', ('backend',))
+partition_load_duration = registry.histogram(
+    'bot_partition_load_seconds', 'Time taken to load a guild partition on first use', ('backend',))
+rate_limit_hits = registry.counter(
+    'bot_rate_limit_hits_total', 'HTTP 429 responses reported by discord.py', ('scope',))
+startup_duration = registry.gauge(
+    'bot_startup_seconds', 'Time from process start (or in-process restart) to gateway ready')
+bot_restarts = registry.counter(
+    'bot_restarts_total', 'Bot restarts performed by the supervisor', ('reason',))
+work_queue_wait = registry.histogram(
+    'bot_work_queue_wait_seconds', 'Time deferred handler work waited for a worker', ('queue',))
+work_queue_rejected = registry.counter(
+    'bot_work_queue_rejected_total', 'Deferred handler work turned away because the queue was full', ('queue',))
+outbound_wait = registry.histogram(
+    'bot_outbound_wait_seconds', 'Time a channel send waited in the outbound queue', ('priority',))
+outbound_shed = registry.counter(
+    'bot_outbound_shed_total', 'Outbound messages dropped to keep higher-priority sends moving', ('priority',))
+
+class RateLimitLogHandler(logging.Handler):
+    """Counts the 429s discord.py logs, once each.
+
+    Every 429 logs "We are being rate limited. ..."; a global one follows
+    it straight away with "Global rate limit has been hit. ...". The route
+    line is held until the current callback finishes so the pair counts as
+    one ``global`` hit instead of a ``route`` and a ``global``.
+    """
+
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self._pending = False
+        self._global = False
+
+    def emit(self, record):
+        try:
+            message = record.getMessage()
+        except Exception:
+            return
+        if message.startswith('Global rate limit has been hit'):
+            if self._pending:
+                self._global = True
+            else:
+                rate_limit_hits.inc('global')
+        elif message.startswith('We are being rate limited'):
+            self._count_pending()
+            self._pending = True
+            try:
+                asyncio.get_running_loop().call_soon(self._count_pending)
+            except RuntimeError:
+                self._count_pending()
+
+    def _count_pending(self):
+        if self._pending:
+            rate_limit_hits.inc('global' if self._global else 'route')
+        self._pending = False
+        self._global = False
+
+
+def install_rate_limit_counter():
+    logger = logging.getLogger('discord.http')
+    if not any(isinstance(handler, RateLimitLogHandler) for handler in logger.handlers):
+        logger.addHandler(RateLimitLogHandler(level=logging.WARNING))
@@ -0,0 +1,231 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+
+import discord
+
+from broadcast import rate_limiter
+from metrics import outbound_shed, outbound_wait, registry
+
+# Send order when sends compete for rate-limit budget: messages a user is
+# waiting on first, then announcements, then log lines
+INTERACTIVE, ANNOUNCEMENT, LOG = 0, 1, 2
+PRIORITY_NAMES = ('interactive', 'announcement', 'log')
+
+OUTBOUND_WORKERS = int(os.getenv('OUTBOUND_WORKERS', '4'))
+# Log lines for the same channel within this window go out as one message
+LOG_BATCH_SECONDS = float(os.getenv('LOG_BATCH_SECONDS', '2'))
+# Per-channel log lines held while batching; the oldest are dropped beyond this
+LOG_MAX_LINES = int(os.getenv('LOG_MAX_LINES', '50'))
+# With this many interactive/announcement sends waiting, log batches are held back
+OUTBOUND_PRESSURE_DEPTH = int(os.getenv('OUTBOUND_PRESSURE_DEPTH', '20'))
+# How long shutdown waits for queued sends before dropping them
+OUTBOUND_DRAIN_SECONDS = float(os.getenv('OUTBOUND_DRAIN_SECONDS', '5'))
+MESSAGE_LIMIT = 2000
+
+
+class LogBuffer:
+    def __init__(self, channel):
+        self.channel = channel
+        self.lines = []
+        self.dropped = 0
+        self.timer = None
+
+
+class OutboundDispatcher:
+    """Every channel send the bot makes on its own, paced and sent in priority order.
+
+    Jobs wait in one heap ordered by (priority, arrival). A job whose
+    channel bucket is full is parked until the bucket reopens instead of
+    holding a worker, so one busy channel does not stall the others, and
+    a 429 closes the bucket for ``retry_after``. Interaction responses do
+    not pass through here: they are answered directly and never wait.
+
+    Log lines are buffered per channel and sent as one message per batch.
+    While higher-priority sends are backed up, batches are held back and
+    only the newest ``LOG_MAX_LINES`` per channel are kept.
+    """
+
+    def __init__(self, limiter=rate_limiter, workers=OUTBOUND_WORKERS, batch_seconds=LOG_BATCH_SECONDS,
+                 max_log_lines=LOG_MAX_LINES, pressure_depth=OUTBOUND_PRESSURE_DEPTH):
+        self.limiter = limiter
+        self.workers = workers
+        self.batch_seconds = batch_seconds
+        self.max_log_lines = max_log_lines
+        self.pressure_depth = pressure_depth
+        self.sent = [0, 0, 0]
+        self._heap = []
+        self._waiting = [0, 0, 0]
+        self._seq = itertools.count()
+        self._ready = None
+        self._parked = {}
+        self._logs = {}
+        self._tasks = []
+
+    def start(self):
+        """Start the workers on the running loop."""
+        if self._tasks:
+            return
+        self._ready = asyncio.Event()
+        if self._heap:
+            self._ready.set()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Send buffered logs, give queued sends a moment to drain, then drop the rest."""
+        for channel_id in list(self._logs):
+            self._flush_log(channel_id, force=True)
+        deadline = time.monotonic() + OUTBOUND_DRAIN_SECONDS
+        while sum(self._waiting) and self._tasks and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        jobs = self._heap + [job for _, job in self._parked.values()]
+        for handle, _ in self._parked.values():
+            handle.cancel()
+        self._heap, self._parked = [], {}
+        for job in jobs:
+            if not job[4].done():
+                job[4].set_exception(RuntimeError("outbound dispatcher stopped"))
+        self._waiting = [0, 0, 0]
+
+    def under_pressure(self):
+        return self._waiting[INTERACTIVE] + self._waiting[ANNOUNCEMENT] >= self.pressure_depth
+
+    def depth(self, priority=None):
+        return sum(self._waiting) if priority is None else self._waiting[priority]
+
+    # Sending
+
+    def submit(self, channel, priority, **kwargs):
+        """Queue ``channel.send(**kwargs)``; returns a future for the sent message."""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[priority] += 1
+        self._push((priority, next(self._seq), channel, kwargs, future, time.perf_counter()))
+        return future
+
+    async def send(self, channel, content=None, priority=INTERACTIVE, **kwargs):
+        return await self.submit(channel, priority, content=content, **kwargs)
+
+    async def announce(self, channel, content=None, **kwargs):
+        return await self.submit(channel, ANNOUNCEMENT, content=content, **kwargs)
+
+    def _push(self, job):
+        heapq.heappush(self._heap, job)
+        self._ready.set()
+
+    def _unpark(self, seq):
+        self._push(self._parked.pop(seq)[1])
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            while not self._heap:
+                self._ready.clear()
+                await self._ready.wait()
+            job = heapq.heappop(self._heap)
+            priority, _, channel, kwargs, future, queued_at = job
+            if future.cancelled():
+                self._waiting[priority] -= 1
+                continue
+            delay = self.limiter.channel_delay(channel.id)
+            if delay > 0:
+                # Keeps its place in line: the arrival number comes back with it
+                self._parked[job[1]] = (loop.call_later(delay, self._unpark, job[1]), job)
+                continue
+
+            self.limiter.take_channel(channel.id)
+            await self.limiter.acquire_global()
+            self._waiting[priority] -= 1
+            outbound_wait.observe(time.perf_counter() - queued_at, PRIORITY_NAMES[priority])
+            try:
+                message = await channel.send(**kwargs)
+            except discord.HTTPException as e:
+                if e.status == 429:
+                    self.limiter.block(channel.id, getattr(e, 'retry_after', None) or self.limiter.channel_window)
+                if not future.done():
+                    future.set_exception(e)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                self.sent[priority] += 1
+                if not future.done():
+                    future.set_result(message)
+
+    # Logs
+
+    def log(self, channel, line):
+        """Queue a log line for ``channel``; lines close together go out as one message."""
+        buffer = self._logs.get(channel.id)
+        if buffer is None:
+            buffer = self._logs[channel.id] = LogBuffer(channel)
+        buffer.lines.append(line)
+        if len(buffer.lines) > self.max_log_lines:
+            del buffer.lines[0]
+            buffer.dropped += 1
+            outbound_shed.inc(PRIORITY_NAMES[LOG])
+        if buffer.timer is None:
+            buffer.timer = asyncio.get_running_loop().call_later(self.batch_seconds, self._flush_log, channel.id)
+
+    def _flush_log(self, channel_id, force=False):
+        buffer = self._logs.get(channel_id)
+        if buffer is None:
+            return
+        if buffer.timer is not None:
+            buffer.timer.cancel()
+            buffer.timer = None
+        if self.under_pressure() and not force:
+            # Try again later; meanwhile the line cap sheds the oldest lines
+            buffer.timer = asyncio.get_running_loop().call_later(self.batch_seconds, self._flush_log, channel_id)
+            return
+        del self._logs[channel_id]
+
+        lines = buffer.lines
+        if buffer.dropped:
+            lines = [f"⚠️ {buffer.dropped} earlier log lines dropped while the bot was busy"] + lines
+        for content in batch_lines(lines):
+            future = self.submit(buffer.channel, LOG, content=content)
+            future.add_done_callback(_report_log_error)
+
+    def stats(self):
+        return {
+            'queued': {name: self._waiting[p] for p, name in enumerate(PRIORITY_NAMES)},
+            'sent': {name: self.sent[p] for p, name in enumerate(PRIORITY_NAMES)},
+            'parked': len(self._parked),
+            'buffered_log_lines': sum(len(buffer.lines) for buffer in self._logs.values()),
+            'shed_log_lines': outbound_shed.value(PRIORITY_NAMES[LOG]),
+            'under_pressure': self.under_pressure(),
+        }
+
+
+def batch_lines(lines, limit=MESSAGE_LIMIT):
+    """Join lines into as few messages as fit Discord's length limit."""
+    batch, length = [], 0
+    for line in lines:
+        line = line[:limit]
+        if batch and length + len(line) + 1 > limit:
+            yield "\n".join(batch)
+            batch, length = [], 0
+        batch.append(line)
+        length += len(line) + 1
+    if batch:
+        yield "\n".join(batch)
+
+
+def _report_log_error(future):
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Log channel send error: {future.exception()}")
+
+
+outbound = OutboundDispatcher()
+
+registry.gauge(
+    'bot_outbound_queued', 'Outbound channel sends waiting to go out', ('priority',),
+    collect=lambda: {(name,): outbound.depth(p) for p, name in enumerate(PRIORITY_NAMES)}
+)
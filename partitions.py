@@ -0,0 +1,275 @@
+import asyncio
+import contextlib
+import os
+import time
+
+from automod import AutomodFilter
+from data_store import DataStore
+from metrics import partition_load_duration
+from embed_cache import EmbedCache
+from embed_index import EmbedNameIndex
+from ria import ApplicationQueue
+from storage import BACKEND, PERSISTENCE_MODE, JsonBackend, SqliteBackend
+from tickets import TicketManager
+
+# One file per guild (<guild_id>.json or <guild_id>.db) under this directory
+GUILD_DATA_DIR = os.getenv('GUILD_DATA_DIR', 'guild_data')
+# A guild's partition is flushed and dropped from memory after this long without use
+PARTITION_IDLE_SECONDS = float(os.getenv('PARTITION_IDLE_SECONDS', '900'))
+PARTITION_SWEEP_SECONDS = float(os.getenv('PARTITION_SWEEP_SECONDS', '60'))
+GUILD_EMBED_CACHE_SIZE = int(os.getenv('GUILD_EMBED_CACHE_SIZE', '64'))
+# Set LEGACY_GUILD_ID to move data from before partitioning (bot_data.json) into
+# that guild the first time its partition is created
+LEGACY_GUILD_ID = os.getenv('LEGACY_GUILD_ID')
+
+# Sections owned by a guild; anything else (command sync hashes, the
+# announcement schedule) stays in the global store
+GUILD_SECTIONS = (
+    'stored_embeds', 'embed_counter', 'embed_drafts', 'verified_users', 'channel_groups',
+    'automod_words', 'automod_enabled',
+    'active_tickets', 'ticket_counter', 'ticket_settings',
+    'ria_applications', 'ria_application_counter',
+)
+
+
+class GuildPartition:
+    """One guild's data store plus the in-memory indexes built over it."""
+
+    def __init__(self, guild_id, store, cache_size=GUILD_EMBED_CACHE_SIZE):
+        self.guild_id = guild_id
+        self.store = store
+        self.embed_index = EmbedNameIndex()
+        self.embed_cache = EmbedCache(max_size=cache_size)
+        self.automod = AutomodFilter()
+        self.tickets = TicketManager(store)
+        self.applications = ApplicationQueue(store)
+        self.last_used = time.monotonic()
+        self.leases = 0
+
+    def build(self, channel_exists=None):
+        """Rebuild the indexes from the (loaded) store."""
+        self.embed_index.build(self.store.section('stored_embeds'))
+        self.tickets.load(channel_exists)
+        self.applications.load()
+
+    def is_verified(self, user_id):
+        return self.store.contains('verified_users', user_id)
+
+    def busy(self):
+        """Held by a lease or inside ``store.bulk()``; such partitions are not evicted."""
+        return self.leases > 0 or self.store.in_bulk
+
+
+class PartitionManager:
+    """Per-guild partitions, opened on first use and evicted when idle.
+
+    Each guild has its own backend file, so a write only serializes that
+    guild's data and memory holds only guilds that were active recently.
+    Interactions outside a guild (DMs) use the global store, which is never
+    evicted.
+    """
+
+    def __init__(self, global_store, directory=GUILD_DATA_DIR, kind=BACKEND, mode=PERSISTENCE_MODE,
+                 idle_seconds=PARTITION_IDLE_SECONDS, sweep_seconds=PARTITION_SWEEP_SECONDS,
+                 legacy_guild_id=LEGACY_GUILD_ID, channel_exists=None):
+        if kind not in ('json', 'sqlite'):
+            raise ValueError(f"Unknown DATA_BACKEND: {kind}")
+        self.global_store = global_store
+        self.directory = directory
+        self.kind = kind
+        self.mode = mode
+        self.idle_seconds = idle_seconds
+        self.sweep_seconds = sweep_seconds
+        self.legacy_guild_id = int(legacy_guild_id) if legacy_guild_id else None
+        # (guild_id, channel_id) -> bool; drops tickets whose channel is gone when a guild loads
+        self.channel_exists = channel_exists
+        self.opened = 0
+        self.evicted = 0
+        self._global = None
+        self._partitions = {}
+        self._opening = {}
+        self._closing = {}
+        self._sweep_task = None
+
+    def path_for(self, guild_id):
+        suffix = 'db' if self.kind == 'sqlite' else 'json'
+        return os.path.join(self.directory, f"{guild_id}.{suffix}")
+
+    def make_backend(self, guild_id):
+        path = self.path_for(guild_id)
+        os.makedirs(self.directory, exist_ok=True)
+        if self.kind == 'sqlite':
+            return SqliteBackend(path)
+        return JsonBackend(path, mode=self.mode)
+
+    def has_data(self, guild_id):
+        """True if the guild is loaded or has a data file; others would only see the defaults."""
+        return (guild_id in self._partitions or guild_id in self._opening
+                or guild_id == self.legacy_guild_id or os.path.exists(self.path_for(guild_id)))
+
+    def __len__(self):
+        return len(self._partitions)
+
+    def loaded(self):
+        """Partitions currently in memory, the global one included."""
+        partitions = list(self._partitions.values())
+        if self._global is not None:
+            partitions.append(self._global)
+        return partitions
+
+    async def get(self, guild_id):
+        """The partition for ``guild_id`` (the global one for None), loading it if needed."""
+        if guild_id is None:
+            return self.global_partition()
+        partition = self._partitions.get(guild_id)
+        if partition is None:
+            task = self._opening.get(guild_id)
+            if task is None:
+                task = self._opening[guild_id] = asyncio.create_task(self._open(guild_id))
+                task.add_done_callback(lambda _: self._opening.pop(guild_id, None))
+            partition = await asyncio.shield(task)
+        partition.last_used = time.monotonic()
+        return partition
+
+    @contextlib.asynccontextmanager
+    async def lease(self, guild_id):
+        """The partition for ``guild_id``, kept loaded until the block exits.
+
+        For work that can outlast ``idle_seconds`` (imports, exports,
+        broadcasts); short handlers are covered by ``last_used``.
+        """
+        partition = await self.get(guild_id)
+        partition.leases += 1
+        try:
+            yield partition
+        finally:
+            partition.leases -= 1
+            partition.last_used = time.monotonic()
+
+    def global_partition(self):
+        if self._global is None:
+            self.global_store.load()
+            self._global = GuildPartition(None, self.global_store)
+            self._global.build()
+        return self._global
+
+    async def _open(self, guild_id):
+        closing = self._closing.get(guild_id)
+        if closing is not None:
+            # Let an eviction finish writing before the file is read back
+            await asyncio.shield(closing)
+
+        # Guild loads happen all day; keep bot_store_load_seconds for the startup load
+        store = DataStore(record_load=partition_load_duration.observe,
+                          make_backend=lambda: self.make_backend(guild_id))
+        fresh = not os.path.exists(self.path_for(guild_id))
+        if fresh:
+            # No file until the guild's first change
+            await store.open_new()
+        else:
+            await store.open()
+        if fresh and guild_id == self.legacy_guild_id:
+            self._adopt_legacy(guild_id, store)
+
+        partition = GuildPartition(guild_id, store)
+        partition.build(self.channel_exists)
+        self._partitions[guild_id] = partition
+        self.opened += 1
+        return partition
+
+    def _adopt_legacy(self, guild_id, store):
+        """Move the guild sections of the old single-document store into ``store``."""
+        legacy = self.global_store.data
+        moved = [section for section in GUILD_SECTIONS if legacy.get(section) not in (None, {}, [])]
+        for section in moved:
+            store.set(section, legacy[section])
+            if isinstance(legacy[section], (dict, list)):
+                self.global_store.set(section, type(legacy[section])())
+        if moved:
+            print(f"📦 Moved legacy data ({', '.join(moved)}) into guild {guild_id}")
+
+    async def start(self):
+        """Start the idle sweeper on the running loop."""
+        self.global_partition()
+        self.warn_unclaimed_legacy()
+        if self._sweep_task is None:
+            self._sweep_task = asyncio.create_task(self._sweep_loop())
+
+    def warn_unclaimed_legacy(self):
+        """Shout if data from before partitioning is still global and no guild will adopt it.
+
+        Guild handlers never read those sections from the global store, so
+        without LEGACY_GUILD_ID they vanish from every guild.
+        """
+        if self.legacy_guild_id is not None:
+            return
+        legacy = self.global_store.data
+        stranded = {section: len(legacy[section]) for section in GUILD_SECTIONS
+                    if isinstance(legacy.get(section), (dict, list)) and legacy[section]}
+        if stranded:
+            counts = ', '.join(f"{section}: {count}" for section, count in stranded.items())
+            print(f"⚠️ LEGACY DATA NOT MIGRATED: data from before per-guild storage is not visible "
+                  f"in any guild ({counts}). Set LEGACY_GUILD_ID to the guild it belongs to and "
+                  f"restart to move it there.")
+        return stranded
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_seconds)
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                print(f"❌ Failed to evict idle guild data: {e}")
+
+    async def evict_idle(self, now=None):
+        """Flush and drop partitions unused for ``idle_seconds``. Returns how many were evicted."""
+        now = time.monotonic() if now is None else now
+        idle = [(guild_id, partition, partition.last_used) for guild_id, partition in self._partitions.items()
+                if now - partition.last_used >= self.idle_seconds]
+        evicted = 0
+        for guild_id, partition, last_used in idle:
+            if partition.last_used != last_used:
+                continue  # used again while earlier partitions were being flushed
+            evicted += await self.evict(guild_id)
+        return evicted
+
+    async def evict(self, guild_id, force=False):
+        """Flush and drop a partition; a busy one is kept unless ``force``."""
+        partition = self._partitions.get(guild_id)
+        if partition is None or (partition.busy() and not force):
+            return False
+        del self._partitions[guild_id]
+        task = self._closing[guild_id] = asyncio.create_task(partition.store.close())
+        try:
+            await asyncio.shield(task)
+        finally:
+            if self._closing.get(guild_id) is task:
+                del self._closing[guild_id]
+        self.evicted += 1
+        return True
+
+    async def close(self):
+        """Stop the sweeper and flush every open partition."""
+        if self._sweep_task is not None:
+            self._sweep_task.cancel()
+            try:
+                await self._sweep_task
+            except asyncio.CancelledError:
+                pass
+            self._sweep_task = None
+        for guild_id in list(self._partitions):
+            try:
+                await self.evict(guild_id, force=True)
+            except Exception as e:
+                print(f"❌ Failed to flush data for guild {guild_id}: {e}")
+        self._global = None
+
+    def stats(self):
+        return {
+            'backend': self.kind,
+            'directory': self.directory,
+            'loaded': len(self._partitions),
+            'opened': self.opened,
+            'evicted': self.evicted,
+            'idle_seconds': self.idle_seconds,
+        }
@@ -0,0 +1,187 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+from bisect import bisect_left, insort
+from datetime import datetime
+
+STATUSES = ('pending', 'approved', 'denied')
+ANSWER_FIELDS = ('username', 'age', 'experience', 'motivation', 'availability')
+EXPORT_FIELDS = ('app_id', 'user_id') + ANSWER_FIELDS + ('status', 'submitted_at', 'reviewed_by', 'reviewed_at', 'review_notes')
+EXPORT_CHUNK_ROWS = 2000
+# Exports larger than this are gzipped so they still fit in an attachment
+EXPORT_COMPRESS_BYTES = int(os.getenv('RIA_EXPORT_COMPRESS_BYTES', str(8 * 1024 * 1024)))
+
+
+def _number(app_id):
+    try:
+        return int(app_id.rsplit('_', 1)[1])
+    except (IndexError, ValueError):
+        return 0
+
+
+class ApplicationQueue:
+    """RIA applications in ``ria_applications`` with status and user indexes.
+
+    ``_by_status`` keeps each status's entries sorted by
+    ``(submitted_at, number)``, so the next pending application is the head
+    of a list and a listing page is a slice. ``_by_user`` maps a user to
+    their (few) application ids.
+    """
+
+    def __init__(self, store, section='ria_applications'):
+        self.store = store
+        self.section = section
+        self._by_status = {}
+        self._by_user = {}
+
+    @property
+    def applications(self):
+        return self.store.section(self.section)
+
+    def load(self):
+        """Rebuild the indexes from persisted applications."""
+        self._by_status = {}
+        self._by_user = {}
+        for app_id, app in self.applications.items():
+            self._by_status.setdefault(app.get('status') or 'pending', []).append(self._entry(app_id, app))
+            self._by_user.setdefault(app.get('user_id'), []).append(app_id)
+        for entries in self._by_status.values():
+            entries.sort()
+        return len(self.applications)
+
+    def _entry(self, app_id, app):
+        return (app.get('submitted_at') or '', _number(app_id), app_id)
+
+    def _index_status(self, app_id, app):
+        insort(self._by_status.setdefault(app.get('status') or 'pending', []), self._entry(app_id, app))
+
+    def _unindex_status(self, app_id, app):
+        entries = self._by_status.get(app.get('status') or 'pending', [])
+        entry = self._entry(app_id, app)
+        index = bisect_left(entries, entry)
+        if index < len(entries) and entries[index] == entry:
+            del entries[index]
+
+    def count(self, status=None):
+        if status is None:
+            return len(self.applications)
+        return len(self._by_status.get(status, ()))
+
+    def pending_for(self, user_id):
+        """The user's pending application as ``(app_id, app)``, or None."""
+        for app_id in self._by_user.get(user_id, ()):
+            app = self.applications.get(app_id)
+            if app is not None and app.get('status') == 'pending':
+                return app_id, app
+        return None
+
+    def next_pending(self):
+        """Oldest pending application as ``(app_id, app)``, or None."""
+        entries = self._by_status.get('pending')
+        if not entries:
+            return None
+        app_id = entries[0][2]
+        return app_id, self.applications[app_id]
+
+    def submit(self, user_id, answers):
+        """File an application unless the user has one pending. Returns ``((app_id, app), created)``."""
+        existing = self.pending_for(user_id)
+        if existing:
+            return existing, False
+
+        app_id = f"ria_app_{self.store.increment('ria_application_counter')}"
+        app = {'user_id': user_id}
+        app.update({field: answers.get(field) for field in ANSWER_FIELDS})
+        app.update({
+            'status': 'pending',
+            'submitted_at': datetime.now().isoformat(),
+            'reviewed_by': None,
+            'review_notes': None
+        })
+        self.store.put(self.section, app_id, app)
+        self._index_status(app_id, app)
+        self._by_user.setdefault(user_id, []).append(app_id)
+        return (app_id, app), True
+
+    def review(self, app_id, status, reviewer_id, notes=None):
+        """Approve or deny a pending application; returns the updated record or None."""
+        if status not in STATUSES or status == 'pending':
+            raise ValueError(f"Unknown review status: {status}")
+        app = self.applications.get(app_id)
+        if app is None or app.get('status') != 'pending':
+            return None
+
+        self._unindex_status(app_id, app)
+        reviewed = dict(app, status=status, reviewed_by=reviewer_id, reviewed_at=datetime.now().isoformat(), review_notes=notes)
+        self.store.put(self.section, app_id, reviewed)
+        self._index_status(app_id, reviewed)
+        return reviewed
+
+    def page(self, status, page, per_page=10):
+        """One listing page as ``[(app_id, app)]``, newest first."""
+        entries = self._by_status.get(status, [])
+        end = len(entries) - page * per_page
+        start = max(0, end - per_page)
+        return [(entry[2], self.applications[entry[2]]) for entry in reversed(entries[start:max(0, end)])]
+
+    def page_count(self, status, per_page=10):
+        return max(1, -(-self.count(status) // per_page))
+
+    async def export(self, fmt='csv', status=None, chunk_rows=EXPORT_CHUNK_ROWS):
+        """Write applications to a temp file in chunks; returns its path. The caller deletes it.
+
+        Rows are rendered on the event loop a chunk at a time and written
+        from a worker thread, so memory stays at one chunk and other
+        handlers run between chunks.
+        """
+        if fmt not in ('csv', 'jsonl'):
+            raise ValueError(f"Unknown export format: {fmt}")
+        if status is None:
+            app_ids = sorted(self.applications, key=_number)
+        else:
+            app_ids = [entry[2] for entry in self._by_status.get(status, ())]
+
+        handle, path = tempfile.mkstemp(prefix='ria_export_', suffix=f'.{fmt}')
+        try:
+            with os.fdopen(handle, 'w', newline='', encoding='utf-8') as f:
+                if fmt == 'csv':
+                    await asyncio.to_thread(f.write, ','.join(EXPORT_FIELDS) + '\r\n')
+                for start in range(0, len(app_ids), chunk_rows):
+                    chunk = self._render_chunk(app_ids[start:start + chunk_rows], fmt)
+                    await asyncio.to_thread(f.write, chunk)
+
+            if os.path.getsize(path) > EXPORT_COMPRESS_BYTES:
+                path = await asyncio.to_thread(_gzip_file, path)
+        except BaseException:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        return path
+
+    def _render_chunk(self, app_ids, fmt):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if fmt == 'csv' else None
+        for app_id in app_ids:
+            app = self.applications.get(app_id)
+            if app is None:
+                continue  # deleted while exporting
+            row = dict(app, app_id=app_id)
+            if writer is not None:
+                writer.writerow(['' if row.get(field) is None else row.get(field) for field in EXPORT_FIELDS])
+            else:
+                buffer.write(json.dumps(row, ensure_ascii=False))
+                buffer.write('\n')
+        return buffer.getvalue()
+
+
+def _gzip_file(path):
+    compressed = f"{path}.gz"
+    with open(path, 'rb') as source, gzip.open(compressed, 'wb', compresslevel=6) as target:
+        shutil.copyfileobj(source, target)
+    os.remove(path)
+    return compressed
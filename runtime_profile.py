@@ -0,0 +1,113 @@
+import os
+import sys
+import time
+
+import discord
+
+# lean: no member intent, no member cache, no chunking, no message cache.
+#       Commands only ever need interaction.user, which arrives with the payload.
+# standard: member intent on, members cached as they are seen, no chunking.
+# full: discord.py defaults, chunks every member of every guild at startup.
+PROFILES = {
+    'lean': {'members': False, 'chunk_guilds_at_startup': False, 'max_messages': None},
+    'standard': {'members': True, 'chunk_guilds_at_startup': False, 'max_messages': 1000},
+    'full': {'members': True, 'chunk_guilds_at_startup': True, 'max_messages': 1000},
+}
+MEMORY_PROFILE = os.getenv('MEMORY_PROFILE', 'lean')
+
+_IMPORTED_AT = time.time()
+
+
+def _env_flag(name):
+    value = os.getenv(name)
+    if value is None:
+        return None
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+def client_options(profile=MEMORY_PROFILE):
+    """Intents and cache settings for the bot constructor.
+
+    INTENT_MEMBERS, CHUNK_GUILDS_AT_STARTUP and MAX_MESSAGES override single
+    settings of the chosen profile.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown MEMORY_PROFILE `{profile}`; choose from {', '.join(PROFILES)}")
+    settings = dict(PROFILES[profile])
+
+    members = _env_flag('INTENT_MEMBERS')
+    if members is not None:
+        settings['members'] = members
+    chunk = _env_flag('CHUNK_GUILDS_AT_STARTUP')
+    if chunk is not None:
+        settings['chunk_guilds_at_startup'] = chunk
+    max_messages = os.getenv('MAX_MESSAGES')
+    if max_messages is not None:
+        settings['max_messages'] = int(max_messages) or None
+
+    intents = discord.Intents.default()
+    intents.message_content = True  # automod reads message text
+    intents.guilds = True
+    intents.members = settings['members']
+
+    if settings['members']:
+        member_cache_flags = discord.MemberCacheFlags.from_intents(intents)
+    else:
+        member_cache_flags = discord.MemberCacheFlags.none()
+
+    return {
+        'intents': intents,
+        'member_cache_flags': member_cache_flags,
+        # Chunking needs the members intent
+        'chunk_guilds_at_startup': settings['chunk_guilds_at_startup'] and settings['members'],
+        'max_messages': settings['max_messages'],
+    }
+
+
+def resident_memory_bytes():
+    """Current RSS from /proc, falling back to peak RSS where /proc is unavailable."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS, kilobytes elsewhere
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def process_started_at():
+    """Wall-clock time this process started, from /proc; falls back to import time."""
+    try:
+        with open('/proc/self/stat') as f:
+            # Fields after the command name; starttime is field 22 of the full line
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        age = uptime - int(fields[19]) / os.sysconf('SC_CLK_TCK')
+        return time.time() - age
+    except (OSError, ValueError, IndexError, AttributeError):
+        return _IMPORTED_AT
+
+
+def memory_report(bot):
+    """RSS plus the sizes of discord.py's main caches."""
+    guilds = bot.guilds
+    return {
+        'profile': MEMORY_PROFILE,
+        'rss_bytes': resident_memory_bytes(),
+        'guilds': len(guilds),
+        'members_cached': sum(len(guild.members) for guild in guilds),
+        'users_cached': len(bot.users),
+        'channels_cached': sum(len(guild.channels) for guild in guilds),
+        'roles_cached': sum(len(guild.roles) for guild in guilds),
+        'emojis_cached': len(bot.emojis),
+        'messages_cached': len(bot.cached_messages),
+        'views_tracked': len(bot.persistent_views),
+    }
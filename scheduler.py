@@ -0,0 +1,220 @@
+import asyncio
+import heapq
+import re
+import time
+from datetime import datetime, timedelta, timezone
+
+# Due jobs are run together in batches of at most this many
+BATCH_SIZE = 50
+
+INTERVAL_PATTERN = re.compile(r'^\s*(\d+)\s*([smhdw])\s*$', re.IGNORECASE)
+INTERVAL_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+CRON_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+
+def parse_interval(text):
+    """'30m' / '2h' / '1d' -> seconds."""
+    match = INTERVAL_PATTERN.match(text or '')
+    if not match:
+        raise ValueError(f"Invalid interval `{text}`; use e.g. 30m, 2h, 1d")
+    seconds = int(match.group(1)) * INTERVAL_UNITS[match.group(2).lower()]
+    if seconds < 60:
+        raise ValueError("Interval must be at least 1 minute")
+    return seconds
+
+
+def parse_time(text):
+    """'YYYY-MM-DD HH:MM' (UTC) -> epoch seconds."""
+    try:
+        when = datetime.strptime(text.strip(), '%Y-%m-%d %H:%M')
+    except ValueError:
+        raise ValueError(f"Invalid time `{text}`; use YYYY-MM-DD HH:MM (UTC)")
+    return when.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _parse_cron_field(field, low, high):
+    values = set()
+    for part in field.split(','):
+        step = 1
+        if '/' in part:
+            part, step_text = part.split('/', 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError("Cron step must be positive")
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start_text, end_text = part.split('-', 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if start < low or end > high or start > end:
+            raise ValueError(f"Cron value out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """Five-field cron expression (minute hour day month weekday), evaluated in UTC."""
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError("Cron needs 5 fields: minute hour day month weekday")
+        try:
+            parsed = [_parse_cron_field(f, low, high) for f, (low, high) in zip(fields, CRON_RANGES)]
+        except ValueError as e:
+            raise ValueError(f"Invalid cron `{expression}`: {e}")
+        self.expression = expression
+        self.minutes = sorted(parsed[0])
+        self.hours = sorted(parsed[1])
+        self.days, self.months, self.weekdays = parsed[2], parsed[3], parsed[4]
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    def _day_matches(self, day):
+        if day.month not in self.months:
+            return False
+        # Cron weekday: 0 = Sunday; Python: 0 = Monday
+        weekday = (day.weekday() + 1) % 7
+        if self.any_day or self.any_weekday:
+            return day.day in self.days and weekday in self.weekdays
+        return day.day in self.days or weekday in self.weekdays
+
+    def next_after(self, timestamp):
+        """First matching minute strictly after ``timestamp`` (epoch seconds)."""
+        start = datetime.fromtimestamp(timestamp, timezone.utc).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.replace(hour=0, minute=0)
+        # Walk days, then only the matching hours/minutes within a day
+        for _ in range(366 * 5):
+            if self._day_matches(day):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        candidate = day.replace(hour=hour, minute=minute)
+                        if candidate >= start:
+                            return candidate.timestamp()
+            day += timedelta(days=1)
+        raise ValueError(f"Cron `{self.expression}` never fires")
+
+
+def next_run_after(job, timestamp):
+    """Next run time for a recurring job, or None for a one-shot."""
+    if job.get('cron'):
+        return CronSchedule(job['cron']).next_after(timestamp)
+    if job.get('interval'):
+        interval = job['interval']
+        # Stay on the original cadence and skip runs missed while offline
+        missed = max(0, int((timestamp - job['next_run']) // interval))
+        return job['next_run'] + (missed + 1) * interval
+    return None
+
+
+class AnnouncementScheduler:
+    """Runs ``scheduled_announcements`` from a single task over a min-heap.
+
+    Heap entries are ``(next_run, job_id)``; cancelled or rescheduled jobs
+    leave stale entries behind that are skipped when popped, so add/cancel
+    stay O(log n) and the loop only ever sleeps until the earliest job.
+    """
+
+    def __init__(self, store, runner, section='scheduled_announcements', batch_size=BATCH_SIZE, owns_guild=None):
+        self.store = store
+        self.runner = runner
+        self.section = section
+        self.batch_size = batch_size
+        # Optional guild id predicate; jobs it rejects belong to another
+        # process's shards and are left for that process to run
+        self.owns_guild = owns_guild
+        self._heap = []
+        self._wake = None
+        self._task = None
+
+    @property
+    def jobs(self):
+        return self.store.section(self.section)
+
+    def load(self):
+        """Rebuild the heap from persisted jobs (used on startup)."""
+        self._heap = [
+            (job['next_run'], job_id) for job_id, job in self.jobs.items()
+            if job.get('next_run') is not None and (self.owns_guild is None or self.owns_guild(job.get('guild_id')))
+        ]
+        heapq.heapify(self._heap)
+        return len(self._heap)
+
+    def start(self):
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def add(self, job):
+        """Persist and schedule a job dict; returns its id."""
+        job_id = f"announcement_{self.store.increment('announcement_counter')}"
+        self.store.put(self.section, job_id, job)
+        self._push(job_id, job['next_run'])
+        return job_id
+
+    def cancel(self, job_id):
+        # The heap entry becomes stale and is dropped when it surfaces
+        return self.store.remove(self.section, job_id)
+
+    def _push(self, job_id, next_run):
+        earliest = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (next_run, job_id))
+        if self._wake is not None and (earliest is None or next_run < earliest):
+            self._wake.set()
+
+    def _pop_due(self, now):
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+            next_run, job_id = heapq.heappop(self._heap)
+            job = self.jobs.get(job_id)
+            if job is None or job.get('next_run') != next_run:
+                continue
+            due.append((job_id, job))
+        return due
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            now = time.time()
+            due = self._pop_due(now)
+            if due:
+                await self._run_batch(due, now)
+                continue
+
+            timeout = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run_batch(self, due, now):
+        results = await asyncio.gather(*(self.runner(job_id, job) for job_id, job in due), return_exceptions=True)
+        for (job_id, job), result in zip(due, results):
+            if isinstance(result, Exception):
+                print(f"❌ Scheduled announcement {job_id} failed: {result}")
+            if job_id not in self.jobs:
+                continue  # cancelled while running
+            try:
+                next_run = next_run_after(job, now)
+            except ValueError as e:
+                print(f"❌ Dropping scheduled announcement {job_id}: {e}")
+                next_run = None
+            if next_run is None:
+                self.store.remove(self.section, job_id)
+            else:
+                updated = dict(job, next_run=next_run, last_run=now)
+                self.store.put(self.section, job_id, updated)
+                self._push(job_id, next_run)
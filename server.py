@@ -1,52 +1,121 @@
-
-import http.server
-import socketserver
-import socket
+import asyncio
+import hmac
+import json
 import os
+import time
+
+from aiohttp import web
+
+# Bearer token that unlocks per-error detail (user/guild ids, messages) on
+# /status; without it the endpoint only reports counts
+STATUS_TOKEN = os.getenv('STATUS_TOKEN')
 
-def find_free_port(start_port=5000):
-    """Find a free port starting from the specified port"""
-    for port in range(start_port, start_port + 100):
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.bind(('0.0.0.0', port))
-                return port
-        except OSError:
-            continue
-    raise RuntimeError(f"No free ports available in range {start_port}-{start_port + 99}")
 
 def get_port():
-    """Get port from environment variable or find a free one"""
-    # Try to get port from environment variable (for deployment platforms)
+    """Port from the PORT environment variable (deployment platforms), default 5000."""
     port = os.environ.get('PORT')
     if port:
         try:
             return int(port)
         except ValueError:
             print(f"Invalid PORT environment variable: {port}")
-    
-    # Try common web development ports
-    preferred_ports = [5000, 3000, 8000, 8080, 4200]
-    for preferred_port in preferred_ports:
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.bind(('0.0.0.0', preferred_port))
-                return preferred_port
-        except OSError:
-            continue
-    
-    # Fall back to finding any free port
-    return find_free_port(5000)
+    return 5000
+
+
+class StatusServer:
+    """Concurrent HTTP status service: liveness, readiness, a JSON snapshot and metrics.
+
+    Only the routes below are served. ``ready_check`` and ``status_provider``
+    read in-memory state, so requests never touch the filesystem. The server
+    runs on whatever event loop starts it, including the bot's own.
+
+    ``status_provider(detailed)`` gets ``detailed=True`` only for requests
+    carrying ``Authorization: Bearer <token>``.
+    """
+
+    def __init__(self, port=None, host='0.0.0.0', ready_check=None, status_provider=None, metrics_provider=None,
+                 token=STATUS_TOKEN):
+        self.host = host
+        self.port = port or get_port()
+        self.ready_check = ready_check or (lambda: False)
+        self.status_provider = status_provider or (lambda detailed: {})
+        self.token = token
+        self.metrics_provider = metrics_provider
+        self.started_at = time.time()
+        self._runner = None
+
+        self.app = web.Application()
+        self.app.router.add_get('/', self.handle_index)
+        self.app.router.add_get('/healthz', self.handle_liveness)
+        self.app.router.add_get('/readyz', self.handle_readiness)
+        self.app.router.add_get('/status', self.handle_status)
+        self.app.router.add_get('/metrics', self.handle_metrics)
+
+    async def handle_index(self, request):
+        return web.json_response({'endpoints': ['/healthz', '/readyz', '/status', '/metrics']})
+
+    async def handle_liveness(self, request):
+        return web.json_response({'status': 'ok', 'uptime_seconds': round(time.time() - self.started_at, 1)})
+
+    async def handle_readiness(self, request):
+        ready = bool(self.ready_check())
+        return web.json_response({'ready': ready}, status=200 if ready else 503)
+
+    async def handle_status(self, request):
+        snapshot = {'uptime_seconds': round(time.time() - self.started_at, 1)}
+        snapshot.update(self.status_provider(self.authorized(request)))
+        return web.json_response(snapshot, dumps=lambda data: json.dumps(data, default=str))
+
+    def authorized(self, request):
+        if not self.token:
+            return False
+        supplied = request.headers.get('Authorization', '')
+        return hmac.compare_digest(supplied.encode(), f"Bearer {self.token}".encode())
+
+    async def handle_metrics(self, request):
+        if self.metrics_provider is None:
+            raise web.HTTPNotFound()
+        return web.Response(text=self.metrics_provider(), content_type='text/plain', charset='utf-8',
+                            headers={'X-Content-Type-Options': 'nosniff'})
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        print(f"🌐 Status server listening on http://{self.host}:{self.port}")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def serve_forever(server):
+    await server.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main():
+    """Run the supervised bot with the status service on PORT.
+
+    Without a bot token only the status service runs (liveness up, readiness 503).
+    """
+    port = get_port()
+    if os.getenv('DISCORD_BOT_TOKEN'):
+        import app
+        app.main(status_port=port)
+        return
+
+    print("❌ DISCORD_BOT_TOKEN not found; serving status endpoints only")
+    try:
+        asyncio.run(serve_forever(StatusServer(port)))
+    except KeyboardInterrupt:
+        print("\nServer stopped")
+
 
 if __name__ == "__main__":
-    PORT = get_port()
-    Handler = http.server.SimpleHTTPRequestHandler
-    
-    with socketserver.TCPServer(("0.0.0.0", PORT), Handler) as httpd:
-        print(f"Server started at http://0.0.0.0:{PORT}")
-        print(f"Serving files from current directory")
-        print(f"Available externally on all interfaces")
-        try:
-            httpd.serve_forever()
-        except KeyboardInterrupt:
-            print("\nServer stopped")
+    main()
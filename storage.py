@@ -0,0 +1,440 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+DATA_FILE = 'bot_data.json'
+DB_FILE = os.getenv('DATA_DB_PATH', 'bot_data.db')
+
+# "json" keeps bot_data.json (+ journal); "sqlite" uses an indexed database.
+BACKEND = os.getenv('DATA_BACKEND', 'json')
+
+# "journal" appends operation records and compacts periodically;
+# "snapshot" rewrites the whole document on every flush.
+PERSISTENCE_MODE = os.getenv('DATA_PERSISTENCE', 'journal')
+
+# Compact the journal into a fresh snapshot once it grows past this size.
+JOURNAL_COMPACT_BYTES = int(os.getenv('DATA_JOURNAL_COMPACT_BYTES', str(1024 * 1024)))
+
+# Snapshot key recording which journal generation the snapshot supersedes
+GENERATION_KEY = '_journal_generation'
+
+
+def dumps(value):
+    return json.dumps(value, separators=(',', ':'))
+
+
+def apply_op(data, op):
+    """Apply one op record to ``data``. Every op is idempotent."""
+    kind = op['op']
+    if kind == 'set':
+        data[op['k']] = op['v']
+    elif kind == 'put':
+        data.setdefault(op['s'], {})[op['k']] = op['v']
+    elif kind == 'del':
+        data.get(op['s'], {}).pop(op['k'], None)
+    elif kind == 'add':
+        items = data.setdefault(op['s'], [])
+        if op['v'] not in items:
+            items.append(op['v'])
+    else:
+        raise ValueError(f"Unknown journal op: {kind}")
+
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_atomic(path, payload):
+    """Replace ``path`` with ``payload`` so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir(path)
+
+
+class JsonBackend:
+    """bot_data.json snapshot, optionally with an append-only op journal.
+
+    In journal mode each commit appends the batch to ``<path>.journal`` with
+    a single fsync, and the journal is folded into an atomically replaced
+    snapshot once it passes ``compact_bytes``.
+
+    Every snapshot bumps a generation number stored inside it, and the
+    journal starts with a ``{"gen": N}`` header. A crash between writing a
+    snapshot and truncating the journal leaves an older-generation journal,
+    which load skips instead of replaying it over the newer snapshot.
+    """
+
+    name = 'json'
+
+    def __init__(self, path=DATA_FILE, mode=PERSISTENCE_MODE, compact_bytes=JOURNAL_COMPACT_BYTES):
+        if mode not in ('journal', 'snapshot'):
+            raise ValueError(f"Unknown persistence mode: {mode}")
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.mode = mode
+        self.compact_bytes = compact_bytes
+        self._journal_size = 0
+        self._generation = 0
+
+    def load(self):
+        """Return ``(data, needs_full_write)``."""
+        needs_full = False
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self._generation = data.pop(GENERATION_KEY, 0)
+        except FileNotFoundError:
+            data = {}
+            needs_full = True
+        except json.JSONDecodeError as e:
+            # Keep the damaged file for recovery instead of overwriting it
+            backup = f"{self.path}.corrupt-{int(time.time())}"
+            os.replace(self.path, backup)
+            print(f"❌ {self.path} is corrupt ({e}); moved to {backup}")
+            data = {}
+            needs_full = True
+
+        replayed = self._replay_journal(data)
+        if replayed:
+            print(f"📒 Replayed {replayed} journal records")
+        return data, needs_full or replayed > 0
+
+    def _replay_journal(self, data):
+        try:
+            f = open(self.journal_path, 'rb')
+        except FileNotFoundError:
+            return 0
+
+        count = 0
+        valid_size = 0
+        stale = None
+        with f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # Torn final write from a crash; everything before it is intact
+                    print("⚠️ Ignoring incomplete trailing journal record")
+                    break
+                first = valid_size == 0
+                valid_size += len(line)
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"⚠️ Skipping bad journal record: {e}")
+                    continue
+                is_header = isinstance(record, dict) and 'gen' in record and 'op' not in record
+                if first:
+                    # Journals from before generations have no header and count as 0
+                    generation = record['gen'] if is_header else 0
+                    if generation < self._generation:
+                        stale = generation
+                        break
+                if is_header:
+                    continue
+                try:
+                    apply_op(data, record)
+                except (KeyError, TypeError, ValueError) as e:
+                    print(f"⚠️ Skipping bad journal record: {e}")
+                    continue
+                count += 1
+
+        if stale is not None:
+            # Left by a crash between writing the snapshot and truncating the
+            # journal: the snapshot already holds every record in it
+            print(f"⚠️ Discarding stale journal (generation {stale}, snapshot {self._generation})")
+            os.truncate(self.journal_path, 0)
+            self._journal_size = 0
+            return 0
+        if valid_size != os.path.getsize(self.journal_path):
+            # Drop the torn tail so new records are not appended after it
+            os.truncate(self.journal_path, valid_size)
+        self._journal_size = valid_size
+        return count
+
+    def has_backlog(self):
+        return self.mode == 'journal' and self._journal_size > 0
+
+    def _snapshot(self, data):
+        generation = self._generation + 1
+        return None, dumps({**data, GENERATION_KEY: generation}), generation
+
+    def prepare(self, ops, data, full):
+        """Serialize a batch on the loop thread; ``commit`` writes it."""
+        if self.mode == 'snapshot':
+            return self._snapshot(data)
+
+        lines = ''.join(dumps(op) + '\n' for op in ops) if ops else None
+        if full or self._journal_size + len(lines or '') > self.compact_bytes:
+            # The snapshot already contains every pending op
+            return self._snapshot(data)
+        return lines, None, None
+
+    def commit(self, batch):
+        lines, snapshot, generation = batch
+        if snapshot is not None:
+            write_atomic(self.path, snapshot)
+            # From here on the old journal is stale, even if truncating it fails
+            self._generation = generation
+            if self.mode == 'journal':
+                with open(self.journal_path, 'w') as f:
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._journal_size = 0
+            return len(snapshot)
+
+        if lines:
+            if self._journal_size == 0:
+                # A fresh journal records the snapshot generation it follows
+                lines = dumps({'gen': self._generation}) + '\n' + lines
+            # Group commit: one append and one fsync for the whole batch
+            with open(self.journal_path, 'a') as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_size += len(lines)
+            return len(lines)
+        return 0
+
+    def close(self):
+        pass
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS embeds (
+    name TEXT PRIMARY KEY,
+    title TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_embeds_title ON embeds(title);
+CREATE TABLE IF NOT EXISTS verified_users (
+    user_id INTEGER PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS ria_applications (
+    app_id TEXT PRIMARY KEY,
+    user_id INTEGER,
+    status TEXT,
+    submitted_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ria_status_submitted ON ria_applications(status, submitted_at);
+CREATE INDEX IF NOT EXISTS idx_ria_user ON ria_applications(user_id);
+CREATE TABLE IF NOT EXISTS records (
+    section TEXT NOT NULL,
+    key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (section, key)
+);
+CREATE TABLE IF NOT EXISTS list_items (
+    section TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (section, value)
+);
+"""
+
+
+def param_bytes(value):
+    """Approximate stored size of a bound SQLite parameter."""
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, (int, float)):
+        return 8  # SQLite stores integers in up to 8 bytes, reals in 8
+    return 0
+
+
+class SqliteBackend:
+    """SQLite (WAL) storage with dedicated, indexed tables for the hot sections.
+
+    ``stored_embeds``, ``verified_users`` and ``ria_applications`` get their
+    own tables; other dict sections live in ``records``, other list sections
+    in ``list_items`` and scalars in ``kv``. ``commit`` runs on a worker
+    thread, so the connection is guarded by a lock.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def load(self):
+        data = {}
+        with self._lock:
+            conn = self._conn
+            for key, value in conn.execute("SELECT key, value FROM kv"):
+                data[key] = json.loads(value)
+            data['stored_embeds'] = {
+                name: json.loads(raw)
+                for name, raw in conn.execute("SELECT name, data FROM embeds ORDER BY rowid")
+            }
+            data['verified_users'] = [
+                row[0] for row in conn.execute("SELECT user_id FROM verified_users ORDER BY rowid")
+            ]
+            data['ria_applications'] = {
+                app_id: json.loads(raw)
+                for app_id, raw in conn.execute("SELECT app_id, data FROM ria_applications ORDER BY rowid")
+            }
+            for section, key, raw in conn.execute("SELECT section, key, data FROM records ORDER BY rowid"):
+                data.setdefault(section, {})[key] = json.loads(raw)
+            for section, raw in conn.execute("SELECT section, value FROM list_items ORDER BY rowid"):
+                data.setdefault(section, []).append(json.loads(raw))
+        return data, False
+
+    def has_backlog(self):
+        return False
+
+    # Op -> SQL translation
+
+    def _put_stmt(self, section, key, value):
+        if section == 'stored_embeds':
+            title = value.get('title') if isinstance(value, dict) else None
+            return ("INSERT OR REPLACE INTO embeds (name, title, data) VALUES (?, ?, ?)",
+                    (key, title, dumps(value)))
+        if section == 'ria_applications':
+            value = value if isinstance(value, dict) else {}
+            return ("INSERT OR REPLACE INTO ria_applications (app_id, user_id, status, submitted_at, data) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, value.get('user_id'), value.get('status'), value.get('submitted_at'), dumps(value)))
+        return ("INSERT OR REPLACE INTO records (section, key, data) VALUES (?, ?, ?)",
+                (section, str(key), dumps(value)))
+
+    def _del_stmt(self, section, key):
+        if section == 'stored_embeds':
+            return "DELETE FROM embeds WHERE name = ?", (key,)
+        if section == 'ria_applications':
+            return "DELETE FROM ria_applications WHERE app_id = ?", (key,)
+        return "DELETE FROM records WHERE section = ? AND key = ?", (section, str(key))
+
+    def _add_stmt(self, section, value):
+        if section == 'verified_users':
+            return "INSERT OR IGNORE INTO verified_users (user_id) VALUES (?)", (value,)
+        return "INSERT OR IGNORE INTO list_items (section, value) VALUES (?, ?)", (section, dumps(value))
+
+    def _clear_stmt(self, section):
+        if section == 'stored_embeds':
+            return "DELETE FROM embeds", ()
+        if section == 'verified_users':
+            return "DELETE FROM verified_users", ()
+        if section == 'ria_applications':
+            return "DELETE FROM ria_applications", ()
+        return None
+
+    def _set_stmts(self, key, value):
+        stmts = [("DELETE FROM kv WHERE key = ?", (key,))]
+        clear = self._clear_stmt(key)
+        if clear is not None:
+            stmts.append(clear)
+        else:
+            stmts.append(("DELETE FROM records WHERE section = ?", (key,)))
+            stmts.append(("DELETE FROM list_items WHERE section = ?", (key,)))
+
+        if isinstance(value, (dict, list)) and clear is None:
+            # Empty marker so the section survives a reload with no rows
+            stmts.append(("INSERT INTO kv (key, value) VALUES (?, ?)", (key, dumps(type(value)()))))
+
+        if isinstance(value, dict):
+            stmts.extend(self._put_stmt(key, k, v) for k, v in value.items())
+        elif isinstance(value, list):
+            stmts.extend(self._add_stmt(key, v) for v in value)
+        else:
+            stmts.append(("INSERT INTO kv (key, value) VALUES (?, ?)", (key, dumps(value))))
+        return stmts
+
+    def prepare(self, ops, data, full):
+        if full:
+            ops = [{'op': 'set', 'k': key, 'v': value} for key, value in data.items()]
+        stmts = []
+        for op in ops:
+            kind = op['op']
+            if kind == 'set':
+                stmts.extend(self._set_stmts(op['k'], op['v']))
+            elif kind == 'put':
+                stmts.append(self._put_stmt(op['s'], op['k'], op['v']))
+            elif kind == 'del':
+                stmts.append(self._del_stmt(op['s'], op['k']))
+            elif kind == 'add':
+                stmts.append(self._add_stmt(op['s'], op['v']))
+        return stmts
+
+    def commit(self, stmts):
+        if not stmts:
+            return 0
+        written = 0
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                for sql, params in stmts:
+                    conn.execute(sql, params)
+                    written += sum(map(param_bytes, params))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return written
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def scoped_path(path, scope):
+    """'bot_data.json' -> 'bot_data.<scope>.json'; unchanged without a scope."""
+    if not scope:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{scope}{ext}"
+
+
+def create_backend(kind=BACKEND, scope=None):
+    if kind == 'json':
+        return JsonBackend(scoped_path(DATA_FILE, scope))
+    if kind == 'sqlite':
+        return SqliteBackend(scoped_path(DB_FILE, scope))
+    raise ValueError(f"Unknown DATA_BACKEND: {kind}")
+
+
+def migrate_json_to_sqlite(json_path=DATA_FILE, db_path=DB_FILE):
+    """One-shot copy of bot_data.json (plus any journal tail) into SQLite."""
+    data, _ = JsonBackend(json_path).load()
+    target = SqliteBackend(db_path)
+    try:
+        target.commit(target.prepare([], data, full=True))
+    finally:
+        target.close()
+    return data
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != 'migrate':
+        print("Usage: python storage.py migrate [bot_data.json] [bot_data.db]")
+        sys.exit(1)
+    src = sys.argv[2] if len(sys.argv) > 2 else DATA_FILE
+    dst = sys.argv[3] if len(sys.argv) > 3 else DB_FILE
+    migrated = migrate_json_to_sqlite(src, dst)
+    print(f"✅ Migrated {src} -> {dst}: "
+          f"{len(migrated.get('stored_embeds', {}))} embeds, "
+          f"{len(migrated.get('verified_users', []))} verified users, "
+          f"{len(migrated.get('ria_applications', {}))} applications")
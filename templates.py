@@ -0,0 +1,70 @@
+import re
+from datetime import datetime
+
+# Text fields that may hold placeholders, with Discord's length limits
+# (a substituted value can push a field over the limit, so renders are clipped)
+TEMPLATE_FIELDS = {
+    'title': 256,
+    'description': 4096,
+    'footer_text': 2048,
+    'author_name': 256,
+}
+VARIABLES = ('user', 'guild', 'member_count', 'date')
+
+# Only known names are placeholders, so other braces in the text stay as typed
+PLACEHOLDER = re.compile(r"\{(" + '|'.join(VARIABLES) + r")\}")
+
+
+def compile_field(text):
+    """Split text into ``[literal, variable, literal, ...]``, or None if it has no placeholders."""
+    if not text or '{' not in text:
+        return None
+    parts = PLACEHOLDER.split(text)
+    return parts if len(parts) > 1 else None
+
+
+def compile_template(embed_data):
+    """Render plan for an embed: ``{field: parts}`` for each field with placeholders, or None.
+
+    Built once when the embed is saved (it is stored with the record), so
+    a render is only joins over the pre-split parts.
+    """
+    plan = {}
+    for field in TEMPLATE_FIELDS:
+        parts = compile_field(embed_data.get(field))
+        if parts is not None:
+            plan[field] = parts
+    return plan or None
+
+
+def template_variables(plan):
+    """Sorted names the plan uses; renders only differ by these values."""
+    return tuple(sorted({parts[i] for parts in plan.values() for i in range(1, len(parts), 2)}))
+
+
+def render_parts(parts, context):
+    out = [parts[0]]
+    for i in range(1, len(parts), 2):
+        out.append(context.get(parts[i], ''))
+        out.append(parts[i + 1])
+    return ''.join(out)
+
+
+def render_template(plan, embed_data, context):
+    """Copy of ``embed_data`` with the plan's fields filled in from ``context``."""
+    rendered = dict(embed_data)
+    for field, parts in plan.items():
+        rendered[field] = render_parts(parts, context)[:TEMPLATE_FIELDS[field]]
+    return rendered
+
+
+def template_context(user=None, guild=None):
+    """Placeholder values for a user and/or guild; missing ones render as empty text."""
+    context = {'date': datetime.utcnow().strftime('%Y-%m-%d')}
+    if user is not None:
+        context['user'] = getattr(user, 'display_name', None) or str(user)
+    if guild is not None:
+        context['guild'] = guild.name
+        if guild.member_count is not None:
+            context['member_count'] = str(guild.member_count)
+    return context
@@ -0,0 +1,53 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_store import DataStore
+from storage import JsonBackend
+
+
+class SlowBackend(JsonBackend):
+    """JsonBackend whose commits take a while and record how many overlap."""
+
+    def __init__(self, path, delay):
+        super().__init__(path, mode='journal')
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+        self._count_lock = threading.Lock()
+
+    def commit(self, batch):
+        with self._count_lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(self.delay)
+            return super().commit(batch)
+        finally:
+            with self._count_lock:
+                self.running -= 1
+
+
+def test_close_during_slow_commit_waits_for_it(tmp_path):
+    path = str(tmp_path / 'bot_data.json')
+    backend = SlowBackend(path, delay=0.3)
+
+    async def scenario():
+        store = DataStore(backend, flush_delay=0)
+        await store.open()
+        store.put('stored_embeds', 'a', {'title': 'first'})
+        # Let the flusher pick the batch up and start committing
+        while backend.running == 0:
+            await asyncio.sleep(0.01)
+        store.put('stored_embeds', 'b', {'title': 'second'})
+        await store.close()
+
+    asyncio.run(scenario())
+
+    assert backend.max_running == 1
+    reloaded = DataStore(JsonBackend(path)).load()
+    assert set(reloaded['stored_embeds']) == {'a', 'b'}
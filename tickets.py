@@ -0,0 +1,105 @@
+import asyncio
+from datetime import datetime
+
+
+class TicketManager:
+    """Ticket numbering, per-guild creation locks and O(1) lookups over ``active_tickets``.
+
+    Ticket numbers come from ``ticket_counter`` via ``store.increment``,
+    which runs without awaiting, so concurrent presses can never read the
+    same value. Creation takes a per-guild ``asyncio.Lock``, so guilds never
+    wait on each other.
+    """
+
+    def __init__(self, store, section='active_tickets'):
+        self.store = store
+        self.section = section
+        self._by_user = {}
+        self._by_channel = {}
+        self._locks = {}
+
+    @property
+    def tickets(self):
+        return self.store.section(self.section)
+
+    def load(self, channel_exists=None):
+        """Rebuild the user/channel indexes from persisted tickets.
+
+        Tickets for which ``channel_exists(guild_id, channel_id)`` is False
+        (the channel was deleted while the bot was away) are dropped.
+        """
+        self._by_user = {}
+        self._by_channel = {}
+        stale = []
+        for ticket_id, ticket in self.tickets.items():
+            if channel_exists is not None and not channel_exists(ticket['guild_id'], ticket['channel_id']):
+                stale.append(ticket_id)
+            else:
+                self._index(ticket_id, ticket)
+        for ticket_id in stale:
+            self.store.remove(self.section, ticket_id)
+        if stale:
+            print(f"🧹 Dropped {len(stale)} tickets whose channel no longer exists")
+        return len(self.tickets)
+
+    def _index(self, ticket_id, ticket):
+        self._by_user[(ticket['guild_id'], ticket['user_id'])] = ticket_id
+        self._by_channel[ticket['channel_id']] = ticket_id
+
+    def allocate_number(self):
+        return self.store.increment('ticket_counter')
+
+    def lock(self, guild_id):
+        lock = self._locks.get(guild_id)
+        if lock is None:
+            lock = self._locks[guild_id] = asyncio.Lock()
+        return lock
+
+    def find_by_user(self, guild_id, user_id):
+        ticket_id = self._by_user.get((guild_id, user_id))
+        return self.tickets.get(ticket_id) if ticket_id else None
+
+    def find_by_channel(self, channel_id):
+        ticket_id = self._by_channel.get(channel_id)
+        return self.tickets.get(ticket_id) if ticket_id else None
+
+    async def open(self, guild_id, user_id, create_channel):
+        """Open a ticket unless the user already has one.
+
+        ``create_channel(number)`` is awaited under the guild lock and must
+        return the new channel. Returns ``(ticket, created)``.
+        """
+        existing = self.find_by_user(guild_id, user_id)
+        if existing:
+            return existing, False
+
+        async with self.lock(guild_id):
+            # Another press may have finished while we waited for the lock
+            existing = self.find_by_user(guild_id, user_id)
+            if existing:
+                return existing, False
+
+            number = self.allocate_number()
+            channel = await create_channel(number)
+            ticket_id = f"ticket_{number}"
+            ticket = {
+                'number': number,
+                'guild_id': guild_id,
+                'user_id': user_id,
+                'channel_id': channel.id,
+                'opened_at': datetime.now().isoformat()
+            }
+            self.store.put(self.section, ticket_id, ticket)
+            self._index(ticket_id, ticket)
+            return ticket, True
+
+    def close(self, channel_id):
+        """Forget the ticket for ``channel_id``; returns the closed ticket or None."""
+        ticket_id = self._by_channel.pop(channel_id, None)
+        if ticket_id is None:
+            return None
+        ticket = self.tickets.get(ticket_id)
+        if ticket is not None:
+            self._by_user.pop((ticket['guild_id'], ticket['user_id']), None)
+            self.store.remove(self.section, ticket_id)
+        return ticket
@@ -0,0 +1,159 @@
+import asyncio
+import functools
+import os
+import time
+
+from instrumentation import find_interaction, profiler
+from metrics import registry, work_queue_rejected, work_queue_wait
+
+# Quick jobs (button clicks) and bulk jobs (imports, exports, broadcasts) get
+# separate lanes so a long export never delays a click
+WORK_QUEUE_WORKERS = int(os.getenv('WORK_QUEUE_WORKERS', '8'))
+WORK_QUEUE_SIZE = int(os.getenv('WORK_QUEUE_SIZE', '200'))
+BULK_QUEUE_WORKERS = int(os.getenv('BULK_QUEUE_WORKERS', '2'))
+BULK_QUEUE_SIZE = int(os.getenv('BULK_QUEUE_SIZE', '20'))
+
+BUSY_MESSAGE = "⏳ **The bot is busy right now.** Please try again in a moment."
+
+
+class WorkQueueFull(Exception):
+    pass
+
+
+class WorkQueueStopped(RuntimeError):
+    pass
+
+
+class WorkQueue:
+    """Bounded queue of handler work drained by a fixed pool of worker tasks.
+
+    ``submit`` never waits for room: a full queue raises WorkQueueFull so the
+    caller can tell the user to retry instead of piling up work.
+    """
+
+    def __init__(self, name, workers, max_size):
+        self.name = name
+        self.workers = workers
+        self.max_size = max_size
+        self.running = 0
+        self._queue = None
+        self._tasks = []
+        self._stopped = False
+
+    def depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        """Start the workers on the running loop."""
+        self._stopped = False
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(self.max_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Cancel the workers and fail anything running or still queued.
+
+        Until ``start()`` is called again, ``submit`` raises WorkQueueStopped.
+        """
+        self._stopped = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while self._queue is not None and not self._queue.empty():
+            future = self._queue.get_nowait()[3]
+            if not future.done():
+                future.set_exception(WorkQueueStopped(f"{self.name} queue stopped"))
+        self._queue = None
+
+    def submit(self, func, *args, **kwargs):
+        """Queue ``func(*args, **kwargs)`` and return a future for its result."""
+        if self._stopped:
+            # Starting workers again here would run new work during shutdown
+            raise WorkQueueStopped(f"{self.name} queue stopped")
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((func, args, kwargs, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            work_queue_rejected.inc(self.name)
+            raise WorkQueueFull(f"{self.name} queue is full ({self.max_size} jobs)") from None
+        return future
+
+    async def run(self, func, *args, **kwargs):
+        return await self.submit(func, *args, **kwargs)
+
+    async def _worker(self):
+        while True:
+            func, args, kwargs, future, queued_at = await self._queue.get()
+            try:
+                if future.cancelled():
+                    continue  # the handler gave up waiting
+                work_queue_wait.observe(time.perf_counter() - queued_at, self.name)
+                self.running += 1
+                try:
+                    result = await func(*args, **kwargs)
+                except asyncio.CancelledError:
+                    # stop() cancelled this worker; don't leave the caller waiting
+                    if not future.done():
+                        future.set_exception(WorkQueueStopped(f"{self.name} queue stopped"))
+                    raise
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+                finally:
+                    self.running -= 1
+            finally:
+                self._queue.task_done()
+
+    def stats(self):
+        return {
+            'queued': self.depth(),
+            'running': self.running,
+            'workers': self.workers,
+            'max_size': self.max_size,
+            'rejected': work_queue_rejected.value(self.name),
+        }
+
+
+work_queue = WorkQueue('interactive', WORK_QUEUE_WORKERS, WORK_QUEUE_SIZE)
+bulk_queue = WorkQueue('bulk', BULK_QUEUE_WORKERS, BULK_QUEUE_SIZE)
+
+registry.gauge(
+    'bot_work_queue_jobs', 'Handler jobs waiting for or held by a worker', ('queue', 'state'),
+    collect=lambda: {
+        (queue.name, state): value
+        for queue in (work_queue, bulk_queue)
+        for state, value in (('queued', queue.depth()), ('running', queue.running))
+    }
+)
+
+
+def deferred(queue=None, check=None, ephemeral=True, thinking=True):
+    """Acknowledge the interaction at once, then run the handler on a work queue.
+
+    ``check(interaction)`` runs first and may answer directly (e.g. with the
+    verification modal); returning False skips the handler. The handler
+    replies through ``interaction.followup`` (or ``edit_original_response``
+    with ``thinking=False`` on a component). A full queue gets
+    ``BUSY_MESSAGE``. Place it below ``@instrumented``.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            interaction = find_interaction(args)
+            if check is not None and not await check(interaction):
+                return None
+            if not interaction.response.is_done():
+                await interaction.response.defer(ephemeral=ephemeral, thinking=thinking)
+            try:
+                return await (queue or work_queue).run(profiler.follow(func), *args, **kwargs)
+            except (WorkQueueFull, WorkQueueStopped):
+                await interaction.followup.send(BUSY_MESSAGE, ephemeral=True)
+                return None
+        return wrapper
+    return decorator